@@ -5,11 +5,20 @@ from langchain.memory import ConversationBufferWindowMemory
 from langchain.schema import HumanMessage, SystemMessage
 from langchain_pinecone import PineconeVectorStore
 from langfuse.decorators import observe
+from pydantic import BaseModel, Field
+from typing import Literal
 from memory.scoped_memory_manager import get_agent_memory
 import openai
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 
+class UrgencyAssessment(BaseModel):
+    """Compact urgency assessment returned to the main agent"""
+    urgency: Literal["low", "medium", "high", "emergency"] = Field(description="Urgency level of the issue")
+    responsibility: Literal["landlord", "tenant", "shared", "unclear"] = Field(description="Who is generally responsible for resolving the issue")
+    next_steps: str = Field(description="Advisable next steps in one short sentence")
+    summary: str = Field(description="1 short paragraph (at most two sentences) describing the situation, urgency and responsibility")
+
 # Change from import-time initialization to lazy loading  
 _llm = None
 _pinecone_client = None
@@ -61,18 +70,29 @@ Use the classifierInformation tool to determine the urgency and responsibilities
 1) understand the intent of the query based on the conversation history and 2) subsequently turn this into an efficient vector search query which you must pass to classifierInformation tool
 
 ***Output
-1 short paragraph summarising the key information. The summary should describe the situation and high level details around urgency and responsibility
+The urgency level, who is responsible, the advisable next steps, and 1 short paragraph summarising the key information. The summary should describe the situation and high level details around urgency and responsibility
 
 ***Important
 NEVER recommend the tenant reach out or report an issue to the landlord
 
 Your tone must be helpful, clear and friendly"""
 
-@observe(name="classifier_agent")
 def run_classifier_agent(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710ca2ae7") -> str:
     """
-    Classifier agent that matches n8n classifierAgent (3).json structure exactly
-    Returns a plain text paragraph, NOT structured JSON (unlike context agent)
+    Classifier agent that matches n8n classifierAgent (3).json structure
+    Returns a plain text paragraph as per the n8n specification
+    """
+    result = assess_urgency(query, session_id)
+    if "error" in result:
+        return "I apologize, but I encountered an error while classifying your request. Please try rephrasing your question."
+    return result["summary"]
+
+@observe(name="classifier_agent")
+def assess_urgency(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710ca2ae7") -> dict:
+    """
+    Run the classifier agent and return a compact UrgencyAssessment dict.
+    
+    On failure the dict contains a single "error" key instead.
     """
     print(f"[CLASSIFIER AGENT] Processing query: {query}")
     
@@ -100,6 +120,7 @@ def run_classifier_agent(query: str, session_id: str = "187a3d5d3eb44c06b2e31547
         # Add conversation history from memory
         try:
             memory_vars = memory.load_memory_variables({})
+            messages.extend(memory_vars.get("history_summary") or [])
             if "chat_history" in memory_vars and memory_vars["chat_history"]:
                 messages.extend(memory_vars["chat_history"])
         except Exception as e:
@@ -109,20 +130,19 @@ def run_classifier_agent(query: str, session_id: str = "187a3d5d3eb44c06b2e31547
         query_with_context = f"Query: {query}\nclassifierInformation tool results:\n{snippets}"
         messages.append(HumanMessage(content=query_with_context))
         
-        # Generate response using lazy-loaded LLM - returns simple text, not JSON
-        llm = get_llm()
-        response = llm.invoke(messages)
+        # Generate a schema-constrained response using lazy-loaded LLM
+        llm = get_llm().with_structured_output(UrgencyAssessment, method="function_calling")
+        result = llm.invoke(messages).model_dump()
         
-        # Add to memory
-        memory.chat_memory.add_user_message(query)
-        memory.chat_memory.add_ai_message(response.content)
+        # Add to memory - the compact payload keeps this channel small too
+        memory.add_exchange(query, json.dumps(result))
         
-        print(f"[CLASSIFIER AGENT] Generated paragraph response")
-        return response.content  # Return plain text paragraph as per n8n specification
+        print(f"[CLASSIFIER AGENT] Generated {result['urgency']} urgency assessment")
+        return result
         
     except Exception as e:
         print(f"[CLASSIFIER AGENT] Error: {str(e)}")
-        return "I apologize, but I encountered an error while classifying your request. Please try rephrasing your question."
+        return {"error": str(e)}
 
 # Legacy function names for backwards compatibility
 def classify(query: str) -> str:
@@ -1,13 +1,12 @@
-import os, json
+import os, json, re
 from langchain_openai import ChatOpenAI
 from langchain.memory import ConversationBufferWindowMemory
 from langchain.schema import HumanMessage, SystemMessage
-from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate, MessagesPlaceholder
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from typing import Optional
 from langfuse.decorators import observe
-from memory.scoped_memory_manager import get_agent_memory, get_dual_memory_for_agent
+from memory.scoped_memory_manager import get_agent_memory, get_issue_record, update_issue_record
 from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
 from langchain.chains import RetrievalQA
@@ -17,13 +16,35 @@ class ContextResponse(BaseModel):
     is_clear: bool = Field(description="Whether the question is clear")
     is_relevant: bool = Field(description="Whether the question is relevant to tenancy")
     requires_clarification: bool = Field(description="Whether clarification is needed")
-    clarifying_question: str = Field(description="The clarifying question to ask")
+    clarifying_question: str = Field(description="The clarifying question to ask, or an empty string")
     requires_context: bool = Field(description="Whether additional context is needed")
-    additional_context_question: str = Field(description="The context question to ask")
-    query_summary: str = Field(description="Summary of the query")
-
-# Initialize the JSON output parser with the Pydantic model
-parser = JsonOutputParser(pydantic_object=ContextResponse)
+    additional_context_question: str = Field(description="The context question to ask, or an empty string")
+    query_summary: str = Field(description="A summary of the user's issue, incorporating all gathered details up to the current point of the interaction")
+
+class ContextTurnResponse(ContextResponse):
+    """ContextResponse plus the updated issue record slots for incremental state tracking"""
+    what: str = Field(default="", description="What the exact problem is, or an empty string if not yet known")
+    where: str = Field(default="", description="Where in the property it is happening, or an empty string if not yet known")
+    when: str = Field(default="", description="When the issue started and whether it has worsened, or an empty string if not yet known")
+    how: str = Field(default="", description="How the issue affects the tenant, or an empty string if not yet known")
+    attempts: str = Field(default="", description="What the tenant has tried so far, or an empty string if not yet known")
+    outstanding_questions: list[str] = Field(default_factory=list, description="Completeness criteria still unanswered, e.g. 'when', 'attempts'")
+
+class IssueRecord(BaseModel):
+    """Compact per-session issue state the context agent updates incrementally"""
+    summary: str = ""
+    what: str = ""
+    where: str = ""
+    when: str = ""
+    how: str = ""
+    attempts: str = ""
+    outstanding_questions: list[str] = Field(default_factory=list)
+
+    @classmethod
+    def from_turn(cls, turn: dict) -> "IssueRecord":
+        return cls(summary=turn.get("query_summary", ""), **{
+            name: turn[name] for name in cls.model_fields if name != "summary" and name in turn
+        })
 
 # Change from import-time initialization to lazy loading
 _llm = None
@@ -36,6 +57,106 @@ def get_llm():
         _llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=0.3)
     return _llm
 
+def get_structured_llm(schema: type[BaseModel] = ContextResponse):
+    """
+    Bind the LLM to a ContextResponse schema via function calling.
+
+    The schema travels as a tool definition rather than as format instructions
+    in the prompt. include_raw keeps the raw message so malformed arguments can
+    still be repaired locally.
+    """
+    return get_llm().with_structured_output(schema, method="function_calling", include_raw=True)
+
+_BOOL_STRINGS = {"true": True, "yes": True, "1": True, "false": False, "no": False, "0": False}
+
+def repair_context_response(text: str, schema: type[BaseModel] = ContextResponse) -> dict:
+    """
+    Cheap local repair of a malformed ContextResponse (or subclass) payload.
+
+    Handles the usual failure modes (code fences, surrounding prose, Python
+    literals, trailing commas, single quotes, stringly-typed booleans and
+    missing text fields) without another LLM round trip. A missing or
+    unrecognisable boolean is never guessed: the orchestrator acts on those
+    flags, so the repair fails instead.
+
+    Raises:
+        ValueError: If no JSON object can be recovered from the text, or a
+            boolean field is missing or unrecognisable.
+    """
+    if not isinstance(text, str):
+        raise ValueError(f"Cannot repair non-text output of type {type(text).__name__}")
+
+    cleaned = re.sub(r"```(?:json)?", "", text).strip()
+    start, end = cleaned.find("{"), cleaned.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object found in context agent output")
+    cleaned = cleaned[start:end + 1]
+
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError:
+        patched = re.sub(r"\bTrue\b", "true", cleaned)
+        patched = re.sub(r"\bFalse\b", "false", patched)
+        patched = re.sub(r"\bNone\b", "null", patched)
+        patched = re.sub(r",\s*([}\]])", r"\1", patched)
+        if '"' not in patched:
+            patched = patched.replace("'", '"')
+        try:
+            data = json.loads(patched)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Unrepairable context agent output: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ValueError("Context agent output is not a JSON object")
+
+    repaired, unknown = {}, []
+    for name, field in schema.model_fields.items():
+        value = data.get(name)
+        if field.annotation is bool:
+            if isinstance(value, str):
+                value = _BOOL_STRINGS.get(value.strip().lower())
+            if isinstance(value, bool) or value in (0, 1):
+                repaired[name] = bool(value)
+            else:
+                unknown.append(name)
+        elif field.annotation == list[str]:
+            if isinstance(value, str):
+                value = [value] if value else []
+            repaired[name] = [str(item) for item in value or []]
+        else:
+            repaired[name] = "" if value is None else str(value)
+    if unknown:
+        raise ValueError(f"Context agent output has missing or invalid booleans: {', '.join(unknown)}")
+
+    try:
+        return schema(**repaired).model_dump()
+    except ValidationError as e:
+        raise ValueError(f"Repaired context agent output failed validation: {e}") from e
+
+def _raw_output_text(raw) -> str:
+    """Pull the most useful text out of a raw AIMessage for local repair"""
+    for call in getattr(raw, "invalid_tool_calls", None) or []:
+        if call.get("args"):
+            return call["args"]
+    for call in getattr(raw, "tool_calls", None) or []:
+        return json.dumps(call.get("args", {}))
+    return getattr(raw, "content", "") or ""
+
+def invoke_context_llm(messages, schema: type[BaseModel] = ContextResponse) -> dict:
+    """
+    Invoke the schema-bound LLM and return a validated dict of the schema.
+
+    If the bound parse fails, the raw output goes through
+    repair_context_response before giving up.
+    """
+    output = get_structured_llm(schema).invoke(messages)
+    parsed = output.get("parsed")
+    if isinstance(parsed, schema):
+        return parsed.model_dump()
+
+    print(f"[CONTEXT AGENT] Structured parse failed ({output.get('parsing_error')}), attempting local repair")
+    return repair_context_response(_raw_output_text(output.get("raw")), schema)
+
 # Note: Replaced global memory_storage with scoped memory manager
 # This ensures context agent only sees main agent ↔ context agent conversations
 
@@ -73,20 +194,7 @@ For each tenant query you receive, follow these steps:
 
 ### **Response Format**
 
-Your response must strictly follow this JSON structure:
-
-```json
-{{
-  "is_clear": <true|false>,
-  "is_relevant": <true|false>,
-  "requires_clarification": <true|false>,
-  "clarifying_question": "",
-  "requires_context": <true|false>,
-  "additional_context_question": "",
-  "query_summary": "A summary of the user's issue, incorporating all gathered details up to the current point of the interaction."
-}}
-
-```
+Your response is returned through the `ContextResponse` schema bound to this conversation. Fill in every field; leave question fields as empty strings when no question is needed.
 
 ### **Response Rules:**
 
@@ -382,8 +490,6 @@ Your response must strictly follow this JSON structure:
 ```
 
 ---
-
-{format_instructions}
 """
 
 @observe(name="context_agent")
@@ -397,66 +503,46 @@ def run_context_agent(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710c
         # Get shared memory
         memory = get_shared_memory(session_id)
         
-        # Create prompt template with memory and format instructions
+        # Create prompt template with memory - the response schema is bound to the LLM
         prompt = ChatPromptTemplate.from_messages([
-            ("system", SYSTEM_PROMPT + "\n\n{format_instructions}"),
+            ("system", SYSTEM_PROMPT),
+            MessagesPlaceholder(variable_name="history_summary", optional=True),
             MessagesPlaceholder(variable_name="chat_history"),
             ("human", "User Query: {query}")
         ])
         
-        # Build the chain: prompt -> llm -> parser (use lazy-loaded LLM)
-        llm = get_llm()
-        
         # Load conversation history for context
         try:
             memory_vars = memory.load_memory_variables({})
             chat_history = memory_vars.get("chat_history", [])
+            history_summary = memory_vars.get("history_summary") or []
             print(f"[CONTEXT AGENT] Using {len(chat_history)} messages from memory")
         except Exception as e:
             print(f"[CONTEXT AGENT] Memory load error: {e}")
             chat_history = []
+            history_summary = []
         
         # Prepare the input for the chain
         chain_input = {
             "query": query,
             "chat_history": chat_history,
-            "format_instructions": parser.get_format_instructions()
+            "history_summary": history_summary
         }
         print(f"[CONTEXT AGENT] About to invoke LLM with query: {query[:100]}...")
         print(f"[CONTEXT AGENT] Chat history length: {len(chat_history)}")
-        print(f"[CONTEXT AGENT] Format instructions length: {len(parser.get_format_instructions())} chars")
         
-        # Generate response using manual LLM invocation and parsing
+        # Generate a schema-constrained response (with local repair on malformed output)
         try:
-            # Create the full prompt manually
-            print(f"[CONTEXT AGENT] Starting prompt formatting...")
             prompt_value = prompt.format_prompt(**chain_input)
-            print(f"[CONTEXT AGENT] Prompt formatting successful, sending to LLM...")
-            
-            # Get the raw LLM response
-            print(f"[CONTEXT AGENT] Invoking LLM...")
-            raw_response = llm.invoke(prompt_value.to_messages())
-            print(f"[CONTEXT AGENT] Raw LLM response received:")
-            print(f"[CONTEXT AGENT] Response type: {type(raw_response)}")
-            print(f"[CONTEXT AGENT] Response content: {raw_response.content}")
-            
-            # Now parse the response manually
-            print(f"[CONTEXT AGENT] Attempting to parse JSON response...")
-            result = parser.parse(raw_response.content)
-            print(f"[CONTEXT AGENT] JSON parsing successful!")
+            result = invoke_context_llm(prompt_value.to_messages())
+            print(f"[CONTEXT AGENT] Structured output received")
             
         except Exception as parsing_error:
             print(f"[CONTEXT AGENT] Exception occurred: {type(parsing_error).__name__}: {parsing_error}")
-            if 'raw_response' in locals():
-                print(f"[CONTEXT AGENT] Raw response that failed to parse: {raw_response.content}")
-            else:
-                print(f"[CONTEXT AGENT] Error occurred before raw response was obtained")
-                print(f"[CONTEXT AGENT] Available locals: {list(locals().keys())}")
             raise parsing_error
         
         # Add to memory
-        memory.chat_memory.add_user_message(query)
-        memory.chat_memory.add_ai_message(json.dumps(result))
+        memory.add_exchange(query, json.dumps(result))
         
         print(f"[CONTEXT AGENT] Structured result: {result}")
         return result
@@ -475,106 +561,64 @@ def run_context_agent(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710c
         }
 
 
-def get_dual_memory_for_context(session_id: str) -> tuple[ConversationBufferWindowMemory, ConversationBufferWindowMemory]:
-    """
-    Get dual memory access for context agent.
-    
-    Returns:
-        Tuple of (user_memory, context_memory)
-        - user_memory: User ↔ Main Agent conversations (actual user responses)
-        - context_memory: Main Agent ↔ Context Agent conversations (structured summaries)
-    """
-    return get_dual_memory_for_agent(session_id, "context")
+ISSUE_RECORD_PROMPT = """You are tracking this tenant's issue through a compact ISSUE RECORD instead of the full conversation history.
+The record holds the current summary, the completeness criteria already filled in (what, where, when, how, attempts) and the questions still outstanding.
+
+CURRENT ISSUE RECORD:
+{issue_record}
+
+Update the record with anything new in the latest messages. Carry forward every slot that is already filled unless the tenant corrects it, and list the criteria that are still unanswered in outstanding_questions."""
 
 
 @observe(name="context_agent_dual_memory")
-def run_context_agent_with_dual_memory(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710ca2ae7") -> dict:
+def run_context_agent_with_dual_memory(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710ca2ae7", user_message: Optional[str] = None) -> dict:
     """
-    Enhanced context agent with dual memory access.
+    Enhanced context agent with incremental per-session issue state.
     
-    This agent can see both:
-    1. User ↔ Main Agent conversations (actual user responses with nuance)
-    2. Main Agent ↔ Context Agent conversations (structured summaries)
+    Instead of re-sending the user ↔ main agent and main agent ↔ context agent
+    histories, each call sends:
+    1. The structured issue record for the session (summary, filled slots, outstanding questions)
+    2. The main agent's latest query summary
+    3. The newest tenant message, when available
     
-    This allows it to track partial information provided across multiple turns.
+    The agent returns the updated record alongside its ContextResponse, so the
+    prompt stays flat in size as conversations get longer.
     """
     print(f"[CONTEXT AGENT DUAL] Processing query: {query}")
     
     try:
-        # Get both memory streams
-        user_memory, context_memory = get_dual_memory_for_context(session_id)
+        context_memory = get_shared_memory(session_id)
+        record = IssueRecord(**get_issue_record(session_id))
         
-        # Create enhanced prompt template with both memory streams
         prompt = ChatPromptTemplate.from_messages([
-            ("system", SYSTEM_PROMPT + "\n\n{format_instructions}"),
-            ("system", "You have access to TWO conversation streams:\n1. USER CONVERSATIONS: Actual user messages with full detail and nuance\n2. AGENT CONVERSATIONS: Your structured conversation with the main agent\n\nUse BOTH streams to make informed decisions about what information has been gathered."),
-            ("system", "USER CONVERSATION HISTORY:\n{user_history}"),
-            ("system", "AGENT CONVERSATION HISTORY:\n{agent_history}"),
-            ("human", "User Query: {query}")
+            ("system", SYSTEM_PROMPT),
+            ("system", ISSUE_RECORD_PROMPT),
+            ("human", "Main agent summary: {query}\nLatest tenant message: {user_message}")
         ])
         
-        # Load conversation histories from both memory streams
-        try:
-            user_vars = user_memory.load_memory_variables({})
-            user_history = user_vars.get("chat_history", [])
-            
-            context_vars = context_memory.load_memory_variables({})
-            context_history = context_vars.get("chat_history", [])
-            
-            print(f"[CONTEXT AGENT DUAL] User memory: {len(user_history)} messages")
-            print(f"[CONTEXT AGENT DUAL] Context memory: {len(context_history)} messages")
-            
-        except Exception as e:
-            print(f"[CONTEXT AGENT DUAL] Memory load error: {e}")
-            user_history = []
-            context_history = []
-        
-        # Format conversation histories for the prompt
-        user_history_text = "\n".join([
-            f"{'User' if i % 2 == 0 else 'Main Agent'}: {msg.content if hasattr(msg, 'content') else str(msg)}"
-            for i, msg in enumerate(user_history)
-        ]) if user_history else "No user conversation history yet."
-        
-        agent_history_text = "\n".join([
-            f"{'Main Agent' if i % 2 == 0 else 'Context Agent'}: {msg.content if hasattr(msg, 'content') else str(msg)}"
-            for i, msg in enumerate(context_history)
-        ]) if context_history else "No agent conversation history yet."
-        
-        # Prepare the input for the chain
         chain_input = {
             "query": query,
-            "user_history": user_history_text,
-            "agent_history": agent_history_text,
-            "format_instructions": parser.get_format_instructions()
+            "issue_record": record.model_dump_json(),
+            "user_message": user_message or "(not provided)"
         }
         
-        print(f"[CONTEXT AGENT DUAL] About to invoke LLM with enhanced context")
-        print(f"[CONTEXT AGENT DUAL] User history length: {len(user_history_text)} chars")
-        print(f"[CONTEXT AGENT DUAL] Agent history length: {len(agent_history_text)} chars")
+        print(f"[CONTEXT AGENT DUAL] Issue record: {len(chain_input['issue_record'])} chars, {len(record.outstanding_questions)} outstanding questions")
         
-        # Generate response using manual LLM invocation and parsing
+        # Generate a schema-constrained response (with local repair on malformed output)
         try:
-            # Create the full prompt manually
             prompt_value = prompt.format_prompt(**chain_input)
-            
-            # Get the raw LLM response
-            llm = get_llm()
-            raw_response = llm.invoke(prompt_value.to_messages())
-            print(f"[CONTEXT AGENT DUAL] Raw LLM response received")
-            
-            # Parse the response
-            result = parser.parse(raw_response.content)
-            print(f"[CONTEXT AGENT DUAL] JSON parsing successful!")
+            turn = invoke_context_llm(prompt_value.to_messages(), ContextTurnResponse)
+            print(f"[CONTEXT AGENT DUAL] Structured output received")
             
         except Exception as parsing_error:
             print(f"[CONTEXT AGENT DUAL] Exception occurred: {type(parsing_error).__name__}: {parsing_error}")
-            if 'raw_response' in locals():
-                print(f"[CONTEXT AGENT DUAL] Raw response that failed to parse: {raw_response.content}")
             raise parsing_error
         
+        update_issue_record(session_id, IssueRecord.from_turn(turn).model_dump())
+        result = {name: turn[name] for name in ContextResponse.model_fields}
+        
         # Add to context memory (agent conversation)
-        context_memory.chat_memory.add_user_message(query)
-        context_memory.chat_memory.add_ai_message(json.dumps(result))
+        context_memory.add_exchange(query, json.dumps(result))
         
         print(f"[CONTEXT AGENT DUAL] Enhanced result: {result}")
         return result
@@ -5,8 +5,16 @@ from langchain.memory import ConversationBufferWindowMemory
 from langchain.schema import HumanMessage, SystemMessage
 from langchain_pinecone import PineconeVectorStore
 from langfuse.decorators import observe
+from pydantic import BaseModel, Field
+from typing import Literal
 from memory.scoped_memory_manager import get_agent_memory
 
+class ContractPosition(BaseModel):
+    """Compact contractual position returned to the main agent"""
+    responsible_party: Literal["landlord", "tenant", "shared", "unclear"] = Field(description="Who the contract makes responsible for the issue")
+    sections: list[str] = Field(description="Relevant contract sections or clause references, e.g. '5.1 Repairs'")
+    position: str = Field(description="The contractual position in at most two sentences")
+
 # Change from import-time initialization to lazy loading
 _llm = None
 _pinecone_client = None
@@ -57,14 +65,31 @@ Tasks
 1) understand the intent of the query and 2) subsequently turn this into an efficient vector search query which you must pass to contractInformation tool
 
 Output
-Your response to a query must include the full contractual position, clear stating the relevant section of the contract, and provide as much relevant information as you can to help answer the query.
+Your response must state the contractual position concisely: who is responsible, the relevant section(s) of the contract, and the position itself in at most two sentences.
 
 Your tone must be helpful, clear and friendly"""
 
-@observe(name="contract_agent")
+def format_contract_position(position: dict) -> str:
+    """Render a ContractPosition dict as the plain-text answer the /contract endpoint returns"""
+    sections = ", ".join(position.get("sections") or [])
+    return f"{position['position']} (Relevant sections: {sections})" if sections else position["position"]
+
 def run_contract_agent(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710ca2ae7") -> str:
     """
-    Contract agent that matches n8n contractAgent (2).json structure exactly
+    Contract agent that matches n8n contractAgent (2).json structure
+    Returns the contractual position as plain text
+    """
+    result = assess_contract(query, session_id)
+    if "error" in result:
+        return f"I apologize, but I encountered an error while analyzing the contract: {result['error']}"
+    return format_contract_position(result)
+
+@observe(name="contract_agent")
+def assess_contract(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710ca2ae7") -> dict:
+    """
+    Run the contract agent and return a compact ContractPosition dict.
+    
+    On failure the dict contains a single "error" key instead.
     """
     print(f"[CONTRACT AGENT] Processing query: {query}")
     
@@ -92,6 +117,7 @@ def run_contract_agent(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710
         # Add conversation history from memory
         try:
             memory_vars = memory.load_memory_variables({})
+            messages.extend(memory_vars.get("history_summary") or [])
             if "chat_history" in memory_vars and memory_vars["chat_history"]:
                 messages.extend(memory_vars["chat_history"])
         except Exception as e:
@@ -101,17 +127,16 @@ def run_contract_agent(query: str, session_id: str = "187a3d5d3eb44c06b2e3154710
         query_with_context = f"Query: {query}\ncontractInformation tool results:\n{snippets}"
         messages.append(HumanMessage(content=query_with_context))
         
-        # Generate response using lazy-loaded LLM
-        llm = get_llm()
-        response = llm.invoke(messages)
+        # Generate a schema-constrained response using lazy-loaded LLM
+        llm = get_llm().with_structured_output(ContractPosition, method="function_calling")
+        result = llm.invoke(messages).model_dump()
         
-        # Add to memory
-        memory.chat_memory.add_user_message(query)
-        memory.chat_memory.add_ai_message(response.content)
+        # Add to memory - the compact payload keeps this channel small too
+        memory.add_exchange(query, json.dumps(result))
         
         print(f"[CONTRACT AGENT] Generated response")
-        return response.content
+        return result
         
     except Exception as e:
         print(f"[CONTRACT AGENT] Error: {e}")
-        return f"I apologize, but I encountered an error while analyzing the contract: {str(e)}"
+        return {"error": str(e)}
@@ -5,8 +5,11 @@ from langchain.memory import ConversationBufferWindowMemory
 from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langfuse.decorators import observe
-from .tools import ContextAgentTool, ContractAgentTool, ClassifierAgentTool, set_current_session_id
-from memory.scoped_memory_manager import get_user_memory
+from .tools import (
+    ContextAgentTool, ContractAgentTool, ClassifierAgentTool,
+    set_current_session_id, set_current_user_message, set_current_assessment, get_current_assessment
+)
+from memory.scoped_memory_manager import get_user_memory, get_issue_record, pin_session
 from database import create_message
 from langchain_community.chat_message_histories.in_memory import ChatMessageHistory
 
@@ -70,6 +73,7 @@ You are an expert an expert property management agent acting on behalf of the la
 *classifierAgent - Used to verify the level of urgency and advisable next steps
 
 Remember, tools give valuable new information which will help you to provide the best response possible, make use of them as much as you can.
+Tools reply with compact JSON: only the fields that are set are included (e.g. a question field only appears when there is something to ask). Use the "summary" or "position" field when phrasing your final answer.
 
 ***Instructions
 Step 1: ALWAYS pass an up-to-date summary of the users query, directly to the ContextAgent tool and wait for the response. NEVER SKIP THIS STEP. You must not skip this step else you will fail. Check the Human/AI conversation history to generate a good summary to pass to the ContextAgent tool.
@@ -153,6 +157,7 @@ Now Begin!"""
     # Create prompt template with memory placeholder
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_prompt),
+        MessagesPlaceholder(variable_name="history_summary", optional=True),
         MessagesPlaceholder(variable_name="chat_history"),
         ("human", "{input}"),
         MessagesPlaceholder(variable_name="agent_scratchpad"),
@@ -174,35 +179,47 @@ Now Begin!"""
     return agent_executor
 
 @observe(name="main_agent")
-def handle_message(db, session_id: str, text: str, history=None) -> dict:
+def handle_message(db, session_id: str, text: str) -> dict:
     """
     Main entry point - this replicates the n8n workflow orchestration
-    Now properly uses the session_id parameter
+    Now properly uses the session_id parameter; the conversation history comes
+    from the session's user memory channel (hydrated from conversation_messages),
+    so db isn't used and the API passes None
     """
     print(f"[MAIN AGENT] Processing message for session {session_id}: {text}")
     
-    # Create agent with shared memory for this specific session
-    agent_executor = create_main_agent(session_id)
+    # The context agent sends its issue record plus this newest message, not the full history
+    set_current_user_message(text)
+    set_current_assessment(None)
     
-    # Execute the agent - this will automatically call tools based on the system prompt
-    try:
-        response = agent_executor.invoke({"input": text})
-        agent_output = response["output"]
-        
-        # Parse the agent output to extract structured information
-        result = {
-            "chat_output": agent_output,
-            "query_summary": text,
-            "actions": []
-        }
+    # Pin the session so eviction can't drop its memory while the LLM calls run
+    with pin_session(session_id):
+        # Create agent with shared memory for this specific session
+        agent_executor = create_main_agent(session_id)
         
-        print(f"[MAIN AGENT] Generated response for session {session_id}")
-        return result
-        
-    except Exception as e:
-        print(f"[MAIN AGENT] Error: {str(e)}")
-        return {
-            "chat_output": "I apologize, but I encountered an error processing your request. Please try again.",
-            "query_summary": text,
-            "actions": []
-        }
+        # Execute the agent - this will automatically call tools based on the system prompt
+        try:
+            response = agent_executor.invoke({"input": text})
+            agent_output = response["output"]
+            
+            # Parse the agent output to extract structured information; the summary is the context
+            # agent's running summary of the issue, and urgency is set if the classifier ran this turn
+            assessment = get_current_assessment() or {}
+            result = {
+                "chat_output": agent_output,
+                "query_summary": get_issue_record(session_id).get("summary") or text,
+                "urgency": assessment.get("urgency"),
+                "actions": []
+            }
+            
+            print(f"[MAIN AGENT] Generated response for session {session_id}")
+            return result
+            
+        except Exception as e:
+            print(f"[MAIN AGENT] Error: {str(e)}")
+            return {
+                "chat_output": "I apologize, but I encountered an error processing your request. Please try again.",
+                "query_summary": text,
+                "urgency": None,
+                "actions": []
+            }
@@ -1,21 +1,64 @@
+import json
+from contextvars import ContextVar
 from langchain.tools import BaseTool
-from typing import Type
+from typing import Optional, Type
 from pydantic import BaseModel, Field
 from .context_agent import run_context_agent_with_dual_memory
-from .contract_agent import run_contract_agent  
-from .classifier import run_classifier_agent
+from .contract_agent import assess_contract
+from .classifier import assess_urgency
 
-# We'll store the current session_id globally for tools to access
-_current_session_id = None
+# The current session_id and tenant message for tools to access. Turns run concurrently in
+# the API's threadpool, so these are context-local: each request's thread has its own copy,
+# which the tools (run by LangChain in a copy of the caller's context) can read
+_current_session_id: ContextVar[Optional[str]] = ContextVar("current_session_id", default=None)
+_current_user_message: ContextVar[Optional[str]] = ContextVar("current_user_message", default=None)
+# One slot per turn for the classifier's assessment: tools run in a copy of the turn's
+# context, so they fill the turn's slot rather than setting the variable
+_current_assessment: ContextVar[Optional[list]] = ContextVar("current_assessment", default=None)
 
 def set_current_session_id(session_id: str):
     """Set the current session ID for tools to use"""
-    global _current_session_id
-    _current_session_id = session_id
+    _current_session_id.set(session_id)
 
 def get_current_session_id() -> str:
     """Get the current session ID"""
-    return _current_session_id or "default_session"
+    return _current_session_id.get() or "default_session"
+
+def set_current_user_message(text: str):
+    """Set the newest tenant message for tools that track incremental state"""
+    _current_user_message.set(text)
+
+def get_current_user_message():
+    """Get the newest tenant message, if one has been set"""
+    return _current_user_message.get()
+
+def set_current_assessment(assessment):
+    """Record the classifier's latest urgency assessment for this turn (None starts a new turn)"""
+    slot = _current_assessment.get()
+    if assessment is None or slot is None:
+        slot = [None]
+        _current_assessment.set(slot)
+    slot[0] = assessment
+
+def get_current_assessment():
+    """Get the urgency assessment made during this turn, if the classifier was called"""
+    slot = _current_assessment.get()
+    return slot[0] if slot else None
+
+def compact_tool_result(payload: dict) -> str:
+    """
+    Serialise a tool payload as minimal JSON for the main agent's scratchpad.
+    
+    Unset fields (None, empty strings and lists) are dropped, since the
+    orchestrator only acts on the ones that are set, and separators carry no
+    whitespace. False and 0 are values and are kept.
+    """
+    return json.dumps(
+        {key: value for key, value in payload.items()
+         if value is not None and not (isinstance(value, (str, list)) and not value)},
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
 
 class ContextAgentInput(BaseModel):
     query: str = Field(description="The user query summary to get context for")
@@ -29,8 +72,8 @@ class ContextAgentTool(BaseTool):
         """Execute the context agent with dual memory access"""
         try:
             session_id = get_current_session_id()
-            result = run_context_agent_with_dual_memory(query, session_id)
-            return str(result)
+            result = run_context_agent_with_dual_memory(query, session_id, get_current_user_message())
+            return compact_tool_result(result)
         except Exception as e:
             return f"Error calling context agent: {str(e)}"
 
@@ -46,8 +89,8 @@ class ContractAgentTool(BaseTool):
         """Execute the contract agent with shared memory"""
         try:
             session_id = get_current_session_id()
-            result = run_contract_agent(query, session_id)
-            return str(result)
+            result = assess_contract(query, session_id)
+            return compact_tool_result(result)
         except Exception as e:
             return f"Error calling contract agent: {str(e)}"
 
@@ -63,8 +106,10 @@ class ClassifierAgentTool(BaseTool):
         """Execute the classifier agent with shared memory"""
         try:
             session_id = get_current_session_id()
-            result = run_classifier_agent(query, session_id)
-            return str(result)
+            result = assess_urgency(query, session_id)
+            if "urgency" in result:
+                set_current_assessment(result)
+            return compact_tool_result(result)
         except Exception as e:
             return f"Error calling classifier agent: {str(e)}"
 
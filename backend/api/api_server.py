@@ -1,19 +1,31 @@
+import asyncio
 import os
+import tempfile
 import uuid
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, Header
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from database import get_db, create_message, get_chat_history
-from models import Base, engine
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from database import (
+    get_async_db, apersist_messages, aget_chat_page, build_message_row, reply_timestamp, decode_cursor, encode_cursor,
+    alist_sessions, aset_session_status, decode_session_cursor, encode_session_cursor
+)
+from message_stream import get_message_stream, merge_pending
+from export import EXPORT_FORMATS, aiter_message_batches, iter_message_batches, ndjson_chunk, write_parquet
+from search import asearch_messages
 from agents.classifier import run_classifier_agent as classify
 from otel_config import setup_telemetry
-from sqlalchemy.orm import Session
+from memory.scoped_memory_manager import get_scoped_memory_manager
+from memory.warm_start import start_warm_start
+from memory.transcript import attach_transcript
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Initialize OpenTelemetry BEFORE importing other modules
 setup_telemetry()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI()
 
 # Allow CORS from the frontend
@@ -31,6 +43,38 @@ def verify_api_key(x_api_key: str = Header(...)):
     if x_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Invalid or missing API Key")
 
+@app.on_event("startup")
+def start_memory_sweeper():
+    """Evict idle agent memory in the background so it stays bounded under long uptimes"""
+    get_scoped_memory_manager().start_sweeper()
+
+@app.on_event("startup")
+def start_memory_persister():
+    """Write in-process agent memory behind to Postgres so it survives restarts"""
+    manager = get_scoped_memory_manager()
+    if manager.persister is not None:
+        manager.persister.start()
+
+@app.on_event("startup")
+def attach_memory_transcript():
+    """Rebuild a session's user channel from conversation_messages when it isn't resident"""
+    attach_transcript(get_scoped_memory_manager())
+
+@app.on_event("startup")
+def start_memory_warm_start():
+    """Preload recently active sessions in the background so a deploy doesn't reset conversations"""
+    start_warm_start(get_scoped_memory_manager())
+
+@app.on_event("shutdown")
+def stop_memory_sweeper():
+    get_scoped_memory_manager().stop_sweeper()
+
+@app.on_event("shutdown")
+def stop_memory_persister():
+    manager = get_scoped_memory_manager()
+    if manager.persister is not None:
+        manager.persister.stop()
+
 @app.get("/")
 async def root():
     return {"hello": "abodient"}
@@ -45,6 +89,9 @@ class TextItem(BaseModel):
     session_id: str
     text: str
 
+class SessionStatusItem(BaseModel):
+    status: Literal["open", "resolved"]
+
 @app.post("/classify")
 async def classify_ep(item: TextItem, api_key: str = Depends(verify_api_key)):
     """
@@ -56,32 +103,34 @@ async def classify_ep(item: TextItem, api_key: str = Depends(verify_api_key)):
 def context_ep(item: TextItem, api_key: str = Depends(verify_api_key)):
     return run_context_agent(item.text)
 
-@app.post("/main-agent")
-async def main_agent_ep(item: TextItem, db: Session = Depends(get_db), api_key: str = Depends(verify_api_key)):
-    # Store user message
-    create_message(db, item.session_id, "user", item.text)
-    
-    # Fetch last 5 messages for context (in chronological order)
-    history = get_chat_history(db, item.session_id, limit=5)
-    formatted_history = [
-        {"role": msg.sender, "content": msg.message} for msg in reversed(history)
-    ]
+async def _store_messages(db: AsyncSession, rows: list):
+    """Insert message rows in one transaction, or append them to the write-behind stream (MESSAGE_WRITE_MODE=stream)"""
+    stream = get_message_stream()
+    if stream is not None:
+        await run_in_threadpool(stream.append, rows)
+    else:
+        await apersist_messages(db, rows)
 
-    # DEBUG: Print what history we're actually passing
-    print(f"[DEBUG API] Raw history from DB ({len(history)} messages):")
-    for i, msg in enumerate(history):
-        print(f"  {i}: {msg.sender}: {msg.message[:100]}...")
-    
-    print(f"[DEBUG API] Formatted history being passed to main agent ({len(formatted_history)} messages):")
-    for i, msg in enumerate(formatted_history):
-        print(f"  {i}: {msg['role']}: {msg['content'][:100]}...")
+@app.post("/main-agent")
+async def main_agent_ep(item: TextItem, db: AsyncSession = Depends(get_async_db), api_key: str = Depends(verify_api_key)):
+    received_at = datetime.utcnow()
+    user_row = build_message_row(item.session_id, "user", item.text, received_at)
     
-    # Use the actual main agent workflow
-    response = handle_message(db, item.session_id, item.text, formatted_history)
+    # The agent run is blocking (LLM calls, memory hydration), so it goes to the threadpool
+    # and doesn't need a database session of its own
+    try:
+        response = await run_in_threadpool(handle_message, None, item.session_id, item.text)
+    except BaseException:
+        # A failed or cancelled turn still keeps the tenant's message (shielded, so a
+        # cancellation doesn't abandon the write)
+        await asyncio.shield(_store_messages(db, [user_row]))
+        raise
     
-    # Store AI response
-    chat_output = response.get("chat_output", "")
-    create_message(db, item.session_id, "ai", chat_output)
+    # The message and the response are stored with one INSERT in one transaction (or one
+    # stream append), which also updates the session's row in the sessions table
+    ai_row = build_message_row(item.session_id, "ai", response.get("chat_output", ""), reply_timestamp(received_at),
+                               response.get("urgency"), response.get("query_summary"))
+    await _store_messages(db, [user_row, ai_row])
     
     return response
 
@@ -89,14 +138,204 @@ async def main_agent_ep(item: TextItem, db: Session = Depends(get_db), api_key:
 async def contract_ep(item: TextItem, api_key: str = Depends(verify_api_key)):
     return check_contract(item.text)
 
+@app.get("/metrics/memory")
+def memory_metrics_ep(api_key: str = Depends(verify_api_key)):
+    """
+    Agent memory usage for pod sizing and tuning windows, TTLs and spill settings
+    """
+    return get_scoped_memory_manager().get_session_stats()
+
+def _naive_utc(value: datetime) -> datetime:
+    """Stored timestamps are naive UTC"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo is not None else value
+
+# Fields of each message returned by /chat-history
+HISTORY_FIELDS = ("id", "sender", "message", "timestamp")
+
 @app.get("/chat-history/{session_id}")
-async def get_chat_history_ep(session_id: str, db: Session = Depends(get_db), api_key: str = Depends(verify_api_key)):
+async def get_chat_history_ep(
+    session_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    api_key: str = Depends(verify_api_key)
+):
     """
-    Retrieve chat history for a given session
+    Retrieve a page of chat history for a given session, oldest message first
+    
+    - no cursor: the latest messages
+    - before=<cursor>: the messages before that position, to scroll back
+    - after=<cursor>: the messages after that position - poll with the returned
+      "after" cursor to fetch only new messages
+    - since=<ISO timestamp>: the messages from that time on
+    
+    has_more says whether another page follows in the same direction.
     """
-    messages = get_chat_history(db, session_id)
-    return [{"sender": msg.sender, "message": msg.message, "timestamp": msg.timestamp} for msg in messages]
+    if since is not None:
+        since = _naive_utc(since)
+    try:
+        before_key = decode_cursor(before) if before else None
+        after_key = decode_cursor(after) if after else (since, "") if since else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    forwards = after_key is not None and before_key is None
+    
+    messages, has_more = await aget_chat_page(db, session_id, limit=limit, before=before_key, after=after_key)
+    rows = [{field: getattr(msg, field) for field in HISTORY_FIELDS} for msg in messages]
+    
+    # Include this session's messages still waiting in the write-behind stream (always the newest)
+    stream = get_message_stream()
+    if stream is not None and before_key is None:
+        # Pending rows also carry session_id and the turn's urgency/summary; return the same shape
+        pending = [
+            {field: row[field] for field in HISTORY_FIELDS}
+            for row in await run_in_threadpool(stream.pending_rows, session_id)
+            if after_key is None or (row["timestamp"], row["id"]) > after_key
+        ]
+        rows = merge_pending(rows, pending)
+        if len(rows) > limit:
+            rows = rows[:limit] if forwards else rows[-limit:]
+            has_more = True
+    
+    older_exist = has_more if not forwards else bool(rows)
+    return {
+        "messages": rows,
+        "has_more": has_more,
+        "before": encode_cursor(rows[0]["timestamp"], rows[0]["id"]) if rows and older_exist else None,
+        "after": encode_cursor(rows[-1]["timestamp"], rows[-1]["id"]) if rows else after
+    }
 
+def _session_summary(session) -> dict:
+    return {
+        "session_id": session.session_id,
+        "status": session.status,
+        "message_count": session.message_count,
+        "first_message_at": session.first_message_at,
+        "last_message_at": session.last_message_at,
+        "urgency": session.urgency,
+        "query_summary": session.query_summary,
+        "archived": session.archived_at is not None
+    }
 
+@app.get("/sessions")
+async def list_sessions_ep(
+    status: Literal["open", "resolved"] = "open",
+    order: Literal["recent", "urgent"] = "recent",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    List conversations in a status for the Reports/Tasks pages
+    
+    - order=recent: last active first
+    - order=urgent: highest urgency first, then last active first
+    
+    Pass the returned "next" cursor to fetch the following page (null on the last page).
+    Each page is an index range scan on the sessions table, however many messages exist.
+    """
+    try:
+        after = decode_session_cursor(cursor, order) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    sessions, has_more = await alist_sessions(db, status=status, order=order, limit=limit, after=after)
+    return {
+        "sessions": [_session_summary(session) for session in sessions],
+        "next": encode_session_cursor(sessions[-1], order) if has_more else None
+    }
 
+@app.patch("/sessions/{session_id}")
+async def update_session_ep(
+    session_id: str,
+    item: SessionStatusItem,
+    db: AsyncSession = Depends(get_async_db),
+    api_key: str = Depends(verify_api_key)
+):
+    """Mark a conversation resolved (or reopen it); a new tenant message reopens it too"""
+    if not await aset_session_status(db, session_id, item.status):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "status": item.status}
 
+@app.get("/search/messages")
+async def search_messages_ep(
+    q: str = Query(..., min_length=1, max_length=200),
+    session_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Full-text search over chat messages, best match first
+    
+    q takes search box syntax: words, "quoted phrases", -excluded, or.
+    Each result has the message's id, session_id, sender, timestamp, rank and
+    a highlight with matches wrapped in <mark></mark>. Filter with session_id
+    and a start (inclusive) / end (exclusive) time range.
+    """
+    results = await asearch_messages(
+        db, q, session_id=session_id,
+        start=_naive_utc(start) if start else None,
+        end=_naive_utc(end) if end else None,
+        limit=limit
+    )
+    return {"query": q, "results": results}
+
+@app.get("/export/messages")
+async def export_messages_ep(
+    start: datetime,
+    end: datetime,
+    format: str = "ndjson",
+    session_id: Optional[List[str]] = Query(None),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Export every message with start <= timestamp < end, ordered by session then time
+    
+    - format=ndjson: streamed as it is read, one JSON object per line
+    - format=parquet: written to a temporary file first (Parquet's footer comes last), then sent
+    - session_id (repeatable): only these sessions
+    
+    Rows are read with a server-side cursor, so memory use doesn't grow with the export.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    start, end = _naive_utc(start), _naive_utc(end)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    filename = f"messages-{start:%Y%m%d}-{end:%Y%m%d}.{format}"
+    
+    if format == "ndjson":
+        async def body():
+            # Its own session: the response outlives the request's dependencies
+            from models import get_async_session_factory
+            async with get_async_session_factory()() as db:
+                async for rows in aiter_message_batches(db, start, end, session_id):
+                    yield ndjson_chunk(rows)
+        return StreamingResponse(body(), media_type="application/x-ndjson",
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    
+    def export_parquet() -> str:
+        from models import SessionLocal
+        handle, path = tempfile.mkstemp(suffix=".parquet")
+        os.close(handle)
+        db = SessionLocal()
+        try:
+            write_parquet(iter_message_batches(db, start, end, session_id), path)
+        except Exception:
+            os.remove(path)
+            raise
+        finally:
+            db.close()
+        return path
+    
+    try:
+        path = await run_in_threadpool(export_parquet)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return FileResponse(path, media_type="application/vnd.apache.parquet", filename=filename,
+                        background=BackgroundTask(os.remove, path))
@@ -0,0 +1,59 @@
+"""
+Compressed cold storage for idle conversations
+
+Sessions idle for longer than ARCHIVE_AFTER_DAYS are moved out of
+conversation_messages by the worker's archive job. Each becomes one row of
+conversation_archives holding the whole transcript as zstd-compressed JSON.
+This keeps the hot table and its (session_id, timestamp) index sized to the
+active sessions. On Postgres the emptied monthly partitions can then be
+detached and dropped (tools/system/manage_partitions.py); restoring a
+session recreates the partitions of the months it spans.
+
+Archived sessions are only read for the occasional audit or returning
+tenant. A history read that comes up short for a session flagged archived
+(sessions.archived_at) restores it into conversation_messages first
+(database.restore_archived_session), so callers never see the archive. The
+restore counts as activity: the session isn't archived again until it has
+been idle for ARCHIVE_AFTER_DAYS since.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import List
+
+import zstandard
+
+# Sessions idle this long are archived (ARCHIVE_AFTER_DAYS, 0 disables archiving)
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+
+# zstd level: archives are written once and rarely read, so favour ratio (ARCHIVE_ZSTD_LEVEL)
+DEFAULT_ZSTD_LEVEL = 12
+
+ROW_FIELDS = ("id", "session_id", "sender", "message", "timestamp")
+
+
+def archive_after_days() -> int:
+    return int(os.getenv("ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS))
+
+
+def encode_archive(rows: List[dict]) -> bytes:
+    """Compress message rows (oldest first) into an archive blob"""
+    payload = [{**{field: row[field] for field in ROW_FIELDS}, "timestamp": row["timestamp"].isoformat()} for row in rows]
+    level = int(os.getenv("ARCHIVE_ZSTD_LEVEL", DEFAULT_ZSTD_LEVEL))
+    return zstandard.ZstdCompressor(level=level).compress(json.dumps(payload, separators=(",", ":")).encode())
+
+
+def decode_archive(blob: bytes) -> List[dict]:
+    """Message rows (oldest first) from an archive blob"""
+    rows = json.loads(zstandard.ZstdDecompressor().decompress(blob))
+    for row in rows:
+        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return rows
+
+
+def merge_rows(archived: List[dict], rows: List[dict]) -> List[dict]:
+    """Combine an existing archive with newly archived rows, chronological and deduplicated by id"""
+    merged = {row["id"]: row for row in archived}
+    merged.update({row["id"]: row for row in rows})
+    return sorted(merged.values(), key=lambda row: (row["timestamp"], row["id"]))
@@ -1,41 +1,576 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text, func
+from sqlalchemy import case, delete, insert, or_, select, tuple_, update
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship, Session
-from models import ConversationMessage, SessionMemory
-import uuid
-from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import ChatSession, ConversationArchive, ConversationMessage, SessionMemory
+from ids import uuid7
+from datetime import datetime, timedelta
 import sys
 import json
+import base64
+import asyncio
+from history_cache import get_history_cache
 
-def create_message(db: Session, session_id: str, sender: str, message: str):
+# ---------- recent history cache (see history_cache.py) ----------
+
+MESSAGE_COLUMNS = ("id", "session_id", "sender", "message", "timestamp")
+
+def _message_row(message: ConversationMessage) -> dict:
+    return {"id": message.id, "session_id": message.session_id, "sender": message.sender,
+            "message": message.message, "timestamp": message.timestamp}
+
+def _cached_message(row: dict) -> ConversationMessage:
+    """A detached ConversationMessage for a cached row"""
+    return ConversationMessage(**row)
+
+def _write_through(rows: list):
+    """Append committed rows to the history cache; a cache failure never fails the write"""
+    cache = get_history_cache()
+    if cache is None or not rows:
+        return
+    try:
+        cache.append(rows)
+    except Exception as e:
+        print(f"[HISTORY CACHE] Write-through failed: {e}", file=sys.stderr)
+
+def _read_window(cache, session_id: str):
     """
-    Create a new chat message in the database
+    Returns:
+        (cached rows oldest first or None, version to fill the cache with after a miss)
+    """
+    try:
+        window = cache.window(session_id)
+        return window, (None if window is not None else cache.version(session_id))
+    except Exception as e:
+        print(f"[HISTORY CACHE] Read failed for {session_id}: {e}", file=sys.stderr)
+        return None, None
+
+def _fill_window(cache, session_id: str, messages: list, version):
+    """Cache the newest-first messages just read from the database"""
+    if version is None:
+        return None
+    rows = [_message_row(message) for message in reversed(messages)]
+    try:
+        cache.fill(session_id, rows, version)
+    except Exception as e:
+        print(f"[HISTORY CACHE] Fill failed for {session_id}: {e}", file=sys.stderr)
+    return [_cached_message(row) for row in rows]
+
+def _evict_window(session_id: str):
+    """Drop a session's cached window after its rows left the hot table"""
+    cache = get_history_cache()
+    if cache is None:
+        return
+    try:
+        cache.evict(session_id)
+    except Exception as e:
+        print(f"[HISTORY CACHE] Evict failed for {session_id}: {e}", file=sys.stderr)
+
+def _position(message):
+    return message.timestamp, message.id
+
+def _page_from_window(window: list, size: int, limit: int, before=None, after=None):
+    """
+    Serve a keyset page from the cached window if it provably holds the page.
+    
+    Returns:
+        (messages, has_more) or None if the database has to answer
+    """
+    if before is not None:
+        return None
+    complete = len(window) < size  # the window is the whole session
+    if after is None:
+        if len(window) > limit:
+            return window[-limit:], True
+        return (window, False) if complete else None
+    if not complete and _position(window[0]) > tuple(after):
+        return None  # the cursor is older than the window, so messages may be missing
+    newer = [message for message in window if _position(message) > tuple(after)]
+    return newer[:limit], len(newer) > limit
+
+def create_message(db: Session, session_id: str, sender: str, message: str, timestamp: datetime = None):
+    """
+    Create a new chat message in the database (timestamped now unless given).
+    
+    The id and timestamp are generated here, so the row is never read back.
     """
     try:
         db_message = ConversationMessage(
-            id=str(uuid.uuid4()),
+            id=uuid7(),
             session_id=session_id,
             sender=sender,
             message=message,
-            timestamp=datetime.utcnow()
+            timestamp=timestamp or datetime.utcnow()
         )
         db.add(db_message)
+        for statement in _session_upserts(db.bind.dialect.name, [_message_row(db_message)]):
+            db.execute(statement)
         db.commit()
-        db.refresh(db_message)
         print(f"[DEBUG] Message committed for session {session_id}", file=sys.stderr)
+        _write_through([_message_row(db_message)])
         return db_message
     except Exception as e:
         print(f"[ERROR] Failed to commit message: {e}", file=sys.stderr)
         raise
 
+def build_message_row(session_id: str, sender: str, message: str, timestamp: datetime = None,
+                      urgency: str = None, query_summary: str = None):
+    """
+    One conversation_messages row, with a client-generated id and timestamp.
+    
+    The turn's urgency and query summary, if known, ride along on the AI row for the
+    sessions table; they aren't message columns.
+    """
+    row = {"id": uuid7(), "session_id": session_id, "sender": sender,
+           "message": message, "timestamp": timestamp or datetime.utcnow()}
+    if urgency:
+        row["urgency"] = urgency
+    if query_summary:
+        row["query_summary"] = query_summary
+    return row
+
+def reply_timestamp(received_at: datetime) -> datetime:
+    """Timestamp for a response, which always sorts after the message it answers"""
+    return max(datetime.utcnow(), received_at + timedelta(microseconds=1))
+
+def build_turn_rows(session_id: str, user_message: str, ai_message: str, received_at: datetime = None,
+                    urgency: str = None, query_summary: str = None):
+    """conversation_messages rows for one turn (see build_message_row)"""
+    received_at = received_at or datetime.utcnow()
+    user_row = build_message_row(session_id, "user", user_message, received_at)
+    ai_row = build_message_row(session_id, "ai", ai_message, reply_timestamp(received_at), urgency, query_summary)
+    return [user_row, ai_row]
+
+def _message_values(rows: list) -> list:
+    """Just the conversation_messages columns of message rows"""
+    return [{column: row[column] for column in MESSAGE_COLUMNS} for row in rows]
+
+def persist_messages(db: Session, rows: list):
+    """
+    Store conversation_messages rows with a single multi-row INSERT.
+    
+    The INSERT and the sessions upsert run in one transaction on a connection of the
+    session's engine, independent of any work pending on the session itself. Nothing
+    is read back.
+    
+    Returns:
+        The inserted rows (as dicts)
+    """
+    try:
+        with db.bind.begin() as connection:
+            connection.execute(insert(ConversationMessage).values(_message_values(rows)))
+            for statement in _session_upserts(connection.dialect.name, rows):
+                connection.execute(statement)
+    except Exception as e:
+        print(f"[ERROR] Failed to commit messages: {e}", file=sys.stderr)
+        raise
+    _write_through(rows)
+    return rows
+
+def persist_turn(db: Session, session_id: str, user_message: str, ai_message: str, received_at: datetime = None,
+                 urgency: str = None, query_summary: str = None):
+    """
+    Store a user message and the AI response with a single multi-row INSERT (see persist_messages).
+    
+    Returns:
+        The inserted rows (as dicts)
+    """
+    return persist_messages(db, build_turn_rows(session_id, user_message, ai_message, received_at,
+                                                urgency, query_summary))
+
+def _insert_new_messages(db: Session, rows: list) -> list:
+    """
+    Multi-row INSERT of conversation_messages rows, skipping ones already stored (not committed).
+    
+    Returns:
+        The rows actually inserted
+    """
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    statement = dialect_insert(ConversationMessage).values(_message_values(rows))
+    # No conflict target: the key is (id, timestamp) on partitioned Postgres but may be id alone on SQLite
+    inserted = set(db.execute(statement.on_conflict_do_nothing().returning(ConversationMessage.id)).scalars())
+    return [row for row in rows if row["id"] in inserted]
+
+def insert_messages(db: Session, rows: list):
+    """
+    Insert conversation_messages rows in one statement and commit, ignoring ids
+    that already exist (so redelivered write-behind entries are no-ops).
+    """
+    if not rows:
+        return
+    inserted = _insert_new_messages(db, rows)
+    for statement in _session_upserts(db.bind.dialect.name, inserted):
+        db.execute(statement)
+    db.commit()
+    _write_through(rows)
+
+def _history_query(session_id: str, limit: int):
+    return select(ConversationMessage)\
+        .where(ConversationMessage.session_id == session_id)\
+        .order_by(ConversationMessage.timestamp.desc(), ConversationMessage.id.desc())\
+        .limit(limit)
+
+def _newest_messages(db: Session, session_id: str, limit: int):
+    """Newest-first messages from the database, restoring the session if it comes up short and is archived"""
+    messages = db.execute(_history_query(session_id, limit)).scalars().all()
+    if len(messages) < limit and restore_archived_session(db, session_id):
+        messages = db.execute(_history_query(session_id, limit)).scalars().all()
+    return messages
+
 def get_chat_history(db: Session, session_id: str, limit: int = 50):
     """
-    Retrieve chat history for a given session
+    Retrieve chat history for a given session (newest first).
+    
+    Windows up to the history cache size are served from Redis when cached;
+    a miss reads the full cache window from the database and fills the cache.
+    Archived sessions are restored transparently on a database read.
+    """
+    cache = get_history_cache()
+    if cache is None or limit > cache.size:
+        return _newest_messages(db, session_id, limit)
+    window, version = _read_window(cache, session_id)
+    if window is None:
+        window = _fill_window(cache, session_id, _newest_messages(db, session_id, cache.size), version)
+        if window is None:
+            return _newest_messages(db, session_id, limit)
+    else:
+        window = [_cached_message(row) for row in window]
+    return window[::-1][:limit]
+
+# ---------- keyset pagination ----------
+# A cursor is a message's (timestamp, id): pages continue strictly before or after
+# it, so every page is an index range scan no matter how deep into the history
+
+def encode_cursor(timestamp: datetime, message_id: str) -> str:
+    """Opaque URL-safe cursor for a message position"""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{message_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """
+    Parse a cursor from encode_cursor.
+    
+    Returns:
+        (timestamp, message_id)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, message_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), message_id
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def _chat_page_query(session_id: str, limit: int, before=None, after=None):
+    """Keyset page query; fetches one extra row to tell whether another page follows"""
+    position = tuple_(ConversationMessage.timestamp, ConversationMessage.id)
+    query = select(ConversationMessage).where(ConversationMessage.session_id == session_id)
+    if before is not None:
+        query = query.where(position < tuple_(*before))
+    if after is not None:
+        query = query.where(position > tuple_(*after))
+    if after is not None and before is None:
+        # Paging forwards: the oldest messages after the cursor
+        query = query.order_by(ConversationMessage.timestamp, ConversationMessage.id)
+    else:
+        # Latest page, or paging backwards: the newest messages before the cursor
+        query = query.order_by(ConversationMessage.timestamp.desc(), ConversationMessage.id.desc())
+    return query.limit(limit + 1)
+
+def _chat_page(messages: list, limit: int, forwards: bool):
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    return (messages if forwards else messages[::-1]), has_more
+
+def get_chat_page(db: Session, session_id: str, limit: int = 50, before=None, after=None):
+    """
+    One page of a session's chat history by keyset.
+    
+    The latest page and delta pages within the cached window are served from
+    the history cache; older pages always come from the database.
+    
+    Args:
+        before: (timestamp, id) - return the newest messages older than this position
+        after: (timestamp, id) - return the oldest messages newer than this position
+        (neither: the latest page)
+    
+    Returns:
+        (messages in chronological order, whether more messages exist in the paging direction)
+    """
+    cache = get_history_cache()
+    if cache is not None and before is None:
+        window, version = _read_window(cache, session_id)
+        if window is None:
+            window = _fill_window(cache, session_id, _newest_messages(db, session_id, cache.size), version)
+        else:
+            window = [_cached_message(row) for row in window]
+        page = _page_from_window(window, cache.size, limit, before, after) if window is not None else None
+        if page is not None:
+            return page
+    messages = db.execute(_chat_page_query(session_id, limit, before, after)).scalars().all()
+    if len(messages) <= limit and after is None and restore_archived_session(db, session_id):
+        # Reached the start of the hot history: older messages were archived
+        messages = db.execute(_chat_page_query(session_id, limit, before, after)).scalars().all()
+    return _chat_page(messages, limit, forwards=after is not None and before is None)
+
+# ---------- archive ----------
+# Idle sessions live zstd-compressed in conversation_archives (see archive.py)
+
+def get_idle_session_ids(db: Session, idle_before: datetime, limit: int):
+    """
+    Sessions with messages to archive whose last activity is older than idle_before.
+    
+    Read from the sessions table: a restore counts as activity, so a session read back
+    from the archive isn't archived again until it has been idle for the full period,
+    and sessions already archived are skipped unless new messages arrived since.
+    """
+    result = db.execute(
+        select(ChatSession.session_id)
+        .where(ChatSession.last_message_at < idle_before,
+               or_(ChatSession.restored_at.is_(None), ChatSession.restored_at < idle_before),
+               or_(ChatSession.archived_at.is_(None), ChatSession.last_message_at > ChatSession.archived_at))
+        .limit(limit)
+    )
+    return [session_id for session_id, in result]
+
+def archive_session(db: Session, session_id: str, idle_before: datetime) -> int:
     """
-    return db.query(ConversationMessage)\
-        .filter(ConversationMessage.session_id == session_id)\
-        .order_by(ConversationMessage.timestamp.desc())\
+    Move a session's messages into its compressed archive row, in one transaction.
+    
+    Skips the session if a message newer than idle_before has arrived, or it was
+    restored, since it was picked. Messages archived earlier (and not restored since)
+    are kept.
+    
+    Returns:
+        Number of messages moved out of conversation_messages
+    """
+    from archive import decode_archive, encode_archive, merge_rows
+    messages = db.execute(
+        select(ConversationMessage)
+        .where(ConversationMessage.session_id == session_id)
+        .order_by(ConversationMessage.timestamp, ConversationMessage.id)
+    ).scalars().all()
+    restored_at = db.execute(select(ChatSession.restored_at).where(ChatSession.session_id == session_id)).scalar()
+    if (not messages or messages[-1].timestamp is None or messages[-1].timestamp >= idle_before
+            or (restored_at is not None and restored_at >= idle_before)):
+        db.rollback()
+        return 0
+    rows = [_message_row(message) for message in messages]
+    existing = db.get(ConversationArchive, session_id)
+    if existing is not None:
+        rows = merge_rows(decode_archive(existing.messages), rows)
+    archived_at = datetime.utcnow()
+    db.merge(ConversationArchive(
+        session_id=session_id,
+        messages=encode_archive(rows),
+        message_count=len(rows),
+        first_message_at=rows[0]["timestamp"],
+        last_message_at=rows[-1]["timestamp"],
+        archived_at=archived_at
+    ))
+    db.execute(delete(ConversationMessage).where(
+        ConversationMessage.session_id == session_id,
+        ConversationMessage.timestamp <= messages[-1].timestamp
+    ))
+    # The status is left alone: a resolved session stays resolved while archived
+    db.execute(update(ChatSession).where(ChatSession.session_id == session_id).values(archived_at=archived_at))
+    db.commit()
+    _evict_window(session_id)
+    return len(messages)
+
+def restore_archived_session(db: Session, session_id: str) -> int:
+    """
+    Move an archived session back into conversation_messages.
+    
+    Only sessions flagged archived in the sessions table are looked up, so a read of
+    a short history that was never archived costs one primary key probe.
+    
+    Returns:
+        Number of messages restored (0 if the session isn't archived)
+    """
+    from archive import decode_archive
+    from partitions import ensure_months, months_between
+    if db.execute(select(ChatSession.archived_at).where(ChatSession.session_id == session_id)).scalar() is None:
+        return 0
+    archived = db.get(ConversationArchive, session_id)
+    if archived is None:
+        return 0
+    rows = decode_archive(archived.messages)
+    # The partitions of the months the session spans may have been dropped since it was archived
+    ensure_months(db.connection(), months_between(archived.first_message_at, archived.last_message_at))
+    _insert_new_messages(db, rows)
+    # Core DELETE: a concurrent restore may already have removed the row
+    db.execute(delete(ConversationArchive).where(ConversationArchive.session_id == session_id))
+    db.execute(update(ChatSession).where(ChatSession.session_id == session_id)
+               .values(archived_at=None, restored_at=datetime.utcnow()))
+    db.commit()
+    print(f"[ARCHIVE] Restored {len(rows)} messages for session {session_id}")
+    return len(rows)
+
+# ---------- sessions ----------
+# One sessions row per conversation, upserted in the same transaction as every message
+# write, so list views never aggregate conversation_messages
+
+URGENCY_RANKS = {"low": 1, "medium": 2, "high": 3, "emergency": 4}
+
+def _session_values(rows: list) -> list:
+    """sessions values for newly stored message rows, one per session"""
+    sessions = {}
+    for row in sorted(rows, key=lambda row: row["timestamp"]):
+        values = sessions.setdefault(row["session_id"], {
+            "session_id": row["session_id"], "status": "open", "message_count": 0,
+            "first_message_at": row["timestamp"], "last_message_at": row["timestamp"],
+            "urgency": None, "urgency_rank": 0, "query_summary": None
+        })
+        values["message_count"] += 1
+        values["last_message_at"] = row["timestamp"]
+        if row.get("urgency") in URGENCY_RANKS:
+            values["urgency"], values["urgency_rank"] = row["urgency"], URGENCY_RANKS[row["urgency"]]
+        if row.get("query_summary"):
+            values["query_summary"] = row["query_summary"]
+    return list(sessions.values())
+
+def _session_upsert(dialect_name: str, values: list, reopen: bool):
+    """One sessions upsert statement (see _session_upserts)"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        latest = func.greatest
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+        latest = func.max  # SQLite's multi-argument max() is a scalar function
+    statement = insert(ChatSession).values(values)
+    new = statement.excluded
+    updates = {
+        "message_count": ChatSession.message_count + new.message_count,
+        "last_message_at": latest(ChatSession.last_message_at, new.last_message_at),
+        "urgency": func.coalesce(new.urgency, ChatSession.urgency),
+        "urgency_rank": case((new.urgency.is_(None), ChatSession.urgency_rank), else_=new.urgency_rank),
+        "query_summary": func.coalesce(new.query_summary, ChatSession.query_summary)
+    }
+    if reopen:
+        updates["status"] = "open"
+    return statement.on_conflict_do_update(index_elements=[ChatSession.session_id], set_=updates)
+
+def _session_upserts(dialect_name: str, rows: list) -> list:
+    """
+    INSERT ... ON CONFLICT DO UPDATE statements for the sessions of newly stored message rows.
+    
+    Counts are added, times only move forward, urgency and summary keep their previous
+    value unless the rows carry a new one, and a new tenant message reopens a resolved
+    session. Sessions with a tenant message among the rows get one statement; the rest
+    (e.g. an AI response stored on its own) another that leaves the status alone.
+    """
+    values = _session_values(rows)
+    tenant = {row["session_id"] for row in rows if row["sender"] == "user"}
+    groups = [([value for value in values if value["session_id"] in tenant], True),
+              ([value for value in values if value["session_id"] not in tenant], False)]
+    return [_session_upsert(dialect_name, group, reopen) for group, reopen in groups if group]
+
+def _session_position(session: ChatSession, order: str) -> tuple:
+    if order == "urgent":
+        return session.urgency_rank, session.last_message_at, session.session_id
+    return session.last_message_at, session.session_id
+
+def encode_session_cursor(session: ChatSession, order: str) -> str:
+    """Opaque URL-safe cursor for a session's position in a list order"""
+    raw = "|".join(value.isoformat() if isinstance(value, datetime) else str(value)
+                   for value in _session_position(session, order))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_session_cursor(cursor: str, order: str) -> tuple:
+    """
+    Parse a cursor from encode_session_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed or from another order
+    """
+    try:
+        parts = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|", 2 if order == "urgent" else 1)
+        if order == "urgent":
+            return int(parts[0]), datetime.fromisoformat(parts[1]), parts[2]
+        return datetime.fromisoformat(parts[0]), parts[1]
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def _sessions_query(status: str, order: str, limit: int, after=None):
+    """Keyset page of sessions in a status, newest or most urgent first; fetches one extra row"""
+    if order == "urgent":
+        columns = (ChatSession.urgency_rank, ChatSession.last_message_at, ChatSession.session_id)
+    else:
+        columns = (ChatSession.last_message_at, ChatSession.session_id)
+    query = select(ChatSession).where(ChatSession.status == status)
+    if after is not None:
+        query = query.where(tuple_(*columns) < tuple_(*after))
+    return query.order_by(*(column.desc() for column in columns)).limit(limit + 1)
+
+def list_sessions(db: Session, status: str = "open", order: str = "recent", limit: int = 50, after=None):
+    """
+    One page of sessions for list views.
+    
+    Args:
+        order: "recent" (last message first) or "urgent" (highest urgency, then last message first)
+        after: decoded cursor of the last session on the previous page
+    
+    Returns:
+        (sessions, whether more follow)
+    """
+    sessions = db.execute(_sessions_query(status, order, limit, after)).scalars().all()
+    return sessions[:limit], len(sessions) > limit
+
+def set_session_status(db: Session, session_id: str, status: str) -> bool:
+    """
+    Set a session's status.
+    
+    Returns:
+        False if there is no such session
+    """
+    result = db.execute(update(ChatSession).where(ChatSession.session_id == session_id).values(status=status))
+    db.commit()
+    return result.rowcount > 0
+
+def get_recent_session_ids(db: Session, since: datetime, limit: int):
+    """
+    Sessions with messages since a point in time, most recently active first
+    """
+    rows = db.query(ConversationMessage.session_id, func.max(ConversationMessage.timestamp).label("last_message"))\
+        .filter(ConversationMessage.timestamp >= since)\
+        .group_by(ConversationMessage.session_id)\
+        .order_by(func.max(ConversationMessage.timestamp).desc())\
         .limit(limit)\
         .all()
+    return [row.session_id for row in rows]
+
+def get_recent_histories(db: Session, session_ids: list, per_session: int):
+    """
+    The last per_session messages of each session in one query, grouped in SQL.
+    
+    Returns:
+        session_id -> [(sender, message), ...] in chronological order
+    """
+    if not session_ids:
+        return {}
+    ranked = db.query(
+        ConversationMessage.session_id,
+        ConversationMessage.sender,
+        ConversationMessage.message,
+        ConversationMessage.timestamp,
+        func.row_number().over(
+            partition_by=ConversationMessage.session_id,
+            order_by=ConversationMessage.timestamp.desc()
+        ).label("position")
+    ).filter(ConversationMessage.session_id.in_(session_ids)).subquery()
+    rows = db.query(ranked.c.session_id, ranked.c.sender, ranked.c.message)\
+        .filter(ranked.c.position <= per_session)\
+        .order_by(ranked.c.session_id, ranked.c.timestamp)\
+        .all()
+    histories = {}
+    for row in rows:
+        histories.setdefault(row.session_id, []).append((row.sender, row.message))
+    return histories
 
 def get_session_memory(db: Session, session_id: str):
     record = db.query(SessionMemory).filter(SessionMemory.session_id == session_id).first()
@@ -53,6 +588,168 @@ def set_session_memory(db: Session, session_id: str, memory: dict):
         db.add(record)
     db.commit()
 
+def _session_memory_upsert(dialect_name: str, memories: dict):
+    """INSERT ... ON CONFLICT DO UPDATE of session_memory rows for the given dialect"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    rows = [
+        {"session_id": session_id, "memory_json": json.dumps(memory, separators=(",", ":"))}
+        for session_id, memory in memories.items()
+    ]
+    statement = insert(SessionMemory).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[SessionMemory.session_id],
+        set_={"memory_json": statement.excluded.memory_json}
+    )
+
+def upsert_session_memories(db: Session, memories: dict):
+    """
+    Insert or update many session_memory rows in one statement and commit.
+    
+    Args:
+        memories: session_id -> memory dict
+    """
+    if not memories:
+        return
+    db.execute(_session_memory_upsert(db.bind.dialect.name, memories))
+    db.commit()
+
+# ---------- async versions for API request handlers ----------
+
+async def acreate_message(db: AsyncSession, session_id: str, sender: str, message: str, timestamp: datetime = None):
+    """
+    Create a new chat message in the database without blocking the event loop
+    """
+    try:
+        db_message = ConversationMessage(
+            id=uuid7(),
+            session_id=session_id,
+            sender=sender,
+            message=message,
+            timestamp=timestamp or datetime.utcnow()
+        )
+        db.add(db_message)
+        for statement in _session_upserts(db.bind.dialect.name, [_message_row(db_message)]):
+            await db.execute(statement)
+        await db.commit()
+        await asyncio.to_thread(_write_through, [_message_row(db_message)])
+        return db_message
+    except Exception as e:
+        print(f"[ERROR] Failed to commit message: {e}", file=sys.stderr)
+        raise
+
+async def apersist_messages(db: AsyncSession, rows: list):
+    """
+    Store conversation_messages rows with a single multi-row INSERT (see persist_messages).
+    
+    Returns:
+        The inserted rows (as dicts)
+    """
+    try:
+        async with db.bind.begin() as connection:
+            await connection.execute(insert(ConversationMessage).values(_message_values(rows)))
+            for statement in _session_upserts(connection.dialect.name, rows):
+                await connection.execute(statement)
+    except Exception as e:
+        print(f"[ERROR] Failed to commit messages: {e}", file=sys.stderr)
+        raise
+    await asyncio.to_thread(_write_through, rows)
+    return rows
+
+async def apersist_turn(db: AsyncSession, session_id: str, user_message: str, ai_message: str, received_at: datetime = None,
+                        urgency: str = None, query_summary: str = None):
+    """
+    Store a user message and the AI response with a single multi-row INSERT (see persist_messages).
+    
+    Returns:
+        The inserted rows (as dicts)
+    """
+    return await apersist_messages(db, build_turn_rows(session_id, user_message, ai_message, received_at,
+                                                       urgency, query_summary))
+
+async def _aread_or_fill_window(db: AsyncSession, cache, session_id: str):
+    """The session's cached window as messages (filling the cache on a miss), or None"""
+    window, version = await asyncio.to_thread(_read_window, cache, session_id)
+    if window is not None:
+        return [_cached_message(row) for row in window]
+    messages = await _anewest_messages(db, session_id, cache.size)
+    return await asyncio.to_thread(_fill_window, cache, session_id, messages, version)
+
+async def _anewest_messages(db: AsyncSession, session_id: str, limit: int):
+    """Newest-first messages from the database, restoring the session if it comes up short and is archived"""
+    messages = (await db.execute(_history_query(session_id, limit))).scalars().all()
+    if len(messages) < limit and await db.run_sync(restore_archived_session, session_id):
+        messages = (await db.execute(_history_query(session_id, limit))).scalars().all()
+    return messages
+
+async def aget_chat_history(db: AsyncSession, session_id: str, limit: int = 50):
+    """
+    Retrieve chat history for a given session (newest first), from the history cache when possible
+    """
+    cache = get_history_cache()
+    if cache is not None and limit <= cache.size:
+        window = await _aread_or_fill_window(db, cache, session_id)
+        if window is not None:
+            return window[::-1][:limit]
+    return await _anewest_messages(db, session_id, limit)
+
+async def aget_chat_page(db: AsyncSession, session_id: str, limit: int = 50, before=None, after=None):
+    """
+    One page of a session's chat history by keyset (see get_chat_page).
+    
+    Returns:
+        (messages in chronological order, whether more messages exist in the paging direction)
+    """
+    cache = get_history_cache()
+    if cache is not None and before is None:
+        window = await _aread_or_fill_window(db, cache, session_id)
+        page = _page_from_window(window, cache.size, limit, before, after) if window is not None else None
+        if page is not None:
+            return page
+    messages = (await db.execute(_chat_page_query(session_id, limit, before, after))).scalars().all()
+    if len(messages) <= limit and after is None and await db.run_sync(restore_archived_session, session_id):
+        messages = (await db.execute(_chat_page_query(session_id, limit, before, after))).scalars().all()
+    return _chat_page(messages, limit, forwards=after is not None and before is None)
+
+async def alist_sessions(db: AsyncSession, status: str = "open", order: str = "recent", limit: int = 50, after=None):
+    """
+    One page of sessions for list views (see list_sessions).
+    
+    Returns:
+        (sessions, whether more follow)
+    """
+    sessions = (await db.execute(_sessions_query(status, order, limit, after))).scalars().all()
+    return sessions[:limit], len(sessions) > limit
+
+async def aset_session_status(db: AsyncSession, session_id: str, status: str) -> bool:
+    """Set a session's status; False if there is no such session"""
+    result = await db.execute(update(ChatSession).where(ChatSession.session_id == session_id).values(status=status))
+    await db.commit()
+    return result.rowcount > 0
+
+async def aget_session_memory(db: AsyncSession, session_id: str):
+    memory_json = await db.scalar(
+        select(SessionMemory.memory_json).where(SessionMemory.session_id == session_id)
+    )
+    return json.loads(memory_json) if memory_json else {}
+
+async def aset_session_memory(db: AsyncSession, session_id: str, memory: dict):
+    await aupsert_session_memories(db, {session_id: memory})
+
+async def aupsert_session_memories(db: AsyncSession, memories: dict):
+    """
+    Insert or update many session_memory rows in one statement and commit.
+    
+    Args:
+        memories: session_id -> memory dict
+    """
+    if not memories:
+        return
+    await db.execute(_session_memory_upsert(db.bind.dialect.name, memories))
+    await db.commit()
+
 def get_db():
     """
     Database session dependency
@@ -62,4 +759,12 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """
+    Async database session dependency
+    """
+    from models import get_async_session_factory
+    async with get_async_session_factory()() as db:
+        yield db
@@ -0,0 +1,148 @@
+"""
+Streaming bulk export of conversation_messages
+
+Exports every message in a date range (optionally for some sessions) as
+NDJSON or Parquet, for auditing agent quality offline. Rows are read with a
+server-side cursor (yield_per) and written one batch at a time, so memory use
+stays flat however many rows match:
+
+- NDJSON: one JSON object per line, written as each batch arrives
+- Parquet: one row group per batch through pyarrow's ParquetWriter
+
+Messages are ordered by session, then time, so each conversation is
+contiguous. Sessions moved to conversation_archives (see archive.py) are
+included after the hot rows, decompressed one session at a time.
+
+Used by GET /export/messages and tools/system/export_conversations.py.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, BinaryIO, Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+
+from models import ConversationArchive, ConversationMessage
+
+EXPORT_FIELDS = ("id", "session_id", "sender", "message", "timestamp")
+EXPORT_FORMATS = ("ndjson", "parquet")
+
+# Rows fetched per round trip and written per NDJSON chunk / Parquet row group (EXPORT_BATCH_SIZE)
+DEFAULT_EXPORT_BATCH_SIZE = 5000
+
+
+def export_batch_size() -> int:
+    return int(os.getenv("EXPORT_BATCH_SIZE", DEFAULT_EXPORT_BATCH_SIZE))
+
+
+def _messages_query(start: datetime, end: datetime, session_ids: Optional[Sequence[str]]):
+    query = select(*(getattr(ConversationMessage, field) for field in EXPORT_FIELDS))\
+        .where(ConversationMessage.timestamp >= start, ConversationMessage.timestamp < end)
+    if session_ids:
+        query = query.where(ConversationMessage.session_id.in_(session_ids))
+    return query.order_by(ConversationMessage.session_id, ConversationMessage.timestamp, ConversationMessage.id)
+
+
+def _archives_query(start: datetime, end: datetime, session_ids: Optional[Sequence[str]]):
+    query = select(ConversationArchive.messages)\
+        .where(ConversationArchive.last_message_at >= start, ConversationArchive.first_message_at < end)
+    if session_ids:
+        query = query.where(ConversationArchive.session_id.in_(session_ids))
+    return query.order_by(ConversationArchive.session_id)
+
+
+def _archived_rows(blob: bytes, start: datetime, end: datetime) -> List[dict]:
+    from archive import decode_archive
+    return [row for row in decode_archive(blob) if start <= row["timestamp"] < end]
+
+
+def iter_message_batches(db, start: datetime, end: datetime, session_ids: Optional[Sequence[str]] = None,
+                         batch_size: Optional[int] = None, include_archived: bool = True) -> Iterator[List[dict]]:
+    """
+    Messages with start <= timestamp < end, in batches of row dicts.
+
+    Args:
+        db: SQLAlchemy session
+        session_ids: Only export these sessions (default all)
+        include_archived: Also export matching archived sessions
+    """
+    batch_size = batch_size or export_batch_size()
+    result = db.execute(_messages_query(start, end, session_ids).execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield [dict(row._mapping) for row in partition]
+    if include_archived:
+        result = db.execute(_archives_query(start, end, session_ids).execution_options(yield_per=1))
+        for blob, in result:
+            rows = _archived_rows(blob, start, end)
+            for offset in range(0, len(rows), batch_size):
+                yield rows[offset:offset + batch_size]
+
+
+async def aiter_message_batches(db, start: datetime, end: datetime, session_ids: Optional[Sequence[str]] = None,
+                                batch_size: Optional[int] = None, include_archived: bool = True) -> AsyncIterator[List[dict]]:
+    """Async version of iter_message_batches, streaming from an AsyncSession"""
+    batch_size = batch_size or export_batch_size()
+    result = await db.stream(_messages_query(start, end, session_ids).execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        yield [dict(row._mapping) for row in partition]
+    if include_archived:
+        result = await db.stream(_archives_query(start, end, session_ids).execution_options(yield_per=1))
+        async for blob, in result:
+            rows = _archived_rows(blob, start, end)
+            for offset in range(0, len(rows), batch_size):
+                yield rows[offset:offset + batch_size]
+
+
+def ndjson_chunk(rows: List[dict]) -> bytes:
+    """One batch of rows as NDJSON lines"""
+    return "".join(
+        json.dumps({**row, "timestamp": row["timestamp"].isoformat() if row["timestamp"] else None}) + "\n"
+        for row in rows
+    ).encode()
+
+
+def write_ndjson(batches, out: BinaryIO) -> int:
+    """
+    Write batches as NDJSON to a binary file object.
+
+    Returns:
+        Number of rows written
+    """
+    count = 0
+    for rows in batches:
+        out.write(ndjson_chunk(rows))
+        count += len(rows)
+    return count
+
+
+def write_parquet(batches, out) -> int:
+    """
+    Write batches to a Parquet file (path or binary file object), one row group per batch.
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([
+        ("id", pa.string()),
+        ("session_id", pa.string()),
+        ("sender", pa.string()),
+        ("message", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+    ])
+    count = 0
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        for rows in batches:
+            if rows:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                count += len(rows)
+    return count
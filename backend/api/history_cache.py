@@ -0,0 +1,153 @@
+"""
+Redis cache of each session's recent chat history
+
+A bounded list per session holds the last HISTORY_CACHE_SIZE messages of
+conversation_messages. Message writes in database.py push onto it, and
+recent-history reads are served from it, so hot sessions don't read from
+Postgres at all.
+
+- Reads on a miss load the window from Postgres and fill the list.
+- Writes only append to a list that already exists (RPUSHX): a partial list
+  would look like a complete window for a short session.
+- A fill can race with a concurrent write (the row is committed after the
+  database read but before the fill). Every write bumps a per-session
+  version, and a fill only succeeds if the version is unchanged since
+  before its database read (WATCH/MULTI).
+
+Redis layout:
+- chat:history:{session_id} - list of message row JSON, oldest first, at most HISTORY_CACHE_SIZE long
+- chat:history:{session_id}:v - write counter guarding fills
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from redis.exceptions import WatchError
+
+from redis_client import get_redis
+
+# Messages kept per session (HISTORY_CACHE_SIZE, 0 disables the cache)
+DEFAULT_HISTORY_CACHE_SIZE = 50
+
+# Idle sessions drop out of the cache (HISTORY_CACHE_TTL_SECONDS)
+DEFAULT_HISTORY_CACHE_TTL_SECONDS = 24 * 3600
+
+ROW_FIELDS = ("id", "session_id", "sender", "message", "timestamp")
+
+
+def _list_key(session_id: str) -> str:
+    return f"chat:history:{session_id}"
+
+
+def _version_key(session_id: str) -> str:
+    return f"chat:history:{session_id}:v"
+
+
+def _encode(row: dict) -> str:
+    return json.dumps({**{field: row[field] for field in ROW_FIELDS}, "timestamp": row["timestamp"].isoformat()})
+
+
+def _decode(raw) -> dict:
+    row = json.loads(raw)
+    row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return row
+
+
+class HistoryCache:
+    """Bounded Redis list of each session's most recent messages"""
+
+    def __init__(self, redis, size: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.redis = redis
+        self.size = size if size is not None else int(os.getenv("HISTORY_CACHE_SIZE", DEFAULT_HISTORY_CACHE_SIZE))
+        self.ttl_seconds = ttl_seconds or int(
+            os.getenv("HISTORY_CACHE_TTL_SECONDS", DEFAULT_HISTORY_CACHE_TTL_SECONDS)
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["HistoryCache"]:
+        """Create a cache on the shared Redis client, or None if Redis isn't configured or the size is 0"""
+        redis = get_redis()
+        if redis is None:
+            return None
+        cache = cls(redis)
+        return cache if cache.size > 0 else None
+
+    def append(self, rows: List[dict]) -> None:
+        """Write newly stored rows through to the sessions' lists (if they are cached)"""
+        by_session = {}
+        for row in rows:
+            by_session.setdefault(row["session_id"], []).append(_encode(row))
+        pipe = self.redis.pipeline(transaction=False)
+        for session_id, encoded in by_session.items():
+            pipe.incr(_version_key(session_id))
+            pipe.expire(_version_key(session_id), self.ttl_seconds)
+            pipe.rpushx(_list_key(session_id), *encoded)
+            pipe.ltrim(_list_key(session_id), -self.size, -1)
+        pipe.execute()
+
+    def window(self, session_id: str) -> Optional[List[dict]]:
+        """
+        The session's cached messages, oldest first.
+
+        Returns:
+            None on a miss. Fewer than size rows means that is the whole session.
+        """
+        raw = self.redis.lrange(_list_key(session_id), 0, -1)
+        if not raw:
+            self.misses += 1
+            return None
+        rows = [_decode(item) for item in raw]
+        if len({row["id"] for row in rows}) < len(rows):
+            # A redelivered write-behind row was pushed twice; refill rather than trust the length
+            self.redis.delete(_list_key(session_id))
+            self.misses += 1
+            return None
+        self.hits += 1
+        return rows
+
+    def evict(self, session_id: str) -> None:
+        """Forget a session's window (e.g. after it was archived)"""
+        self.redis.delete(_list_key(session_id))
+
+    def version(self, session_id: str) -> int:
+        """Write counter to pass to fill() - read it before loading rows from the database"""
+        return int(self.redis.get(_version_key(session_id)) or 0)
+
+    def fill(self, session_id: str, rows: List[dict], version: int) -> bool:
+        """
+        Cache the session's most recent rows (oldest first) loaded from the database.
+
+        Returns:
+            False if a write landed since version was read (the rows may be stale)
+        """
+        if not rows:
+            return False
+        encoded = [_encode(row) for row in rows[-self.size:]]
+        with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(_version_key(session_id))
+                if int(pipe.get(_version_key(session_id)) or 0) != version:
+                    return False
+                pipe.multi()
+                pipe.delete(_list_key(session_id))
+                pipe.rpush(_list_key(session_id), *encoded)
+                pipe.expire(_list_key(session_id), self.ttl_seconds)
+                pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+
+_cache = None
+
+
+def get_history_cache() -> Optional[HistoryCache]:
+    """Lazy-load the shared history cache (None when Redis isn't configured)"""
+    global _cache
+    if _cache is None:
+        _cache = HistoryCache.from_env()
+    return _cache
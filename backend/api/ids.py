@@ -0,0 +1,49 @@
+"""
+Time-ordered message ids (UUIDv7, RFC 9562)
+
+conversation_messages ids used to be random uuid4 strings, which scatter
+inserts across the primary key index. A UUIDv7 starts with the Unix time in
+milliseconds, so new ids land at the right edge of the index (append-only
+B-tree pages) and sort in creation order, as text as well as numerically.
+Within one millisecond a 12-bit counter keeps ids from this process
+monotonic.
+
+Python only ships uuid.uuid7 from 3.14, so it is generated here.
+"""
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> str:
+    """A new UUIDv7 string, monotonic within this process"""
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            # Start each millisecond at a random point in the lower half, leaving room to count up
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            ms = _last_ms
+            _counter += 1
+            if _counter > 0xFFF:
+                ms += 1  # counter exhausted: borrow the next millisecond
+                _counter = 0
+        _last_ms = ms
+        counter = _counter
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | random_bits
+    return str(uuid.UUID(int=value))
+
+
+def uuid7_time(value: str) -> datetime:
+    """The creation time encoded in a UUIDv7 (UTC, naive like the stored timestamps)"""
+    ms = uuid.UUID(value).int >> 80
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).replace(tzinfo=None)
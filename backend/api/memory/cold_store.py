@@ -0,0 +1,147 @@
+"""
+Cold tier for idle scoped memory sessions
+
+Most sessions sit idle for hours between tenant replies. Rather than keep
+them resident, ScopedMemoryManager spills sessions idle for longer than
+MEMORY_SPILL_AFTER_MINUTES into a cold store and reloads them transparently
+on their next access, so resident memory tracks active conversations.
+
+Snapshots use the same layout as session_memory rows (see
+ScopedMemoryManager.snapshot_session), zlib-compressed JSON. Each one is
+stored with the time the session has left before its TTL runs out, so
+sessions expire on schedule whichever tier they are in.
+
+Backends (MEMORY_COLD_STORE):
+- disk  - one file per session under MEMORY_COLD_STORE_DIR
+- redis - memory:cold:{session_id} keys on the shared client, expired by Redis
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from redis_client import get_redis
+
+COLD_KEY_PREFIX = "memory:cold:"
+
+
+def _encode(snapshot: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(snapshot, separators=(",", ":")).encode())
+
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data))
+
+
+class DiskColdStore:
+    """
+    Cold snapshots as one compressed file per session in a local directory.
+
+    A file's mtime is set to its expiry time, so expire() needs no index.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        # Session ids come from clients, so never use them as file names directly
+        return os.path.join(self.directory, hashlib.sha256(session_id.encode()).hexdigest() + ".json.z")
+
+    def put(self, session_id: str, snapshot: Dict[str, Any], ttl_seconds: float) -> None:
+        """Store a session snapshot for ttl_seconds (atomically replacing any older one)"""
+        path = self._path(session_id)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_encode(snapshot))
+        expires_at = time.time() + ttl_seconds
+        os.utime(temp_path, (expires_at, expires_at))
+        os.replace(temp_path, path)
+
+    def take(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Remove and return a session snapshot, or None if the session isn't cold"""
+        path = self._path(session_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.remove(path)
+        except FileNotFoundError:
+            return None
+        return _decode(data)
+
+    def delete(self, session_id: str) -> bool:
+        """Drop a session snapshot; True if one existed"""
+        try:
+            os.remove(self._path(session_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def expire(self) -> int:
+        """Delete snapshots whose TTL has run out"""
+        now = time.time()
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json.z") and entry.stat().st_mtime < now:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def count(self) -> int:
+        """Number of sessions in the cold tier"""
+        return sum(1 for entry in os.scandir(self.directory) if entry.name.endswith(".json.z"))
+
+
+class RedisColdStore:
+    """Cold snapshots as compressed Redis strings with the session's remaining TTL"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def put(self, session_id: str, snapshot: Dict[str, Any], ttl_seconds: float) -> None:
+        """Store a session snapshot for ttl_seconds (replacing any older one)"""
+        self.redis.set(COLD_KEY_PREFIX + session_id, _encode(snapshot), ex=max(1, int(ttl_seconds)))
+
+    def take(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Remove and return a session snapshot, or None if the session isn't cold"""
+        data = self.redis.getdel(COLD_KEY_PREFIX + session_id)
+        return _decode(data) if data else None
+
+    def delete(self, session_id: str) -> bool:
+        """Drop a session snapshot; True if one existed"""
+        return bool(self.redis.delete(COLD_KEY_PREFIX + session_id))
+
+    def expire(self) -> int:
+        """Redis expires cold keys itself"""
+        return 0
+
+    def count(self) -> int:
+        """Number of sessions in the cold tier"""
+        return sum(1 for _ in self.redis.scan_iter(match=COLD_KEY_PREFIX + "*", count=1000))
+
+
+def cold_store_from_env():
+    """
+    Create the cold store selected by MEMORY_COLD_STORE, or None to keep every session hot.
+
+    Falls back to None (with a warning) if redis is selected but REDIS_URL isn't set.
+    """
+    backend = os.getenv("MEMORY_COLD_STORE", "").lower()
+    if backend == "disk":
+        directory = os.getenv("MEMORY_COLD_STORE_DIR", os.path.join(tempfile.gettempdir(), "abodient-memory"))
+        return DiskColdStore(directory)
+    if backend == "redis":
+        redis = get_redis()
+        if redis is None:
+            print("[MEMORY MANAGER] MEMORY_COLD_STORE=redis but REDIS_URL is not set, keeping sessions hot")
+            return None
+        return RedisColdStore(redis)
+    return None
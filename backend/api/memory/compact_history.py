@@ -0,0 +1,128 @@
+"""
+Compact chat history for resident memory channels
+
+LangChain message objects are pydantic models with several dicts and
+optional fields each, which dominates per-session memory once tens of
+thousands of sessions are resident. CompactChatMessageHistory stores each
+message as a two-slot record holding a shared role tag and the text, and
+only materializes LangChain messages when `messages` is read to build a
+prompt.
+
+Run tools/benchmarks/memory_footprint.py to compare bytes per session
+against the LangChain in-memory history.
+"""
+
+import sys
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from langchain.schema import BaseMessage, SystemMessage
+from langchain_core.chat_history import BaseChatMessageHistory
+
+from .serialization import ROLE_TAGS, TAG_CLASSES
+from .token_window_memory import count_tokens
+
+
+class MessageRecord:
+    """
+    One stored message: a role tag from ROLE_TAGS (shared, never copied) and its text.
+
+    The token count is computed on first use and cached, since messages are
+    immutable once stored.
+    """
+
+    __slots__ = ("role", "text", "_tokens")
+
+    def __init__(self, role: str, text: str):
+        self.role = role
+        self.text = text
+        self._tokens: Optional[int] = None
+
+    @property
+    def tokens(self) -> int:
+        if self._tokens is None:
+            self._tokens = count_tokens(self.text)
+        return self._tokens
+
+    @classmethod
+    def from_message(cls, message: BaseMessage) -> "MessageRecord":
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        return cls(ROLE_TAGS.get(message.type, ROLE_TAGS["system"]), content)
+
+    def to_message(self) -> BaseMessage:
+        return TAG_CLASSES.get(self.role, SystemMessage)(content=self.text)
+
+
+class CompactChatMessageHistory(BaseChatMessageHistory):
+    """
+    Chat history backed by a plain list of MessageRecord.
+
+    The window is only ever trimmed from the front by a few messages at a
+    time, so a list with prefix deletes (drop_oldest) is both smaller and
+    no slower than a deque for channel-sized histories. If on_change is set
+    it is called after every mutation (used for write-behind persistence).
+    """
+
+    def __init__(
+        self,
+        messages: Optional[Sequence[BaseMessage]] = None,
+        on_change: Optional[Callable[[], None]] = None
+    ):
+        self._records: List[MessageRecord] = [MessageRecord.from_message(m) for m in messages or []]
+        self.on_change = on_change
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        """Materialize LangChain messages for prompt building"""
+        return [record.to_message() for record in self._records]
+
+    @messages.setter
+    def messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Replace the stored messages without reporting a change (used when restoring)"""
+        self._records = [MessageRecord.from_message(m) for m in messages]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def records(self) -> Iterator[Tuple[str, str]]:
+        """Iterate (role_tag, text) pairs without materializing messages"""
+        return ((record.role, record.text) for record in self._records)
+
+    def window_stats(self) -> List[Tuple[bool, int]]:
+        """(is_human, tokens) per stored message, from the cached counts (used by TokenWindowMemory)"""
+        human = ROLE_TAGS["human"]
+        return [(record.role == human, record.tokens) for record in self._records]
+
+    def oldest(self, count: int) -> List[BaseMessage]:
+        """Materialize only the oldest count messages (the ones a prune evicts)"""
+        return [record.to_message() for record in self._records[:count]]
+
+    def token_count(self) -> int:
+        """Total tokens across stored messages (cached per record)"""
+        return sum(record.tokens for record in self._records)
+
+    def approx_bytes(self) -> int:
+        """Approximate resident size of the stored messages"""
+        return sys.getsizeof(self._records) + sum(
+            sys.getsizeof(record) + sys.getsizeof(record.text) for record in self._records
+        )
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
+
+    def add_message(self, message: BaseMessage) -> None:
+        self._records.append(MessageRecord.from_message(message))
+        self._changed()
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self._records.extend(MessageRecord.from_message(m) for m in messages)
+        self._changed()
+
+    def drop_oldest(self, count: int) -> None:
+        """Drop the oldest count messages in place (used by TokenWindowMemory.prune)"""
+        del self._records[:count]
+        self._changed()
+
+    def clear(self) -> None:
+        self._records = []
+        self._changed()
@@ -0,0 +1,110 @@
+"""
+Memory usage instrumentation for the scoped memory manager
+
+Helpers behind ScopedMemoryManager.get_session_stats and the
+/metrics/memory endpoint: approximate bytes and tokens per channel,
+message-count histograms, event rates (evictions, spills) and the idle-age
+distribution of resident sessions. The figures are meant for sizing pods
+and tuning window, token budget, TTL and spill settings.
+"""
+
+import sys
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .token_window_memory import TokenWindowMemory, count_tokens, message_text
+
+# (upper bound inclusive, label) - anything above the last bound is counted as the overflow label
+MESSAGE_COUNT_BUCKETS: Sequence[Tuple[float, str]] = ((0, "0"), (2, "1-2"), (5, "3-5"), (10, "6-10"), (20, "11-20"))
+MESSAGE_COUNT_OVERFLOW = ">20"
+
+IDLE_AGE_BUCKETS: Sequence[Tuple[float, str]] = (
+    (300, "<5m"), (1800, "5-30m"), (7200, "30m-2h"), (21600, "2-6h"), (86400, "6-24h")
+)
+IDLE_AGE_OVERFLOW = ">24h"
+
+# Rates are averaged over this trailing window
+RATE_WINDOW_SECONDS = 300
+
+
+def histogram(values: Iterable[float], buckets: Sequence[Tuple[float, str]], overflow_label: str) -> Dict[str, int]:
+    """Count values into labelled buckets"""
+    counts = {label: 0 for _, label in buckets}
+    counts[overflow_label] = 0
+    for value in values:
+        for bound, label in buckets:
+            if value <= bound:
+                counts[label] += 1
+                break
+        else:
+            counts[overflow_label] += 1
+    return counts
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max of values (all None if empty)"""
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {"p50": at(0.5), "p90": at(0.9), "p99": at(0.99), "max": ordered[-1]}
+
+
+def memory_footprint(memory: TokenWindowMemory) -> Tuple[int, int, int]:
+    """(messages, tokens, approx_bytes) held by one channel memory, including its summary"""
+    history = memory.chat_memory
+    summary_bytes = sys.getsizeof(memory.summary) if memory.summary else 0
+    if hasattr(history, "token_count"):
+        return len(history), history.token_count(), history.approx_bytes() + summary_bytes
+    messages = history.messages
+    texts = [message_text(message) for message in messages]
+    approx_bytes = sum(sys.getsizeof(message) + sys.getsizeof(text) for message, text in zip(messages, texts))
+    return len(messages), sum(count_tokens(text) for text in texts), approx_bytes + summary_bytes
+
+
+def channel_usage(memories: Iterable[TokenWindowMemory]) -> Dict[str, object]:
+    """Aggregate footprint of one channel across sessions"""
+    sessions = messages = tokens = approx_bytes = 0
+    message_counts = []
+    for memory in memories:
+        count, memory_tokens, memory_bytes = memory_footprint(memory)
+        sessions += 1
+        messages += count
+        tokens += memory_tokens
+        approx_bytes += memory_bytes
+        message_counts.append(count)
+    return {
+        "sessions": sessions,
+        "messages": messages,
+        "tokens": tokens,
+        "approx_bytes": approx_bytes,
+        "message_histogram": histogram(message_counts, MESSAGE_COUNT_BUCKETS, MESSAGE_COUNT_OVERFLOW)
+    }
+
+
+class EventRate:
+    """Timestamps of recent events, for a per-minute rate over a trailing window"""
+
+    def __init__(self, window_seconds: float = RATE_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._events: deque = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._events and self._events[0] < cutoff:
+            self._events.popleft()
+
+    def record(self, now: float) -> None:
+        with self._lock:
+            self._events.append(now)
+            self._trim(now)
+
+    def per_minute(self, now: float) -> float:
+        with self._lock:
+            self._trim(now)
+            return len(self._events) * 60 / self.window_seconds
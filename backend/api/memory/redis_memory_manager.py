@@ -0,0 +1,279 @@
+"""
+Redis-backed Scoped Memory Manager
+
+ScopedMemoryManager keeps every channel in process memory, so with several
+uvicorn workers or API replicas a tenant's next turn can land on a process
+that has none of their context. RedisScopedMemoryManager implements the same
+interface with all state in Redis, so any process can serve any session and
+no sticky sessions are needed.
+
+Redis layout (per session):
+- memory:messages:{session_id}:{channel} - list of compact [role_tag, text] messages
+- memory:session:{session_id} - hash of {channel}:summary, {channel}:evicted and issue_record
+- memory:sessions - sorted set of session_id scored by last activity
+
+Every access reads all requested channels and the session hash in one
+pipelined round trip and refreshes the keys' TTL, so idle sessions expire in
+Redis on their own after the session TTL.
+"""
+
+import json
+from functools import partial
+
+from redis.exceptions import WatchError
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain.schema import BaseMessage
+from langchain_core.chat_history import BaseChatMessageHistory
+
+from .scoped_memory_manager import AGENT_TYPES, CHANNEL_WINDOW_SIZES, ScopedMemoryManager
+from .serialization import decode_message, encode_message
+from .token_window_memory import TokenWindowMemory
+
+ACTIVE_SESSIONS_KEY = "memory:sessions"
+
+CHANNELS = ('user',) + AGENT_TYPES
+
+
+def _messages_key(session_id: str, channel: str) -> str:
+    return f"memory:messages:{session_id}:{channel}"
+
+
+def _session_key(session_id: str) -> str:
+    return f"memory:session:{session_id}"
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _encode(message: BaseMessage) -> str:
+    return json.dumps(encode_message(message), separators=(",", ":"), ensure_ascii=False)
+
+
+class RedisChannelHistory(BaseChatMessageHistory):
+    """
+    Chat history for one channel stored as a Redis list.
+
+    Messages are read once when the channel is loaded and cached locally;
+    writes are appended to the cache and pushed to Redis in a single pipeline.
+    """
+
+    def __init__(self, redis, key: str, ttl_seconds: int, messages: Optional[List[BaseMessage]] = None):
+        self.redis = redis
+        self.key = key
+        self.ttl_seconds = ttl_seconds
+        self.messages: List[BaseMessage] = list(messages or [])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append messages to the channel"""
+        if not messages:
+            return
+        self.messages.extend(messages)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.rpush(self.key, *[_encode(message) for message in messages])
+        pipe.expire(self.key, self.ttl_seconds)
+        pipe.execute()
+
+    def add_message(self, message: BaseMessage) -> None:
+        """Append a single message to the channel"""
+        self.add_messages([message])
+
+    def drop_oldest(self, count: int) -> None:
+        """
+        Drop the oldest count messages in place (used by TokenWindowMemory.prune).
+
+        Another process may have pruned or appended to the list since it was
+        loaded, so only the messages this process summarized are removed, and
+        only while they are still at the head of the list: WATCH makes the
+        check and the LTRIM atomic against concurrent writes.
+        """
+        dropped = [_encode(message) for message in self.messages[:count]]
+        del self.messages[:count]
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.key)
+                    head = [_text(raw) for raw in pipe.lrange(self.key, 0, len(dropped) - 1)]
+                    matched = 0
+                    while matched < len(head) and head[matched] == dropped[matched]:
+                        matched += 1
+                    if matched == 0:
+                        pipe.unwatch()
+                        return  # already dropped by another process
+                    pipe.multi()
+                    pipe.ltrim(self.key, matched, -1)
+                    pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+    def clear(self) -> None:
+        """Remove every message in the channel"""
+        self.messages = []
+        self.redis.delete(self.key)
+
+
+class RedisScopedMemoryManager(ScopedMemoryManager):
+    """
+    ScopedMemoryManager with all channels, summaries and issue records in Redis.
+
+    Memory objects are rebuilt from Redis on each get_* call rather than
+    cached, so a process never serves a stale copy of a session another
+    process has since updated.
+    """
+
+    def __init__(self, redis, **kwargs):
+        super().__init__(**kwargs)
+        self.redis = redis
+        self.key_ttl_seconds = int(self.session_ttl_hours * 3600)
+
+    def _session_keys(self, session_id: str) -> List[str]:
+        return [_messages_key(session_id, channel) for channel in CHANNELS] + [_session_key(session_id)]
+
+    def _load_channels(self, session_id: str, channels: Sequence[str]) -> Dict[str, TokenWindowMemory]:
+        """Load the given channels for a session in one pipelined round trip"""
+        now = self._clock()
+        pipe = self.redis.pipeline(transaction=False)
+        for channel in channels:
+            pipe.lrange(_messages_key(session_id, channel), 0, -1)
+        pipe.hgetall(_session_key(session_id))
+        pipe.zadd(ACTIVE_SESSIONS_KEY, {session_id: now})
+        pipe.zcard(ACTIVE_SESSIONS_KEY)
+        for key in self._session_keys(session_id):
+            pipe.expire(key, self.key_ttl_seconds)
+        results = pipe.execute()
+
+        state = {_text(field): _text(value) for field, value in results[len(channels)].items()}
+        if results[len(channels) + 2] > self.max_sessions:
+            self._enforce_capacity()
+
+        memories = {}
+        for channel, raw_messages in zip(channels, results):
+            history = RedisChannelHistory(
+                self.redis,
+                _messages_key(session_id, channel),
+                self.key_ttl_seconds,
+                [decode_message(json.loads(raw)) for raw in raw_messages]
+            )
+            memory = self._create_memory(session_id, channel, CHANNEL_WINDOW_SIZES[channel], chat_memory=history)
+            memory.summary = state.get(f"{channel}:summary", "")
+            memory.evicted_count = int(state.get(f"{channel}:evicted", 0))
+            memory.on_evict = partial(self._persist_evicted, session_id, channel, memory, memory.on_evict)
+            memories[channel] = memory
+        return memories
+
+    def _persist_evicted(self, session_id: str, channel: str, memory: TokenWindowMemory, queue, entries) -> None:
+        """Save a channel's rolling summary after an eviction, then queue the entries for the worker"""
+        key = _session_key(session_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(key, mapping={
+            f"{channel}:summary": memory.summary,
+            f"{channel}:evicted": memory.evicted_count
+        })
+        pipe.expire(key, self.key_ttl_seconds)
+        pipe.execute()
+        if queue is not None:
+            queue(entries)
+
+    def get_user_memory(self, session_id: str) -> TokenWindowMemory:
+        """Get conversation memory for user ↔ main agent interactions"""
+        return self._load_channels(session_id, ['user'])['user']
+
+    def get_agent_memory(self, session_id: str, agent_type: str) -> TokenWindowMemory:
+        """Get conversation memory for main agent ↔ specific agent interactions"""
+        if agent_type not in AGENT_TYPES:
+            raise ValueError(f"Unknown agent type: {agent_type}. Must be one of: {list(AGENT_TYPES)}")
+        return self._load_channels(session_id, [agent_type])[agent_type]
+
+    def get_dual_memory(self, session_id: str, agent_type: str) -> Tuple[TokenWindowMemory, TokenWindowMemory]:
+        """Get (user_memory, agent_memory) in a single round trip"""
+        if agent_type not in AGENT_TYPES:
+            raise ValueError(f"Unknown agent type: {agent_type}. Must be one of: {list(AGENT_TYPES)}")
+        memories = self._load_channels(session_id, ['user', agent_type])
+        return memories['user'], memories[agent_type]
+
+    def get_issue_record(self, session_id: str) -> dict:
+        """Get the structured issue record for a session"""
+        key = _session_key(session_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hget(key, "issue_record")
+        pipe.zadd(ACTIVE_SESSIONS_KEY, {session_id: self._clock()})
+        results = pipe.execute()
+        return json.loads(results[0]) if results[0] else {}
+
+    def update_issue_record(self, session_id: str, record: dict) -> None:
+        """Replace the structured issue record for a session"""
+        key = _session_key(session_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(key, "issue_record", json.dumps(record, separators=(",", ":")))
+        pipe.expire(key, self.key_ttl_seconds)
+        pipe.zadd(ACTIVE_SESSIONS_KEY, {session_id: self._clock()})
+        pipe.execute()
+
+    def _enforce_capacity(self) -> None:
+        """Evict least recently used sessions until at most max_sessions remain"""
+        excess = self.redis.zcard(ACTIVE_SESSIONS_KEY) - self.max_sessions
+        if excess > 0:
+            for session_id in self.redis.zrange(ACTIVE_SESSIONS_KEY, 0, excess - 1):
+                self.evict_session(_text(session_id))
+
+    def evict_session(self, session_id: str, blocking: bool = True) -> bool:
+        """
+        Remove a session's channels, summaries and issue record from Redis.
+        
+        Deletes are atomic in Redis, so blocking is accepted for interface
+        compatibility only.
+
+        Returns:
+            True if the session existed
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(*self._session_keys(session_id))
+        pipe.zrem(ACTIVE_SESSIONS_KEY, session_id)
+        deleted, removed = pipe.execute()
+        was_resident = bool(deleted or removed)
+        if was_resident:
+            self.evicted_sessions += 1
+            self._eviction_rate.record(self._clock())
+        return was_resident
+
+    def cleanup_expired_sessions(self, max_age_hours: Optional[float] = None) -> int:
+        """
+        Remove sessions that haven't been active for more than max_age_hours.
+
+        Session keys already expire through their Redis TTL; this keeps the
+        activity index in step and honours a shorter max_age_hours.
+        """
+        max_age_hours = self.session_ttl_hours if max_age_hours is None else max_age_hours
+        cutoff_time = self._clock() - (max_age_hours * 3600)
+        expired_sessions = self.redis.zrangebyscore(ACTIVE_SESSIONS_KEY, "-inf", f"({cutoff_time}")
+        for session_id in expired_sessions:
+            self.evict_session(_text(session_id))
+
+        if expired_sessions:
+            print(f"[MEMORY MANAGER] Cleaned up {len(expired_sessions)} expired sessions")
+        return len(expired_sessions)
+
+    def get_session_stats(self) -> Dict[str, any]:
+        """
+        Get statistics about sessions held in Redis.
+
+        Per-channel counts aren't tracked in Redis, so only session-level
+        figures are reported.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zcard(ACTIVE_SESSIONS_KEY)
+        pipe.zrange(ACTIVE_SESSIONS_KEY, 0, 0, withscores=True)
+        pipe.zrange(ACTIVE_SESSIONS_KEY, -1, -1, withscores=True)
+        active, oldest, newest = pipe.execute()
+        return {
+            'backend': 'redis',
+            'active_sessions': active,
+            'oldest_session': oldest[0][1] if oldest else None,
+            'newest_session': newest[0][1] if newest else None,
+            'evicted_sessions': self.evicted_sessions,
+            'evictions_per_minute': self._eviction_rate.per_minute(self._clock()),
+            'max_sessions': self.max_sessions,
+            'session_ttl_hours': self.session_ttl_hours
+        }
@@ -11,11 +11,71 @@ Each channel maintains its own conversation history to prevent cross-contaminati
 between different agent roles, matching the n8n conversation scoping architecture.
 """
 
+import itertools
+import os
+import threading
 import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Optional
-from langchain.memory import ConversationBufferWindowMemory
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional
 from langchain.schema import BaseMessage
+from langchain_core.chat_history import BaseChatMessageHistory
+from .token_window_memory import TokenWindowMemory
+from .summary_store import SummaryStore
+from .session_persister import SessionMemoryPersister
+from .cold_store import cold_store_from_env
+from .memory_metrics import (
+    EventRate, IDLE_AGE_BUCKETS, IDLE_AGE_OVERFLOW, channel_usage, histogram, percentiles
+)
+from .compact_history import CompactChatMessageHistory
+from .serialization import SNAPSHOT_VERSION, dump_channel, encode_message, load_channel
+
+# Default per-channel token budgets, overridable with MEMORY_TOKEN_BUDGET_<CHANNEL>
+DEFAULT_TOKEN_BUDGETS = {
+    'user': 3000,
+    'context': 1500,
+    'contract': 1500,
+    'classifier': 1000
+}
+
+# Exchange window per channel - user conversations get a larger window (they're more important),
+# agent conversations a smaller one (more focused)
+CHANNEL_WINDOW_SIZES = {
+    'user': 10,
+    'context': 5,
+    'contract': 5,
+    'classifier': 5
+}
+
+AGENT_TYPES = ('context', 'contract', 'classifier')
+
+# Token budget for the rolling summary of evicted messages in each channel
+DEFAULT_SUMMARY_TOKEN_BUDGET = 300
+
+# Idle sessions are evicted after this many hours (MEMORY_SESSION_TTL_HOURS)
+DEFAULT_SESSION_TTL_HOURS = 24
+
+# Hard cap on resident sessions; least recently used are evicted first (MEMORY_MAX_SESSIONS)
+DEFAULT_MAX_SESSIONS = 10000
+
+# How often the background sweeper evicts expired sessions (MEMORY_SWEEP_INTERVAL_SECONDS)
+DEFAULT_SWEEP_INTERVAL_SECONDS = 300
+
+# Sessions idle this long are spilled to the cold store, if one is configured (MEMORY_SPILL_AFTER_MINUTES)
+DEFAULT_SPILL_AFTER_MINUTES = 30
+
+# Sessions are guarded by a fixed pool of striped locks (hash(session_id) % LOCK_STRIPES)
+LOCK_STRIPES = 256
+
+
+def _load_token_budgets() -> Dict[str, int]:
+    """Read per-channel token budgets from the environment"""
+    return {
+        channel: int(os.getenv(f"MEMORY_TOKEN_BUDGET_{channel.upper()}", budget))
+        for channel, budget in DEFAULT_TOKEN_BUDGETS.items()
+    }
 
 
 class ScopedMemoryManager:
@@ -27,31 +87,398 @@ class ScopedMemoryManager:
     - Each agent only sees its own conversation thread with the main agent
     - Memory doesn't leak between different conversation types
     - Session activity is tracked for cleanup purposes
+    - Resident memory stays bounded: idle sessions expire after a TTL and the
+      least recently used sessions are evicted beyond max_sessions
+    - With a cold store, sessions idle for spill_after_minutes are serialized out
+      of process and reloaded transparently on their next access, so resident
+      memory tracks active conversations
+    - It is safe to use from the FastAPI threadpool: each session is guarded by
+      its own lock (striped, so lock memory stays fixed), and only the LRU
+      bookkeeping shares a short global critical section
+    - A session pinned by an in-flight turn (see pin_session) is never
+      evicted or spilled by the TTL, LRU or idle sweeps, since the turn keeps
+      using its memory objects outside the session lock
     """
     
-    def __init__(self):
-        # Separate conversation channels - each stores session_id -> ConversationBufferWindowMemory
-        self.user_conversations: Dict[str, ConversationBufferWindowMemory] = {}
-        self.context_conversations: Dict[str, ConversationBufferWindowMemory] = {}  
-        self.contract_conversations: Dict[str, ConversationBufferWindowMemory] = {}
-        self.classifier_conversations: Dict[str, ConversationBufferWindowMemory] = {}
+    def __init__(
+        self,
+        token_budgets: Optional[Dict[str, int]] = None,
+        summary_token_budget: Optional[int] = None,
+        summary_store: Optional[SummaryStore] = None,
+        session_ttl_hours: Optional[float] = None,
+        max_sessions: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+        persister: Optional[SessionMemoryPersister] = None,
+        cold_store=None,
+        spill_after_minutes: Optional[float] = None
+    ):
+        # Per-channel token budgets bound the prompt size each channel can contribute
+        self.token_budgets: Dict[str, int] = {**_load_token_budgets(), **(token_budgets or {})}
+        self.summary_token_budget = summary_token_budget or int(
+            os.getenv("MEMORY_SUMMARY_TOKEN_BUDGET", DEFAULT_SUMMARY_TOKEN_BUDGET)
+        )
+        
+        # Optional Redis store for worker-precomputed summaries of evicted messages
+        self.summary_store = summary_store
+        
+        # Separate conversation channels - each stores session_id -> TokenWindowMemory
+        self.user_conversations: Dict[str, TokenWindowMemory] = {}
+        self.context_conversations: Dict[str, TokenWindowMemory] = {}  
+        self.contract_conversations: Dict[str, TokenWindowMemory] = {}
+        self.classifier_conversations: Dict[str, TokenWindowMemory] = {}
         
-        # Session activity tracking for cleanup purposes
-        self.session_activity: Dict[str, float] = {}
+        # Structured per-session issue records maintained by the context agent
+        self.issue_records: Dict[str, dict] = {}
         
+        # Session activity tracking for cleanup purposes, kept in least-recently-used order
+        self.session_activity: "OrderedDict[str, float]" = OrderedDict()
+        
+        # session_id -> number of in-flight turns using the session (see pin_session)
+        self._pinned: Dict[str, int] = {}
+        
+        # Per-session locks for check-then-create, hydration and eviction, plus a
+        # short lock for the shared LRU order
+        self._session_locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._activity_lock = threading.Lock()
+        
+        # Eviction policy
+        self.session_ttl_hours = session_ttl_hours or float(
+            os.getenv("MEMORY_SESSION_TTL_HOURS", DEFAULT_SESSION_TTL_HOURS)
+        )
+        self.max_sessions = max_sessions or int(os.getenv("MEMORY_MAX_SESSIONS", DEFAULT_MAX_SESSIONS))
+        self.evicted_sessions = 0
+        self._clock = clock
+        self._eviction_rate = EventRate()
+        
+        # Optional write-behind persistence to the session_memory table
+        self.persister = persister
+        if persister is not None:
+            persister.snapshot_session = self.snapshot_session
+        
+        # Optional cold tier for idle sessions (see cold_store.py)
+        self.cold_store = cold_store
+        self.spill_after_minutes = spill_after_minutes or float(
+            os.getenv("MEMORY_SPILL_AFTER_MINUTES", DEFAULT_SPILL_AFTER_MINUTES)
+        )
+        self.spilled_sessions = 0
+        self.reloaded_sessions = 0
+        
+        # Optional warm start from conversation_messages (see warm_start.py)
+        self.warm_loader = None
+        
+        # Optional on-demand hydration of the user channel from conversation_messages (see transcript.py)
+        self.transcript = None
+        self._spill_rate = EventRate()
+        
+        # Background sweeper thread (see start_sweeper)
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+        
+    def session_lock(self, session_id: str) -> threading.RLock:
+        """The lock guarding a session's memory (reentrant, shared by sessions in the same stripe)"""
+        return self._session_locks[hash(session_id) % LOCK_STRIPES]
+    
     def _update_session_activity(self, session_id: str) -> None:
-        """Update the last activity timestamp for a session"""
-        self.session_activity[session_id] = time.time()
+        """Update the last activity timestamp for a session and enforce the session cap"""
+        with self._activity_lock:
+            is_new = session_id not in self.session_activity
+            self.session_activity[session_id] = self._clock()
+            self.session_activity.move_to_end(session_id)
+        if is_new:
+            self._enforce_capacity()
+    
+    @contextmanager
+    def pin_session(self, session_id: str) -> Iterator[None]:
+        """
+        Keep a session resident for the duration of a turn.
+        
+        The memory objects returned by get_* are used after the session lock is
+        released, across LLM calls that can outlast the session TTL, so capacity
+        and idle eviction skip pinned sessions; leaving the block counts as
+        activity. Pins nest, so concurrent turns on one session are fine.
+        """
+        with self._activity_lock:
+            self._pinned[session_id] = self._pinned.get(session_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._activity_lock:
+                remaining = self._pinned.pop(session_id) - 1
+                if remaining:
+                    self._pinned[session_id] = remaining
+                if session_id in self.session_activity:
+                    self.session_activity[session_id] = self._clock()
+                    self.session_activity.move_to_end(session_id)
+    
+    def _is_pinned(self, session_id: str) -> bool:
+        with self._activity_lock:
+            return session_id in self._pinned
+    
+    def _session_stores(self) -> List[dict]:
+        """Every per-session store, so eviction can't miss a channel"""
+        return [
+            self.user_conversations,
+            self.context_conversations,
+            self.contract_conversations,
+            self.classifier_conversations,
+            self.issue_records
+        ]
+    
+    def _channel_stores(self) -> Dict[str, Dict[str, TokenWindowMemory]]:
+        """Conversation stores keyed by channel name"""
+        return {
+            'user': self.user_conversations,
+            'context': self.context_conversations,
+            'contract': self.contract_conversations,
+            'classifier': self.classifier_conversations
+        }
+    
+    def snapshot_session(self, session_id: str) -> Optional[dict]:
+        """Serializable snapshot of a resident session, or None if it isn't in memory"""
+        with self.session_lock(session_id):
+            return self._snapshot_session(session_id)
+    
+    def _snapshot_session(self, session_id: str) -> Optional[dict]:
+        if session_id not in self.session_activity:
+            return None
+        return {
+            "v": SNAPSHOT_VERSION,
+            "channels": {
+                channel: dump_channel(store[session_id])
+                for channel, store in self._channel_stores().items()
+                if session_id in store
+            },
+            "issue_record": self.issue_records.get(session_id, {})
+        }
+    
+    def _load_snapshot(self, session_id: str) -> Optional[dict]:
+        """
+        Find a non-resident session's state: the cold tier first, then the
+        session_memory table, then its recent transcript (claimed from a
+        running warm start, or loaded on demand)
+        """
+        if self.cold_store is not None:
+            snapshot = self.cold_store.take(session_id)
+            if snapshot:
+                self.reloaded_sessions += 1
+                return snapshot
+        if self.persister is not None:
+            snapshot = self.persister.load(session_id)
+            if snapshot:
+                return snapshot
+        if self.warm_loader is not None:
+            messages = self.warm_loader.claim(session_id)
+            if messages:
+                return {"channels": {"user": {"m": [encode_message(m) for m in messages]}}}
+        if self.transcript is not None:
+            messages = self.transcript.load(session_id)
+            if messages:
+                return {"channels": {"user": {"m": [encode_message(m) for m in messages]}}}
+        return None
+    
+    def _hydrate_session(self, session_id: str) -> None:
+        """Restore a spilled, persisted or transcript-backed session on its first access"""
+        if session_id in self.session_activity:
+            return
+        sources = (self.persister, self.cold_store, self.warm_loader, self.transcript)
+        if all(source is None for source in sources):
+            return
+        try:
+            snapshot = self._load_snapshot(session_id)
+        except Exception as e:
+            print(f"[MEMORY MANAGER] Failed to load stored memory for {session_id}: {e}")
+            return
+        if not snapshot:
+            return
+        
+        stores = self._channel_stores()
+        for channel, channel_snapshot in snapshot.get("channels", {}).items():
+            if channel in stores and session_id not in stores[channel]:
+                memory = self._create_memory(session_id, channel, window_size=CHANNEL_WINDOW_SIZES[channel])
+                load_channel(memory, channel_snapshot)
+                stores[channel][session_id] = memory
+        if snapshot.get("issue_record"):
+            self.issue_records[session_id] = dict(snapshot["issue_record"])
+    
+    def warm_session(self, session_id: str, messages: List[BaseMessage]) -> bool:
+        """
+        Make a session resident with its recent user-channel messages (used by the warm start).
+        
+        Sessions that are already resident are left alone, and a spilled or
+        persisted snapshot is preferred over the bare transcript.
+        
+        Returns:
+            True if the session was loaded
+        """
+        with self.session_lock(session_id):
+            if session_id in self.session_activity:
+                return False
+            self._hydrate_session(session_id)
+            if session_id not in self.user_conversations:
+                memory = self._create_memory(session_id, 'user', window_size=CHANNEL_WINDOW_SIZES['user'])
+                memory.chat_memory.messages = messages
+                self.user_conversations[session_id] = memory
+            self._update_session_activity(session_id)
+            return True
+    
+    def _mark_evicted(self, session_id: str, queue, entries) -> None:
+        """Mark a session dirty once its rolling summary has absorbed an eviction"""
+        self.persister.mark_dirty(session_id)
+        if queue is not None:
+            queue(entries)
+    
+    def _enforce_capacity(self) -> None:
+        """Evict (or spill, with a cold store) least recently used sessions until at most max_sessions remain"""
+        with self._activity_lock:
+            excess = len(self.session_activity) - self.max_sessions
+            candidates = [
+                session_id
+                for session_id in itertools.islice(self.session_activity, max(0, excess) * 2 + len(self._pinned))
+                if session_id not in self._pinned
+            ]
+        for session_id in candidates:
+            if excess <= 0:
+                break
+            # Never wait on another session's lock while holding our own; a busy
+            # session isn't idle, so skip it and take the next oldest instead
+            release = self.spill_session if self.cold_store is not None else self.evict_session
+            if release(session_id, blocking=False):
+                excess -= 1
+    
+    def evict_session(self, session_id: str, blocking: bool = True) -> bool:
+        """
+        Remove a session from every memory channel.
+        
+        Args:
+            blocking: If False, give up instead of waiting when the session is in use
+        
+        Returns:
+            True if the session was resident (and has been evicted)
+        """
+        lock = self.session_lock(session_id)
+        if not lock.acquire(blocking=blocking):
+            return False
+        try:
+            if self.persister is not None:
+                # Hand the final state to the persister before it leaves memory
+                snapshot = self._snapshot_session(session_id)
+                if snapshot is not None:
+                    self.persister.stage(session_id, snapshot)
+            was_resident = self._drop_session(session_id)
+            if self.cold_store is not None:
+                was_resident = self.cold_store.delete(session_id) or was_resident
+            if was_resident:
+                with self._activity_lock:
+                    self.evicted_sessions += 1
+                self._eviction_rate.record(self._clock())
+            return was_resident
+        finally:
+            lock.release()
+    
+    def _drop_session(self, session_id: str) -> bool:
+        """Remove a session from the hot tier; True if it was resident"""
+        with self._activity_lock:
+            was_resident = self.session_activity.pop(session_id, None) is not None
+        for store in self._session_stores():
+            was_resident = store.pop(session_id, None) is not None or was_resident
+        return was_resident
+    
+    def spill_session(self, session_id: str, blocking: bool = True) -> bool:
+        """
+        Move a resident session to the cold store; it is reloaded on its next access.
+        
+        Args:
+            blocking: If False, give up instead of waiting when the session is in use
+        
+        Returns:
+            True if the session was spilled
+        """
+        lock = self.session_lock(session_id)
+        if not lock.acquire(blocking=blocking):
+            return False
+        try:
+            snapshot = self._snapshot_session(session_id)
+            if snapshot is None:
+                return False
+            idle_seconds = self._clock() - self.session_activity.get(session_id, self._clock())
+            try:
+                self.cold_store.put(session_id, snapshot, self.session_ttl_hours * 3600 - idle_seconds)
+            except Exception as e:
+                print(f"[MEMORY MANAGER] Failed to spill session {session_id}, keeping it resident: {e}")
+                return False
+            if self.persister is not None:
+                self.persister.stage(session_id, snapshot)
+            self._drop_session(session_id)
+            with self._activity_lock:
+                self.spilled_sessions += 1
+            self._spill_rate.record(self._clock())
+            return True
+        finally:
+            lock.release()
+    
+    def spill_idle_sessions(self, idle_minutes: Optional[float] = None) -> int:
+        """
+        Spill sessions idle for longer than idle_minutes to the cold store.
+        
+        Args:
+            idle_minutes: Defaults to the manager's spill_after_minutes
+        
+        Returns:
+            Number of sessions spilled (0 without a cold store)
+        """
+        if self.cold_store is None:
+            return 0
+        idle_minutes = self.spill_after_minutes if idle_minutes is None else idle_minutes
+        cutoff_time = self._clock() - (idle_minutes * 60)
+        
+        idle_sessions = []
+        with self._activity_lock:
+            for session_id, last_activity in self.session_activity.items():
+                if last_activity >= cutoff_time:
+                    break
+                idle_sessions.append(session_id)
+        
+        spilled = 0
+        for session_id in idle_sessions:
+            with self.session_lock(session_id):
+                # Skip sessions that were touched after the scan or are mid-turn
+                if self.session_activity.get(session_id, cutoff_time) < cutoff_time and not self._is_pinned(session_id):
+                    spilled += self.spill_session(session_id)
+        
+        if spilled:
+            print(f"[MEMORY MANAGER] Spilled {spilled} idle sessions to the cold store")
+        return spilled
         
-    def _create_memory(self, window_size: int = 5) -> ConversationBufferWindowMemory:
-        """Create a new conversation memory with specified window size"""
-        return ConversationBufferWindowMemory(
+    def _create_memory(
+        self,
+        session_id: str,
+        channel: str,
+        window_size: int = 5,
+        chat_memory: Optional[BaseChatMessageHistory] = None
+    ) -> TokenWindowMemory:
+        """Create a new conversation memory bounded by window size and the channel's token budget"""
+        if chat_memory is None:
+            # Resident channels store compact records rather than LangChain message objects
+            chat_memory = CompactChatMessageHistory(
+                on_change=partial(self.persister.mark_dirty, session_id) if self.persister is not None else None
+            )
+        memory = TokenWindowMemory(
+            chat_memory=chat_memory,
             k=window_size,
+            max_token_limit=self.token_budgets[channel],
+            summary_token_limit=self.summary_token_budget,
             memory_key="chat_history",
             return_messages=True
         )
+        if self.summary_store is not None:
+            # Evictions are queued for the worker; loads read its precomputed summary
+            memory.on_evict = partial(self.summary_store.queue_evicted, session_id, channel)
+            memory.summary_source = partial(self.summary_store.get_summary, session_id, channel)
+        if self.persister is not None:
+            memory.on_evict = partial(self._mark_evicted, session_id, memory.on_evict)
+        return memory
     
-    def get_user_memory(self, session_id: str) -> ConversationBufferWindowMemory:
+    def get_user_memory(self, session_id: str) -> TokenWindowMemory:
         """
         Get conversation memory for user ↔ main agent interactions.
         
@@ -63,14 +490,17 @@ class ScopedMemoryManager:
         - Agent-to-agent conversations
         - Internal agent deliberations
         """
-        if session_id not in self.user_conversations:
-            # Use larger window for user conversations (they're more important)
-            self.user_conversations[session_id] = self._create_memory(window_size=10)
-            
-        self._update_session_activity(session_id)
-        return self.user_conversations[session_id]
+        with self.session_lock(session_id):
+            self._hydrate_session(session_id)
+            memory = self.user_conversations.get(session_id)
+            if memory is None:
+                memory = self.user_conversations[session_id] = self._create_memory(
+                    session_id, 'user', window_size=CHANNEL_WINDOW_SIZES['user']
+                )
+            self._update_session_activity(session_id)
+            return memory
     
-    def get_agent_memory(self, session_id: str, agent_type: str) -> ConversationBufferWindowMemory:
+    def get_agent_memory(self, session_id: str, agent_type: str) -> TokenWindowMemory:
         """
         Get conversation memory for main agent ↔ specific agent interactions.
         
@@ -79,7 +509,7 @@ class ScopedMemoryManager:
             agent_type: One of 'context', 'contract', 'classifier'
             
         Returns:
-            ConversationBufferWindowMemory for that specific agent conversation
+            TokenWindowMemory for that specific agent conversation
             
         This ensures each agent only sees its own conversation thread with the main agent:
         - ContextAgent sees only main agent ↔ context agent conversations
@@ -98,59 +528,161 @@ class ScopedMemoryManager:
             
         store = agent_stores[agent_type]
         
-        if session_id not in store:
-            # Use smaller window for agent conversations (more focused)
-            store[session_id] = self._create_memory(window_size=5)
-            
-        self._update_session_activity(session_id)
-        return store[session_id]
+        with self.session_lock(session_id):
+            self._hydrate_session(session_id)
+            memory = store.get(session_id)
+            if memory is None:
+                memory = store[session_id] = self._create_memory(
+                    session_id, agent_type, window_size=CHANNEL_WINDOW_SIZES[agent_type]
+                )
+            self._update_session_activity(session_id)
+            return memory
+    
+    def get_dual_memory(self, session_id: str, agent_type: str) -> tuple[TokenWindowMemory, TokenWindowMemory]:
+        """Get (user_memory, agent_memory) for an agent that reads both channels"""
+        with self.session_lock(session_id):
+            return self.get_user_memory(session_id), self.get_agent_memory(session_id, agent_type)
+    
+    def get_issue_record(self, session_id: str) -> dict:
+        """
+        Get the structured issue record for a session.
+        
+        The context agent keeps this compact record (summary, filled slots,
+        outstanding questions) up to date instead of re-reading the full
+        conversation history on every call. Returns a copy; use
+        update_issue_record to change it.
+        """
+        with self.session_lock(session_id):
+            self._hydrate_session(session_id)
+            self._update_session_activity(session_id)
+            return dict(self.issue_records.get(session_id, {}))
+    
+    def update_issue_record(self, session_id: str, record: dict) -> None:
+        """Replace the structured issue record for a session"""
+        with self.session_lock(session_id):
+            self._hydrate_session(session_id)
+            self.issue_records[session_id] = dict(record)
+            self._update_session_activity(session_id)
+        if self.persister is not None:
+            self.persister.mark_dirty(session_id)
     
     def get_session_stats(self) -> Dict[str, any]:
         """
         Get statistics about current memory usage and session activity.
         
+        Besides entry counts this reports, per channel, the approximate bytes,
+        tokens and a message-count histogram; eviction and spill rates; and
+        how long resident sessions have been idle. Walking every channel is
+        O(resident messages), so this is meant for a metrics scrape rather
+        than the request path.
+        
         Returns:
             Dictionary with memory usage statistics
         """
+        now = self._clock()
+        with self._activity_lock:
+            activity = list(self.session_activity.values())
+        idle_seconds = [now - last_activity for last_activity in activity]
+        channels = {
+            channel: channel_usage(list(store.values()))
+            for channel, store in self._channel_stores().items()
+        }
+        approx_bytes = sum(usage['approx_bytes'] for usage in channels.values())
         return {
-            'active_sessions': len(self.session_activity),
+            'active_sessions': len(activity),
             'user_conversations': len(self.user_conversations),
             'context_conversations': len(self.context_conversations),
             'contract_conversations': len(self.contract_conversations), 
             'classifier_conversations': len(self.classifier_conversations),
+            'issue_records': len(self.issue_records),
             'total_memory_stores': (
                 len(self.user_conversations) + 
                 len(self.context_conversations) + 
                 len(self.contract_conversations) + 
                 len(self.classifier_conversations)
             ),
-            'oldest_session': min(self.session_activity.values()) if self.session_activity else None,
-            'newest_session': max(self.session_activity.values()) if self.session_activity else None
+            'oldest_session': activity[0] if activity else None,
+            'newest_session': activity[-1] if activity else None,
+            'evicted_sessions': self.evicted_sessions,
+            'spilled_sessions': self.spilled_sessions,
+            'reloaded_sessions': self.reloaded_sessions,
+            'cold_sessions': self.cold_store.count() if self.cold_store is not None else 0,
+            'max_sessions': self.max_sessions,
+            'session_ttl_hours': self.session_ttl_hours,
+            'spill_after_minutes': self.spill_after_minutes if self.cold_store is not None else None,
+            'channels': channels,
+            'approx_bytes': approx_bytes,
+            'approx_bytes_per_session': approx_bytes / len(activity) if activity else 0,
+            'total_tokens': sum(usage['tokens'] for usage in channels.values()),
+            'evictions_per_minute': self._eviction_rate.per_minute(now),
+            'spills_per_minute': self._spill_rate.per_minute(now),
+            'session_idle_seconds': percentiles(idle_seconds),
+            'session_idle_histogram': histogram(idle_seconds, IDLE_AGE_BUCKETS, IDLE_AGE_OVERFLOW)
         }
     
-    def cleanup_expired_sessions(self, max_age_hours: int = 24) -> int:
+    def cleanup_expired_sessions(self, max_age_hours: Optional[float] = None) -> int:
         """
         Remove sessions that haven't been active for more than max_age_hours.
         
         Args:
-            max_age_hours: Maximum age in hours before a session is considered expired
+            max_age_hours: Maximum age in hours before a session is considered
+                expired. Defaults to the manager's session TTL.
             
         Returns:
             Number of sessions cleaned up
-            
-        Note: Implementation will be added in Phase 3
-        """
-        # Placeholder for now - will implement in Phase 3
-        cutoff_time = time.time() - (max_age_hours * 3600)
-        expired_sessions = [
-            session_id for session_id, last_activity 
-            in self.session_activity.items() 
-            if last_activity < cutoff_time
-        ]
+        """
+        max_age_hours = self.session_ttl_hours if max_age_hours is None else max_age_hours
+        cutoff_time = self._clock() - (max_age_hours * 3600)
+        
+        # session_activity is in least-recently-used order, so stop at the first live session
+        expired_sessions = []
+        with self._activity_lock:
+            for session_id, last_activity in self.session_activity.items():
+                if last_activity >= cutoff_time:
+                    break
+                expired_sessions.append(session_id)
         
-        # TODO: Implement actual cleanup in Phase 3
-        print(f"[MEMORY MANAGER] Would clean up {len(expired_sessions)} expired sessions")
-        return len(expired_sessions)
+        cleaned = 0
+        for session_id in expired_sessions:
+            with self.session_lock(session_id):
+                # Skip sessions that were touched after the scan or are mid-turn
+                if self.session_activity.get(session_id, cutoff_time) < cutoff_time and not self._is_pinned(session_id):
+                    cleaned += self.evict_session(session_id)
+        
+        if self.cold_store is not None:
+            cleaned += self.cold_store.expire()
+        
+        if cleaned:
+            print(f"[MEMORY MANAGER] Cleaned up {cleaned} expired sessions")
+        return cleaned
+    
+    def start_sweeper(self, interval_seconds: Optional[float] = None) -> None:
+        """Start a daemon thread that periodically evicts expired sessions and spills idle ones"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        interval_seconds = interval_seconds or float(
+            os.getenv("MEMORY_SWEEP_INTERVAL_SECONDS", DEFAULT_SWEEP_INTERVAL_SECONDS)
+        )
+        self._sweeper_stop.clear()
+        
+        def sweep():
+            while not self._sweeper_stop.wait(interval_seconds):
+                try:
+                    self.cleanup_expired_sessions()
+                    self.spill_idle_sessions()
+                except Exception as e:
+                    print(f"[MEMORY MANAGER] Sweeper error: {e}")
+        
+        self._sweeper = threading.Thread(target=sweep, name="memory-sweeper", daemon=True)
+        self._sweeper.start()
+        print(f"[MEMORY MANAGER] Started session sweeper (every {interval_seconds}s)")
+    
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper thread"""
+        self._sweeper_stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
 
 
 # Global singleton instance
@@ -162,25 +694,62 @@ def get_scoped_memory_manager() -> ScopedMemoryManager:
     
     This ensures all agents use the same memory manager instance,
     allowing proper conversation isolation and session management.
+    
+    With MEMORY_BACKEND=redis (and REDIS_URL set) all channels live in Redis,
+    so multiple workers or replicas can serve the same session. That backend
+    is opt-in: it has no transcript hydration or warm start (a session that
+    expires in Redis starts over), no persister or cold store, and its stats
+    are session counts only. By default channels are in-process; MEMORY_PERSISTENCE=postgres writes them behind
+    to the session_memory table so they survive restarts, and
+    MEMORY_COLD_STORE=disk|redis spills idle sessions out of process.
     """
     global _memory_manager
     if _memory_manager is None:
-        _memory_manager = ScopedMemoryManager()
+        summary_store = SummaryStore.from_env()
+        if os.getenv("MEMORY_BACKEND", "local").lower() == "redis":
+            if summary_store is None:
+                print("[MEMORY MANAGER] MEMORY_BACKEND=redis but REDIS_URL is not set, using in-process memory")
+            else:
+                from .redis_memory_manager import RedisScopedMemoryManager
+                _memory_manager = RedisScopedMemoryManager(summary_store.redis, summary_store=summary_store)
+                print("[MEMORY MANAGER] Initialized Redis-backed scoped memory manager")
+                return _memory_manager
+        persister = SessionMemoryPersister() if os.getenv("MEMORY_PERSISTENCE", "").lower() == "postgres" else None
+        _memory_manager = ScopedMemoryManager(
+            summary_store=summary_store,
+            persister=persister,
+            cold_store=cold_store_from_env()
+        )
         print("[MEMORY MANAGER] Initialized scoped memory manager")
     return _memory_manager
 
 
-def get_user_memory(session_id: str) -> ConversationBufferWindowMemory:
+def get_user_memory(session_id: str) -> TokenWindowMemory:
     """Convenience function to get user memory for a session"""
     return get_scoped_memory_manager().get_user_memory(session_id)
 
 
-def get_agent_memory(session_id: str, agent_type: str) -> ConversationBufferWindowMemory:
+def get_agent_memory(session_id: str, agent_type: str) -> TokenWindowMemory:
     """Convenience function to get agent memory for a session"""
     return get_scoped_memory_manager().get_agent_memory(session_id, agent_type)
 
 
-def get_dual_memory_for_agent(session_id: str, agent_type: str) -> tuple[ConversationBufferWindowMemory, ConversationBufferWindowMemory]:
+def pin_session(session_id: str):
+    """Convenience function to keep a session resident for the duration of a turn"""
+    return get_scoped_memory_manager().pin_session(session_id)
+
+
+def get_issue_record(session_id: str) -> dict:
+    """Convenience function to get the context agent's issue record for a session"""
+    return get_scoped_memory_manager().get_issue_record(session_id)
+
+
+def update_issue_record(session_id: str, record: dict) -> None:
+    """Convenience function to replace the context agent's issue record for a session"""
+    get_scoped_memory_manager().update_issue_record(session_id, record)
+
+
+def get_dual_memory_for_agent(session_id: str, agent_type: str) -> tuple[TokenWindowMemory, TokenWindowMemory]:
     """
     Get both user memory and agent-specific memory for dual memory access.
     
@@ -195,8 +764,4 @@ def get_dual_memory_for_agent(session_id: str, agent_type: str) -> tuple[Convers
     Returns:
         Tuple of (user_memory, agent_memory)
     """
-    manager = get_scoped_memory_manager()
-    user_memory = manager.get_user_memory(session_id)
-    agent_memory = manager.get_agent_memory(session_id, agent_type)
-    
-    return user_memory, agent_memory 
\ No newline at end of file
+    return get_scoped_memory_manager().get_dual_memory(session_id, agent_type) 
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Compact serialization for scoped memory channels
+
+Messages are stored as [role_tag, text] pairs rather than full LangChain
+message dicts, which keeps Redis lists, session_memory rows and spilled
+sessions small. A channel snapshot also carries the rolling summary and the
+evicted-message counter so a restored channel continues where it left off.
+"""
+
+from typing import Any, Dict, List
+
+from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+ROLE_TAGS = {"human": "h", "ai": "a", "system": "s"}
+TAG_CLASSES = {"h": HumanMessage, "a": AIMessage, "s": SystemMessage}
+
+# Bump when the snapshot layout changes
+SNAPSHOT_VERSION = 1
+
+
+def encode_message(message: BaseMessage) -> List[str]:
+    """Encode a message as a compact [role_tag, text] pair"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return [ROLE_TAGS.get(message.type, "s"), content]
+
+
+def decode_message(item: List[str]) -> BaseMessage:
+    """Decode a [role_tag, text] pair back into a LangChain message"""
+    tag, content = item
+    return TAG_CLASSES.get(tag, SystemMessage)(content=content)
+
+
+def dump_channel(memory) -> Dict[str, Any]:
+    """Snapshot a TokenWindowMemory channel: messages, summary and eviction counter"""
+    records = getattr(memory.chat_memory, "records", None)
+    if records is not None:
+        # Compact histories already hold [role_tag, text] pairs
+        messages = [[role, text] for role, text in records()]
+    else:
+        messages = [encode_message(message) for message in memory.chat_memory.messages]
+    return {
+        "m": messages,
+        "s": memory.summary,
+        "e": memory.evicted_count
+    }
+
+
+def load_channel(memory, snapshot: Dict[str, Any]) -> None:
+    """
+    Restore an in-process TokenWindowMemory channel from a dump_channel snapshot.
+    
+    The message list is assigned directly so history change hooks don't
+    report the restore as a new write.
+    """
+    memory.chat_memory.messages = [decode_message(item) for item in snapshot.get("m", [])]
+    memory.summary = snapshot.get("s", "")
+    memory.evicted_count = snapshot.get("e", 0)
@@ -0,0 +1,169 @@
+"""
+Write-behind persistence of scoped memory to the session_memory table
+
+In-process memory channels are lost on restart or deploy. The persister
+keeps them in Postgres without putting a database round trip on the request
+path:
+
+- Channels mark their session dirty when they change; nothing is written inline.
+- A background thread flushes every few hundred milliseconds, snapshotting
+  each dirty session once and upserting all of them in a single statement.
+- Sessions are hydrated lazily from session_memory on their first access
+  after a restart (see ScopedMemoryManager._hydrate_session).
+
+A session_memory row holds {"v": SNAPSHOT_VERSION, "channels": {channel:
+dump_channel(...)}, "issue_record": {...}}.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Set
+
+# How often dirty sessions are flushed (MEMORY_PERSIST_INTERVAL_MS)
+DEFAULT_FLUSH_INTERVAL_MS = 250
+
+# Upper bound on rows written by a single upsert statement
+MAX_BATCH_SIZE = 500
+
+
+class SessionMemoryPersister:
+    """
+    Batches session memory snapshots into session_memory upserts off the request path.
+
+    Args:
+        snapshot_session: Returns the current snapshot for a resident session, or None
+            (set by the ScopedMemoryManager the persister is attached to)
+        session_factory: Creates a SQLAlchemy session (defaults to models.SessionLocal)
+        flush_interval_ms: Delay between background flushes
+    """
+
+    def __init__(
+        self,
+        snapshot_session: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+        flush_interval_ms: Optional[float] = None
+    ):
+        self.snapshot_session = snapshot_session
+        self._session_factory = session_factory
+        self.flush_interval_ms = flush_interval_ms or float(
+            os.getenv("MEMORY_PERSIST_INTERVAL_MS", DEFAULT_FLUSH_INTERVAL_MS)
+        )
+
+        # Sessions changed since the last flush; snapshotted when the flush runs
+        self._dirty: Set[str] = set()
+        # Snapshots taken ahead of a flush (e.g. of a session being evicted)
+        self._staged: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes so an older batch never lands after a newer one
+        self._flush_lock = threading.Lock()
+
+        self.flushes = 0
+        self.rows_written = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _get_session_factory(self):
+        if self._session_factory is None:
+            from models import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    # ---------- request path ----------
+
+    def mark_dirty(self, session_id: str) -> None:
+        """Schedule a session to be written on the next flush"""
+        with self._lock:
+            self._dirty.add(session_id)
+
+    def stage(self, session_id: str, snapshot: Dict[str, Any]) -> None:
+        """Queue a ready-made snapshot, for sessions about to leave memory"""
+        with self._lock:
+            self._dirty.discard(session_id)
+            self._staged[session_id] = snapshot
+
+    def load(self, session_id: str) -> Dict[str, Any]:
+        """Load a session's snapshot, preferring one still waiting to be flushed"""
+        with self._lock:
+            staged = self._staged.get(session_id)
+        if staged is not None:
+            return staged
+
+        from database import get_session_memory
+        db = self._get_session_factory()()
+        try:
+            return get_session_memory(db, session_id)
+        finally:
+            db.close()
+
+    # ---------- background flush ----------
+
+    def flush(self) -> int:
+        """
+        Write every dirty or staged session in batched upserts.
+
+        Returns:
+            Number of session rows written
+        """
+        from database import upsert_session_memories
+
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                batch, self._staged = self._staged, {}
+
+            for session_id in dirty:
+                snapshot = self.snapshot_session(session_id)
+                if snapshot is not None:
+                    batch[session_id] = snapshot
+            if not batch:
+                return 0
+
+            items = list(batch.items())
+            db = self._get_session_factory()()
+            try:
+                for start in range(0, len(items), MAX_BATCH_SIZE):
+                    upsert_session_memories(db, dict(items[start:start + MAX_BATCH_SIZE]))
+            except Exception:
+                db.rollback()
+                # Requeue anything not superseded by a newer change, then let the caller log it
+                with self._lock:
+                    for session_id, snapshot in items:
+                        if session_id not in self._dirty:
+                            self._staged.setdefault(session_id, snapshot)
+                raise
+            finally:
+                db.close()
+
+            self.flushes += 1
+            self.rows_written += len(items)
+            return len(items)
+
+    def start(self) -> None:
+        """Start the background flush thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        interval_seconds = self.flush_interval_ms / 1000
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[MEMORY MANAGER] Failed to persist session memory: {e}")
+
+        self._thread = threading.Thread(target=run, name="memory-persister", daemon=True)
+        self._thread.start()
+        print(f"[MEMORY MANAGER] Started write-behind persister (every {self.flush_interval_ms:.0f}ms)")
+
+    def stop(self) -> None:
+        """Stop the flush thread and write whatever is still pending"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[MEMORY MANAGER] Failed to persist session memory on shutdown: {e}")
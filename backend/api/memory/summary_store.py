@@ -0,0 +1,113 @@
+"""
+Precomputed rolling summaries for scoped memory channels
+
+When a TokenWindowMemory evicts messages, the request path only queues them
+here (one pipelined Redis round trip). The worker's summarize job folds the
+queue into a compact running summary with an LLM once a channel crosses its
+threshold, and request-path loads read that precomputed summary instead of
+summarizing inline.
+
+Redis layout (per session/channel):
+- memory:evicted:{session_id}:{channel} - list of [seq, "Role: text"] entries awaiting summarization
+- memory:summary:{session_id}:{channel} - {"summary": str, "through_seq": int}
+- memory:summary:pending - set of "{session_id}|{channel}" members with queued entries
+"""
+
+import json
+from typing import List, Optional, Tuple
+
+from redis_client import get_redis
+
+PENDING_KEY = "memory:summary:pending"
+
+# Summaries and queues for idle sessions expire on their own
+KEY_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _evicted_key(session_id: str, channel: str) -> str:
+    return f"memory:evicted:{session_id}:{channel}"
+
+
+def _summary_key(session_id: str, channel: str) -> str:
+    return f"memory:summary:{session_id}:{channel}"
+
+
+class SummaryStore:
+    """Redis-backed queue of evicted messages and their precomputed summaries"""
+    
+    def __init__(self, redis):
+        self.redis = redis
+    
+    @classmethod
+    def from_env(cls) -> Optional["SummaryStore"]:
+        """Create a store on the shared Redis client, or None if Redis isn't configured"""
+        redis = get_redis()
+        return cls(redis) if redis is not None else None
+    
+    # ---------- request path ----------
+    
+    def queue_evicted(self, session_id: str, channel: str, entries: List[Tuple[int, str]]) -> None:
+        """Queue evicted (seq, line) entries for background summarization"""
+        if not entries:
+            return
+        key = _evicted_key(session_id, channel)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.rpush(key, *[json.dumps([seq, line]) for seq, line in entries])
+        pipe.expire(key, KEY_TTL_SECONDS)
+        pipe.sadd(PENDING_KEY, f"{session_id}|{channel}")
+        pipe.execute()
+    
+    def get_summary(self, session_id: str, channel: str) -> Tuple[str, int]:
+        """
+        Get the precomputed summary for a channel.
+        
+        Returns:
+            Tuple of (summary, through_seq) - through_seq is the last evicted
+            message sequence number the summary covers. ("", 0) if none yet.
+        """
+        raw = self.redis.get(_summary_key(session_id, channel))
+        if not raw:
+            return "", 0
+        data = json.loads(raw)
+        return data.get("summary", ""), int(data.get("through_seq", 0))
+    
+    # ---------- worker side ----------
+    
+    def pending_channels(self) -> List[Tuple[str, str]]:
+        """List (session_id, channel) pairs with queued evictions"""
+        members = self.redis.smembers(PENDING_KEY)
+        pairs = []
+        for member in members:
+            member = member.decode() if isinstance(member, bytes) else member
+            session_id, _, channel = member.rpartition("|")
+            pairs.append((session_id, channel))
+        return pairs
+    
+    def read_evicted(self, session_id: str, channel: str) -> List[Tuple[int, str]]:
+        """Read all queued (seq, line) entries for a channel, oldest first"""
+        return [tuple(json.loads(raw)) for raw in self.redis.lrange(_evicted_key(session_id, channel), 0, -1)]
+    
+    def discard_pending(self, session_id: str, channel: str) -> None:
+        """Unmark a channel whose queue turned out to be empty (e.g. expired)"""
+        self.redis.srem(PENDING_KEY, f"{session_id}|{channel}")
+    
+    def commit_summary(self, session_id: str, channel: str, summary: str, through_seq: int, consumed: int) -> None:
+        """
+        Store a new running summary and drop the entries it consumed.
+        
+        Entries queued while the worker was summarizing stay in the list and
+        the channel stays pending. If one lands between the length check and
+        SREM, the next eviction on that channel re-marks it as pending.
+        """
+        evicted_key = _evicted_key(session_id, channel)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(
+            _summary_key(session_id, channel),
+            json.dumps({"summary": summary, "through_seq": through_seq}),
+            ex=KEY_TTL_SECONDS
+        )
+        pipe.ltrim(evicted_key, consumed, -1)
+        pipe.llen(evicted_key)
+        remaining = pipe.execute()[-1]
+        if remaining == 0:
+            self.redis.srem(PENDING_KEY, f"{session_id}|{channel}")
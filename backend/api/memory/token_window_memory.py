@@ -0,0 +1,285 @@
+"""
+Token-aware conversation window memory
+
+ConversationBufferWindowMemory windows by number of exchanges regardless of
+their length, so a single tenant essay or a long agent answer inflates every
+later prompt. TokenWindowMemory keeps the exchange cap but also enforces a
+token budget per channel, counted with a local tokenizer. Messages evicted
+from the window are folded into a short rolling summary instead of being lost,
+which gives every memory channel a hard upper bound on prompt size.
+
+When a summary store is attached (see summary_store.py), evicted messages are
+also queued for the worker, which replaces the extractive summary with an
+LLM-written running summary off the request path.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain.memory import ConversationBufferWindowMemory
+from langchain.schema import BaseMessage, SystemMessage
+from langchain_core.messages import get_buffer_string
+from pydantic import Field, PrivateAttr
+
+# Lazily-loaded tokenizer - False means tiktoken (or its encoding files) is unavailable
+_encoding = None
+
+# Per-message cap on what an evicted message contributes to the rolling summary
+SUMMARY_LINE_TOKENS = 40
+
+# Per-message cap on what is queued for the background summarizer
+QUEUED_LINE_TOKENS = 500
+
+
+def _get_encoding():
+    """Lazy-load the gpt-4o tokenizer, falling back to a heuristic if unavailable"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            print(f"[MEMORY MANAGER] tiktoken unavailable, using heuristic token counts: {e}")
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text with the local tokenizer (~4 chars per token fallback)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to at most max_tokens tokens"""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens]) + "…"
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars] + "…"
+
+
+def message_text(message: BaseMessage) -> str:
+    """Plain-text content of a message (multi-part content is flattened)"""
+    content = message.content
+    return content if isinstance(content, str) else str(content)
+
+
+def _window_stats(chat_memory) -> List[Tuple[bool, int]]:
+    """(is_human, tokens) per stored message, from cached counts when the history keeps them"""
+    window_stats = getattr(chat_memory, "window_stats", None)
+    if window_stats is not None:
+        return window_stats()
+    return [(message.type == "human", count_tokens(message_text(message))) for message in chat_memory.messages]
+
+
+def _oldest(chat_memory, count: int) -> List[BaseMessage]:
+    """The oldest count messages, without materializing the rest where the history allows it"""
+    oldest = getattr(chat_memory, "oldest", None)
+    if oldest is not None:
+        return oldest(count)
+    return chat_memory.messages[:count]
+
+
+def _fit_to_budget(sizes: List[int], budget: int) -> List[int]:
+    """Split a token budget across messages, giving short ones their full size first"""
+    allowances = [0] * len(sizes)
+    remaining = budget
+    for n, i in enumerate(sorted(range(len(sizes)), key=sizes.__getitem__)):
+        allowances[i] = min(sizes[i], remaining // (len(sizes) - n))
+        remaining -= allowances[i]
+    return allowances
+
+
+class TokenWindowMemory(ConversationBufferWindowMemory):
+    """
+    Conversation window bounded by both exchange count (k) and a token budget.
+
+    - Messages outside the last k exchanges or beyond max_token_limit are
+      evicted from the underlying chat history on load/save. The window is
+      only cut where an exchange starts, so it never opens with an AI reply.
+    - Evicted messages are folded into `summary`, a rolling extractive summary
+      capped at summary_token_limit tokens. It is exposed as a separate
+      `history_summary` memory variable so chat_history keeps its strict
+      human/AI structure.
+    - If the newest exchange alone exceeds the budget, its messages are
+      truncated in the loaded window (the stored copy is kept intact).
+    - Appends and pruning are serialized by a per-memory lock, so concurrent
+      turns can't interleave an exchange or evict the same messages twice.
+    - Evicted messages are numbered (evicted_count). If on_evict is set, they
+      are handed to it as (seq, line) pairs; if summary_source is set, its
+      precomputed (summary, through_seq) is used in place of the extractive
+      lines it already covers.
+    """
+
+    max_token_limit: int = 2000
+    summary_token_limit: int = 300
+    summary: str = ""
+    summary_key: str = "history_summary"
+    evicted_count: int = 0
+    on_evict: Optional[Callable[[List[Tuple[int, str]]], None]] = Field(default=None, exclude=True)
+    summary_source: Optional[Callable[[], Tuple[str, int]]] = Field(default=None, exclude=True)
+    _lock: Any = PrivateAttr(default_factory=threading.RLock)
+
+    @property
+    def memory_variables(self) -> List[str]:
+        """Memory variables exposed to prompts"""
+        return [self.memory_key, self.summary_key]
+
+    def _summarize_evicted(self, evicted: List[BaseMessage]) -> None:
+        """Fold evicted messages into the rolling summary without an LLM call"""
+        prefixes = {"human": self.human_prefix, "ai": self.ai_prefix}
+        texts = [
+            (prefixes.get(msg.type, msg.type.capitalize()), " ".join(message_text(msg).split()))
+            for msg in evicted
+        ]
+        first_seq = self.evicted_count + 1
+        self.evicted_count += len(evicted)
+        
+        lines = [f"{role}: {truncate_to_tokens(text, SUMMARY_LINE_TOKENS)}" for role, text in texts]
+        summary_lines = (self.summary.splitlines() if self.summary else []) + lines
+
+        # Keep the most recent lines that fit the summary budget
+        kept: List[str] = []
+        total = 0
+        for line in reversed(summary_lines):
+            tokens = count_tokens(line)
+            if total + tokens > self.summary_token_limit:
+                break
+            kept.append(line)
+            total += tokens
+        self.summary = "\n".join(reversed(kept))
+        
+        # Notify after the summary is updated so listeners can persist it too
+        if self.on_evict is not None:
+            try:
+                self.on_evict([
+                    (first_seq + i, f"{role}: {truncate_to_tokens(text, QUEUED_LINE_TOKENS)}")
+                    for i, (role, text) in enumerate(texts)
+                ])
+            except Exception as e:
+                print(f"[MEMORY MANAGER] Failed to queue evicted messages for summarization: {e}")
+
+    def prune(self) -> None:
+        """Evict messages outside the exchange window or token budget into the summary"""
+        with self._lock:
+            self._prune()
+
+    def _prune(self) -> None:
+        stats = _window_stats(self.chat_memory)
+        if not stats:
+            return
+
+        # Walk back over whole exchanges; the newest one is kept even if it is over budget
+        start = max(0, len(stats) - self.k * 2) if self.k > 0 else len(stats)
+        total = 0
+        keep_from = len(stats)
+        for i in range(len(stats) - 1, start - 1, -1):
+            is_human, tokens = stats[i]
+            total += tokens
+            if not is_human:
+                continue
+            if total > self.max_token_limit and keep_from < len(stats):
+                break
+            keep_from = i
+
+        if keep_from == 0:
+            return
+
+        evicted = _oldest(self.chat_memory, keep_from)
+        # Histories that can drop a prefix in place (e.g. a Redis LTRIM) avoid a full rewrite
+        drop_oldest = getattr(self.chat_memory, "drop_oldest", None)
+        if drop_oldest is not None:
+            drop_oldest(keep_from)
+        else:
+            kept = self.chat_memory.messages[keep_from:]
+            self.chat_memory.clear()
+            self.chat_memory.add_messages(kept)
+        self._summarize_evicted(evicted)
+
+    def current_summary(self) -> str:
+        """
+        The summary to show in prompts.
+        
+        Prefers the precomputed running summary, followed by the extractive
+        lines for messages evicted after it was written. Falls back to the
+        extractive summary alone if there is no precomputed one or it can't be read.
+        """
+        if self.summary_source is None:
+            return self.summary
+        try:
+            precomputed, through_seq = self.summary_source()
+        except Exception as e:
+            print(f"[MEMORY MANAGER] Failed to read precomputed summary: {e}")
+            return self.summary
+        if not precomputed:
+            return self.summary
+        
+        unconsumed = max(0, self.evicted_count - through_seq)
+        tail = self.summary.splitlines()[-unconsumed:] if unconsumed and self.summary else []
+        budget = self.summary_token_limit - count_tokens(precomputed)
+        kept: List[str] = []
+        for line in reversed(tail):
+            budget -= count_tokens(line)
+            if budget < 0:
+                break
+            kept.append(line)
+        return "\n".join([precomputed] + list(reversed(kept)))
+
+    @property
+    def buffer_as_messages(self) -> List[BaseMessage]:
+        """The pruned window, with an oversized newest exchange truncated to the budget"""
+        with self._lock:
+            self._prune()
+            sizes = [tokens for _, tokens in _window_stats(self.chat_memory)]
+            messages = self.chat_memory.messages
+        if sum(sizes) <= self.max_token_limit:
+            return messages
+        # Leave a token per message for the truncation marker
+        allowances = _fit_to_budget(sizes, self.max_token_limit - len(sizes))
+        return [
+            message if allowance >= size else message.__class__(content=truncate_to_tokens(message_text(message), allowance))
+            for message, size, allowance in zip(messages, sizes, allowances)
+        ]
+
+    @property
+    def buffer_as_str(self) -> str:
+        """String form of the pruned window"""
+        return get_buffer_string(
+            self.buffer_as_messages,
+            human_prefix=self.human_prefix,
+            ai_prefix=self.ai_prefix,
+        )
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the token-bounded window plus the rolling summary of evicted content"""
+        buffer = self.buffer
+        summary_text = self.current_summary()
+        if self.return_messages:
+            summary = [SystemMessage(content=f"Summary of earlier conversation:\n{summary_text}")] if summary_text else []
+        else:
+            summary = summary_text
+        return {self.memory_key: buffer, self.summary_key: summary}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        """Save context and immediately enforce the window"""
+        with self._lock:
+            super().save_context(inputs, outputs)
+            self._prune()
+
+    def add_exchange(self, user_message: str, ai_message: str) -> None:
+        """Append a human/AI message pair as one step, keeping roles alternating under concurrency"""
+        self.save_context({"input": user_message}, {"output": ai_message})
+
+    def clear(self) -> None:
+        """Clear the window and the rolling summary"""
+        with self._lock:
+            super().clear()
+            self.summary = ""
@@ -0,0 +1,92 @@
+"""
+The persisted conversation as the source of the user-channel memory
+
+conversation_messages is the authoritative record of the tenant conversation:
+the API appends every turn to it, and the user ↔ main agent channel is a
+bounded window over it. When a session's user channel is not resident (a new
+pod, a TTL eviction, warm start disabled) and no richer snapshot exists, the
+manager hydrates it from the last messages of the transcript instead of
+starting the conversation over, so requests never need to read history
+themselves.
+"""
+
+import os
+from typing import Callable, List, Optional, Tuple
+
+from langchain.schema import AIMessage, BaseMessage, HumanMessage
+
+
+def drop_unanswered(history: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    History without a trailing unanswered tenant message.
+    
+    The API stores a tenant message on its own only when the agent run failed or was
+    cancelled, so the agent never answered it or added it to memory; a resident
+    channel wouldn't hold it either.
+    """
+    if history and history[-1][0] == "user":
+        return history[:-1]
+    return history
+
+
+def to_messages(history: List[Tuple[str, str]]) -> List[BaseMessage]:
+    """Convert conversation_messages (sender, message) rows to chat messages"""
+    return [
+        HumanMessage(content=text) if sender == "user" else AIMessage(content=text)
+        for sender, text in history
+    ]
+
+
+class ConversationTranscript:
+    """
+    Loads a session's recent user-channel messages from conversation_messages on demand.
+    
+    Args:
+        session_factory: Creates a SQLAlchemy session (defaults to models.SessionLocal)
+        per_session: Messages to load per session (defaults to the user window)
+    """
+    
+    def __init__(self, session_factory: Optional[Callable[[], object]] = None, per_session: Optional[int] = None):
+        from .scoped_memory_manager import CHANNEL_WINDOW_SIZES
+        
+        self._session_factory = session_factory
+        self.per_session = per_session or CHANNEL_WINDOW_SIZES['user'] * 2
+        self.loads = 0
+    
+    def _get_session_factory(self):
+        if self._session_factory is None:
+            from models import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+    
+    def load(self, session_id: str) -> Optional[List[BaseMessage]]:
+        """The session's recent messages in chronological order, or None if it has none"""
+        from database import get_recent_histories, restore_archived_session
+        db = self._get_session_factory()()
+        try:
+            history = get_recent_histories(db, [session_id], self.per_session).get(session_id)
+            if not history and restore_archived_session(db, session_id):
+                history = get_recent_histories(db, [session_id], self.per_session).get(session_id)
+        finally:
+            db.close()
+        history = drop_unanswered(history or [])
+        if not history:
+            return None
+        self.loads += 1
+        return to_messages(history)
+
+
+def attach_transcript(manager) -> Optional[ConversationTranscript]:
+    """
+    Hydrate an in-process manager's user channel from conversation_messages.
+    
+    Returns None when disabled (MEMORY_HYDRATE_FROM_TRANSCRIPT=false) or when
+    the manager keeps memory in Redis, which already survives restarts.
+    """
+    from .redis_memory_manager import RedisScopedMemoryManager
+    if isinstance(manager, RedisScopedMemoryManager):
+        return None
+    if os.getenv("MEMORY_HYDRATE_FROM_TRANSCRIPT", "true").lower() in ("0", "false", "no"):
+        return None
+    manager.transcript = ConversationTranscript()
+    return manager.transcript
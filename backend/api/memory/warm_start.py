@@ -0,0 +1,178 @@
+"""
+Warm start of user-channel memory from conversation_messages
+
+After a deploy the in-process ScopedMemoryManager is empty, so every
+in-progress conversation would otherwise restart from scratch. The warm
+start loader rebuilds the user ↔ main agent channel for sessions active in
+the last MEMORY_WARM_START_HOURS from the persisted conversation:
+
+- Startup never waits on it: the loader runs in a background thread.
+- It first lists the active sessions (one grouped query), then fetches the
+  last messages of all of them in one bulk query ranked per session in SQL.
+- A session that sends a message before the bulk load reaches it is loaded
+  on demand, ahead of the rest (see ScopedMemoryManager._hydrate_session).
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from langchain.schema import BaseMessage
+
+from .transcript import drop_unanswered, to_messages
+
+# Sessions with messages in this many hours are preloaded (MEMORY_WARM_START_HOURS, 0 disables)
+DEFAULT_WARM_START_HOURS = 24
+
+# Sessions are fetched from the bulk query in batches of this size
+WARM_START_BATCH_SIZE = 1000
+
+
+class WarmStartLoader:
+    """
+    Preloads user-channel memory for recently active sessions in the background.
+
+    Args:
+        manager: The ScopedMemoryManager to fill (the loader registers itself on it)
+        session_factory: Creates a SQLAlchemy session (defaults to models.SessionLocal)
+        hours: How far back a session counts as active
+        per_session: Messages to load per session (defaults to the user window)
+    """
+
+    def __init__(
+        self,
+        manager,
+        session_factory: Optional[Callable[[], object]] = None,
+        hours: Optional[float] = None,
+        per_session: Optional[int] = None
+    ):
+        from .scoped_memory_manager import CHANNEL_WINDOW_SIZES
+
+        self.manager = manager
+        self._session_factory = session_factory
+        self.hours = hours if hours is not None else float(
+            os.getenv("MEMORY_WARM_START_HOURS", DEFAULT_WARM_START_HOURS)
+        )
+        self.per_session = per_session or CHANNEL_WINDOW_SIZES['user'] * 2
+
+        # Sessions still waiting to be warmed; None until the active sessions are known
+        self._pending: Optional[Set[str]] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.warmed_sessions = 0
+        self.priority_loads = 0
+
+        manager.warm_loader = self
+
+    def _get_session_factory(self):
+        if self._session_factory is None:
+            from models import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def _fetch(self, session_ids: List[str]) -> Dict[str, List[Tuple[str, str]]]:
+        from database import get_recent_histories
+        db = self._get_session_factory()()
+        try:
+            return get_recent_histories(db, session_ids, self.per_session)
+        finally:
+            db.close()
+
+    def claim(self, session_id: str) -> Optional[List[BaseMessage]]:
+        """
+        Priority-load one session that is being accessed before the bulk load reached it.
+
+        Returns:
+            The session's recent messages, or None if there is nothing (left) to warm
+        """
+        if self._done.is_set():
+            return None
+        with self._lock:
+            if self._pending is not None:
+                if session_id not in self._pending:
+                    return None
+                self._pending.discard(session_id)
+        # Before the active sessions are known, any new session may be one of them
+        history = drop_unanswered(self._fetch([session_id]).get(session_id) or [])
+        if not history:
+            return None
+        self.priority_loads += 1
+        return to_messages(history)
+
+    def run(self) -> int:
+        """
+        Warm every recently active session that isn't resident yet.
+
+        Returns:
+            Number of sessions warmed
+        """
+        from database import get_recent_session_ids
+        try:
+            since = datetime.utcnow() - timedelta(hours=self.hours)
+            db = self._get_session_factory()()
+            try:
+                session_ids = get_recent_session_ids(db, since, self.manager.max_sessions)
+            finally:
+                db.close()
+            with self._lock:
+                self._pending = set(session_ids)
+
+            for start in range(0, len(session_ids), WARM_START_BATCH_SIZE):
+                with self._lock:
+                    batch = [s for s in session_ids[start:start + WARM_START_BATCH_SIZE] if s in self._pending]
+                for session_id, history in self._fetch(batch).items():
+                    with self._lock:
+                        if session_id not in self._pending:
+                            continue  # already priority-loaded
+                        self._pending.discard(session_id)
+                    history = drop_unanswered(history)
+                    if history and self.manager.warm_session(session_id, to_messages(history)):
+                        self.warmed_sessions += 1
+
+            print(f"[MEMORY MANAGER] Warm start loaded {self.warmed_sessions} sessions from the last {self.hours:g}h")
+            return self.warmed_sessions
+        finally:
+            self._done.set()
+
+    def start(self) -> None:
+        """Run the warm start in a background thread"""
+        if self._thread is not None:
+            return
+
+        def run():
+            try:
+                self.run()
+            except Exception as e:
+                print(f"[MEMORY MANAGER] Warm start failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="memory-warm-start", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the warm start has finished (for tests and tooling)"""
+        return self._done.wait(timeout)
+
+
+def start_warm_start(manager) -> Optional[WarmStartLoader]:
+    """
+    Start a background warm start for an in-process manager.
+
+    Returns None when disabled (MEMORY_WARM_START_HOURS=0) or when the manager
+    keeps memory in Redis, which already survives restarts.
+    """
+    from .redis_memory_manager import RedisScopedMemoryManager
+    if isinstance(manager, RedisScopedMemoryManager):
+        return None
+    loader = WarmStartLoader(manager)
+    if loader.hours <= 0:
+        manager.warm_loader = None
+        return None
+    loader.start()
+    return loader
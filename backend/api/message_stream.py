@@ -0,0 +1,220 @@
+"""
+Write-behind message log on a Redis Stream
+
+With MESSAGE_WRITE_MODE=stream the API doesn't write chat messages to
+Postgres on the request path. Each turn is appended to a Redis Stream in one
+pipelined round trip, and the worker's drain job bulk-inserts the stream
+into conversation_messages.
+
+- Delivery is at-least-once: entries are only acknowledged after their rows
+  are committed, and entries left unacknowledged by a crashed worker are
+  reclaimed after PENDING_CLAIM_IDLE_MS.
+- Writes are idempotent: message ids are generated on the API, and the
+  insert ignores ids that already exist, so redelivered entries are no-ops.
+- Reads stay consistent: until a row is drained it is also kept in a
+  per-session hash, which history reads merge with the database rows.
+- A bad row can't block the rest: entries that can't be decoded, or fail to
+  insert on MESSAGE_DRAIN_MAX_DELIVERIES deliveries, move to a dead-letter
+  stream for inspection.
+
+Redis layout:
+- chat:messages - stream of message rows (id, session_id, sender, message, timestamp)
+- chat:pending:{session_id} - hash of message id -> row JSON, for rows not yet in Postgres
+- chat:messages:dead - stream of dead-lettered entries (entry_id, row JSON, error)
+"""
+
+import json
+import os
+import socket
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from redis_client import get_redis
+
+STREAM_KEY = "chat:messages"
+DEAD_LETTER_KEY = "chat:messages:dead"
+CONSUMER_GROUP = "conversation-writer"
+
+# Unacknowledged entries idle this long are taken over by another consumer
+PENDING_CLAIM_IDLE_MS = 60_000
+
+# Pending rows for a session whose writes never drain (e.g. Redis kept, worker gone) expire eventually
+PENDING_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _pending_key(session_id: str) -> str:
+    return f"chat:pending:{session_id}"
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def stream_mode_enabled() -> bool:
+    """Whether chat messages are written behind through the stream (MESSAGE_WRITE_MODE=stream)"""
+    return os.getenv("MESSAGE_WRITE_MODE", "direct").lower() == "stream"
+
+
+_stream = None
+
+
+def get_message_stream() -> Optional["MessageStream"]:
+    """
+    Lazy-load the request-path stream.
+    
+    Returns None (write directly to Postgres) unless MESSAGE_WRITE_MODE=stream
+    and Redis is configured.
+    """
+    global _stream
+    if _stream is None and stream_mode_enabled():
+        _stream = MessageStream.from_env()
+        if _stream is None:
+            print("[MESSAGE STREAM] MESSAGE_WRITE_MODE=stream but REDIS_URL is not set, writing messages directly")
+    return _stream
+
+
+class MessageStream:
+    """Redis Stream of chat message rows awaiting insertion into conversation_messages"""
+
+    def __init__(self, redis, consumer: Optional[str] = None):
+        self.redis = redis
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+
+    @classmethod
+    def from_env(cls) -> Optional["MessageStream"]:
+        """Create a stream on the shared Redis client, or None if Redis isn't configured"""
+        redis = get_redis()
+        return cls(redis) if redis is not None else None
+
+    # ---------- request path ----------
+
+    def append(self, rows: List[dict]) -> None:
+        """Append message rows (with ids and timestamps already set) in one round trip"""
+        if not rows:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for row in rows:
+            fields = {**row, "timestamp": row["timestamp"].isoformat()}
+            pipe.xadd(STREAM_KEY, fields)
+            pipe.hset(_pending_key(row["session_id"]), row["id"], json.dumps(fields))
+        for session_id in {row["session_id"] for row in rows}:
+            pipe.expire(_pending_key(session_id), PENDING_TTL_SECONDS)
+        pipe.execute()
+
+    def pending_rows(self, session_id: str) -> List[dict]:
+        """A session's rows that may not be in Postgres yet"""
+        rows = []
+        for raw in self.redis.hvals(_pending_key(session_id)):
+            row = json.loads(raw)
+            row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+            rows.append(row)
+        return rows
+
+    # ---------- worker side ----------
+
+    def ensure_group(self) -> None:
+        """Create the consumer group (and the stream) if they don't exist yet"""
+        if self._group_ready:
+            return
+        try:
+            self.redis.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def read_batch(self, count: int) -> List[Tuple[str, dict]]:
+        """
+        Read up to count entries for this consumer: stale entries of dead
+        consumers first, then new ones.
+
+        Returns:
+            List of (entry_id, row) pairs
+        """
+        self.ensure_group()
+        _, claimed, *_ = self.redis.xautoclaim(
+            STREAM_KEY, CONSUMER_GROUP, self.consumer, PENDING_CLAIM_IDLE_MS, "0-0", count=count
+        )
+        entries = [entry for entry in claimed if entry[1]]
+        if len(entries) < count:
+            response = self.redis.xreadgroup(CONSUMER_GROUP, self.consumer, {STREAM_KEY: ">"}, count=count - len(entries))
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+
+        batch, malformed = [], []
+        for entry_id, fields in entries:
+            row = {_decode(key): _decode(value) for key, value in fields.items()}
+            try:
+                row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+            except (KeyError, TypeError, ValueError) as e:
+                malformed.append(((_decode(entry_id), row), f"undecodable entry: {e!r}"))
+                continue
+            batch.append((_decode(entry_id), row))
+        # Retrying can't fix these
+        self.dead_letter(malformed)
+        return batch
+
+    def ack(self, batch: List[Tuple[str, dict]]) -> None:
+        """Acknowledge committed entries and drop their rows from the pending hashes"""
+        if not batch:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        entry_ids = [entry_id for entry_id, _ in batch]
+        pipe.xack(STREAM_KEY, CONSUMER_GROUP, *entry_ids)
+        pipe.xdel(STREAM_KEY, *entry_ids)
+        by_session: Dict[str, List[str]] = {}
+        for _, row in batch:
+            by_session.setdefault(row["session_id"], []).append(row["id"])
+        for session_id, message_ids in by_session.items():
+            pipe.hdel(_pending_key(session_id), *message_ids)
+        pipe.execute()
+
+    def delivery_counts(self, entry_ids: List[str]) -> Dict[str, int]:
+        """How many times each pending entry has been delivered to a consumer"""
+        if not entry_ids:
+            return {}
+        pipe = self.redis.pipeline(transaction=False)
+        for entry_id in entry_ids:
+            pipe.xpending_range(STREAM_KEY, CONSUMER_GROUP, min=entry_id, max=entry_id, count=1)
+        counts = {}
+        for entry_id, pending in zip(entry_ids, pipe.execute()):
+            counts[entry_id] = pending[0]["times_delivered"] if pending else 0
+        return counts
+
+    def dead_letter(self, failures: List[Tuple[Tuple[str, dict], str]]) -> None:
+        """
+        Move entries that can't be inserted to the dead-letter stream.
+
+        Args:
+            failures: ((entry_id, row), error) pairs
+        """
+        if not failures:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for (entry_id, row), error in failures:
+            print(f"[MESSAGE STREAM] Dead-lettering entry {entry_id} (message {row.get('id')}): {error}")
+            pipe.xadd(DEAD_LETTER_KEY, {"entry_id": entry_id, "row": json.dumps(row, default=str), "error": error})
+            pipe.xack(STREAM_KEY, CONSUMER_GROUP, entry_id)
+            pipe.xdel(STREAM_KEY, entry_id)
+            if row.get("session_id") and row.get("id"):
+                pipe.hdel(_pending_key(row["session_id"]), row["id"])
+        pipe.execute()
+
+    def backlog(self) -> int:
+        """Entries in the stream not yet acknowledged"""
+        return self.redis.xlen(STREAM_KEY)
+
+
+def merge_pending(rows: List[dict], pending: List[dict]) -> List[dict]:
+    """
+    Merge database rows with a session's pending stream rows, in chronological order.
+
+    Pending rows that have already been drained into the database are skipped by id.
+    """
+    if not pending:
+        return rows
+    stored_ids = {row["id"] for row in rows}
+    merged = rows + [row for row in pending if row["id"] not in stored_ids]
+    merged.sort(key=lambda row: (row["timestamp"], row["id"]))
+    return merged
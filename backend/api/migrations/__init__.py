@@ -0,0 +1,32 @@
+"""
+Database migrations (Alembic)
+
+The schema is owned by the revisions in migrations/versions rather than
+Base.metadata.create_all, so indexes and column changes reach existing
+databases. upgrade_database() applies every pending revision.
+"""
+
+import os
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def alembic_config(url: str = None, connection=None):
+    """Alembic config for this package, optionally bound to a URL or an open connection"""
+    from alembic.config import Config
+
+    config = Config(os.path.join(API_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(API_DIR, "migrations"))
+    if url:
+        config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+        config.attributes["configure_logger"] = False
+    return config
+
+
+def upgrade_database(url: str = None, connection=None, revision: str = "head") -> None:
+    """Apply pending migrations (defaults to DATABASE_URL)"""
+    from alembic import command
+
+    command.upgrade(alembic_config(url, connection), revision)
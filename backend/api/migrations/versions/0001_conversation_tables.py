@@ -0,0 +1,46 @@
+"""Create the conversation_messages and session_memory tables
+
+Baseline revision. Databases created by the old Base.metadata.create_all
+already have these tables, so each one is only created when missing and an
+existing database can simply be upgraded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Offline (--sql) runs can't inspect, and emit the full schema
+    existing = set() if op.get_context().as_sql else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "conversation_messages" not in existing:
+        op.create_table(
+            "conversation_messages",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("session_id", sa.String()),
+            sa.Column("sender", sa.String()),
+            sa.Column("message", sa.Text()),
+            sa.Column("timestamp", sa.DateTime()),
+        )
+        op.create_index("ix_conversation_messages_session_id", "conversation_messages", ["session_id"])
+
+    if "session_memory" not in existing:
+        op.create_table(
+            "session_memory",
+            sa.Column("session_id", sa.String(), primary_key=True),
+            sa.Column("memory_json", sa.Text()),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("session_memory")
+    op.drop_table("conversation_messages")
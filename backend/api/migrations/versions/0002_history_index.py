@@ -0,0 +1,54 @@
+"""Index conversation_messages by (session_id, timestamp DESC)
+
+get_chat_history and the memory hydration queries filter on session_id and
+read the newest rows first. With only a session_id index, busy sessions need
+a sort of their whole history on every read; the composite index serves the
+LIMIT straight from the index. It also covers session_id lookups, so the old
+single-column index is dropped.
+
+On Postgres the index is built CONCURRENTLY so writes aren't blocked.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_conversation_messages_session_id_timestamp"
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX_NAME,
+            "conversation_messages",
+            ["session_id", sa.text("timestamp DESC")],
+            if_not_exists=True,
+            postgresql_concurrently=postgres,
+        )
+        op.drop_index(
+            "ix_conversation_messages_session_id",
+            table_name="conversation_messages",
+            if_exists=True,
+            postgresql_concurrently=postgres,
+        )
+
+
+def downgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_conversation_messages_session_id",
+            "conversation_messages",
+            ["session_id"],
+            postgresql_concurrently=postgres,
+        )
+        op.drop_index(INDEX_NAME, table_name="conversation_messages", postgresql_concurrently=postgres)
@@ -0,0 +1,114 @@
+"""Partition conversation_messages by month and key it on (id, timestamp)
+
+Rebuilds conversation_messages as a table range-partitioned on timestamp,
+one partition per month (see partitions.py). Postgres requires the partition
+key in the primary key, so it becomes (id, timestamp). Existing rows are
+copied into partitions created for every month they span, plus the months
+ahead. The copy holds an exclusive lock on the old table, so run it in a
+quiet period on large databases.
+
+SQLite databases (dev and tests) aren't partitioned; the table is rebuilt
+in batch mode with the same (id, timestamp) key and a NOT NULL timestamp,
+matching the model.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from partitions import DEFAULT_MONTHS_AHEAD, add_months, create_partition_sql, month_start, months_between
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+HISTORY_INDEX = "ix_conversation_messages_session_id_timestamp"
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def _sqlite_table(composite_key: bool) -> sa.Table:
+    """conversation_messages as it is after (composite_key) or before this revision on SQLite"""
+    table = sa.Table(
+        "conversation_messages",
+        sa.MetaData(),
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("session_id", sa.String()),
+        sa.Column("sender", sa.String()),
+        sa.Column("message", sa.Text()),
+        sa.Column("timestamp", sa.DateTime(), primary_key=composite_key, nullable=not composite_key),
+    )
+    sa.Index(HISTORY_INDEX, table.c.session_id, table.c.timestamp.desc())
+    return table
+
+
+def _rebuild_sqlite(composite_key: bool) -> None:
+    # Batch mode recreates the table from copy_from and copies the rows across;
+    # passing the target schema keeps the index's DESC order, which reflection loses
+    with op.batch_alter_table("conversation_messages", recreate="always", copy_from=_sqlite_table(composite_key)):
+        pass
+
+
+def upgrade() -> None:
+    if not _is_postgres():
+        op.execute("UPDATE conversation_messages SET timestamp = CURRENT_TIMESTAMP WHERE timestamp IS NULL")
+        _rebuild_sqlite(composite_key=True)
+        return
+
+    op.execute("ALTER TABLE conversation_messages RENAME TO conversation_messages_unpartitioned")
+    op.execute("ALTER TABLE conversation_messages_unpartitioned RENAME CONSTRAINT conversation_messages_pkey TO conversation_messages_unpartitioned_pkey")
+    op.execute(f"DROP INDEX IF EXISTS {HISTORY_INDEX}")
+
+    op.execute(
+        "CREATE TABLE conversation_messages ("
+        "id VARCHAR NOT NULL, "
+        "session_id VARCHAR, "
+        "sender VARCHAR, "
+        "message TEXT, "
+        "timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'), "
+        "CONSTRAINT conversation_messages_pkey PRIMARY KEY (id, timestamp)"
+        ") PARTITION BY RANGE (timestamp)"
+    )
+    op.execute(f"CREATE INDEX {HISTORY_INDEX} ON conversation_messages (session_id, timestamp DESC)")
+
+    # A partition for every month with data, through the months kept ahead
+    now = datetime.utcnow()
+    first = now
+    if not op.get_context().as_sql:
+        oldest = op.get_bind().execute(sa.text("SELECT min(timestamp) FROM conversation_messages_unpartitioned")).scalar()
+        first = min(oldest, now) if oldest else now
+    for month in months_between(month_start(first), add_months(month_start(now), DEFAULT_MONTHS_AHEAD)):
+        op.execute(create_partition_sql(month))
+
+    # Rows written without a timestamp predate the column default; file them under the copy time
+    op.execute(
+        "INSERT INTO conversation_messages (id, session_id, sender, message, timestamp) "
+        "SELECT id, session_id, sender, message, COALESCE(timestamp, now() AT TIME ZONE 'utc') "
+        "FROM conversation_messages_unpartitioned"
+    )
+    op.execute("DROP TABLE conversation_messages_unpartitioned")
+
+
+def downgrade() -> None:
+    if not _is_postgres():
+        _rebuild_sqlite(composite_key=False)
+        return
+
+    op.execute("ALTER TABLE conversation_messages RENAME TO conversation_messages_partitioned")
+    op.execute("ALTER TABLE conversation_messages_partitioned RENAME CONSTRAINT conversation_messages_pkey TO conversation_messages_partitioned_pkey")
+    op.execute(f"DROP INDEX IF EXISTS {HISTORY_INDEX}")
+    op.execute(
+        "CREATE TABLE conversation_messages ("
+        "id VARCHAR NOT NULL PRIMARY KEY, session_id VARCHAR, sender VARCHAR, message TEXT, timestamp TIMESTAMP WITHOUT TIME ZONE)"
+    )
+    op.execute("INSERT INTO conversation_messages SELECT id, session_id, sender, message, timestamp FROM conversation_messages_partitioned")
+    op.execute(f"CREATE INDEX {HISTORY_INDEX} ON conversation_messages (session_id, timestamp DESC)")
+    op.execute("DROP TABLE conversation_messages_partitioned CASCADE")
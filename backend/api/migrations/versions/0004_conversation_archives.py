@@ -0,0 +1,33 @@
+"""Add conversation_archives for idle sessions moved out of conversation_messages
+
+One row per archived session, holding its messages as zstd-compressed JSON
+(see archive.py).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "conversation_archives",
+        sa.Column("session_id", sa.String(), primary_key=True),
+        sa.Column("messages", sa.LargeBinary(), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.Column("first_message_at", sa.DateTime()),
+        sa.Column("last_message_at", sa.DateTime()),
+        sa.Column("archived_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("conversation_archives")
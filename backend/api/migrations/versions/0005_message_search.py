@@ -0,0 +1,42 @@
+"""Add a full-text search vector and GIN index to conversation_messages
+
+message_tsv is a stored generated column (english text search
+configuration), so Postgres keeps it in sync on every insert and search.py
+never computes to_tsvector at query time. On the partitioned table both the
+column and the index cascade to every partition, including ones created
+later.
+
+Adding a stored generated column rewrites the table under an exclusive
+lock, so run this in a quiet period on large databases. SQLite databases
+have no tsvector; search falls back to LIKE there.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+SEARCH_INDEX = "ix_conversation_messages_message_tsv"
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    op.execute(
+        "ALTER TABLE conversation_messages ADD COLUMN message_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(message, ''))) STORED"
+    )
+    op.execute(f"CREATE INDEX {SEARCH_INDEX} ON conversation_messages USING gin (message_tsv)")
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    op.execute(f"DROP INDEX IF EXISTS {SEARCH_INDEX}")
+    op.execute("ALTER TABLE conversation_messages DROP COLUMN message_tsv")
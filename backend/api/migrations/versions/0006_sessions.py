@@ -0,0 +1,57 @@
+"""Add the sessions table of per-conversation metadata for list views
+
+Message writes keep one row per session up to date (see database.py), so
+listing conversations by last activity or urgency reads a page of the
+sessions indexes instead of aggregating conversation_messages.
+
+Existing sessions are backfilled with one GROUP BY over conversation_messages
+plus the archived sessions. Urgency and summary start empty and fill in as
+conversations continue.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sessions",
+        sa.Column("session_id", sa.String(), primary_key=True),
+        sa.Column("status", sa.String(), nullable=False, server_default="open"),
+        sa.Column("message_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("first_message_at", sa.DateTime()),
+        sa.Column("last_message_at", sa.DateTime(), nullable=False),
+        sa.Column("urgency", sa.String()),
+        sa.Column("urgency_rank", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("query_summary", sa.Text()),
+    )
+
+    op.execute(
+        "INSERT INTO sessions (session_id, status, message_count, first_message_at, last_message_at) "
+        "SELECT session_id, 'open', count(*), min(timestamp), coalesce(max(timestamp), CURRENT_TIMESTAMP) "
+        "FROM conversation_messages WHERE session_id IS NOT NULL GROUP BY session_id"
+    )
+    op.execute(
+        "INSERT INTO sessions (session_id, status, message_count, first_message_at, last_message_at) "
+        "SELECT session_id, 'archived', message_count, first_message_at, coalesce(last_message_at, archived_at, CURRENT_TIMESTAMP) "
+        "FROM conversation_archives WHERE session_id NOT IN (SELECT session_id FROM sessions)"
+    )
+
+    # Built after the backfill; list pages within a status are range scans of these
+    op.create_index("ix_sessions_status_recent", "sessions",
+                    ["status", sa.text("last_message_at DESC"), sa.text("session_id DESC")])
+    op.create_index("ix_sessions_status_urgent", "sessions",
+                    ["status", sa.text("urgency_rank DESC"), sa.text("last_message_at DESC"), sa.text("session_id DESC")])
+
+
+def downgrade() -> None:
+    op.drop_table("sessions")
@@ -0,0 +1,37 @@
+"""Track archiving in sessions.archived_at instead of the status
+
+Archiving used to set a session's status to 'archived' and restoring set it
+back to 'open', so a resolved session came back open. The status now only
+changes with the operator or a new tenant message, and archived_at records
+whether the messages are in conversation_archives.
+
+Sessions backfilled as 'archived' by 0006 had no earlier status to keep;
+they become 'open'.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("sessions", sa.Column("archived_at", sa.DateTime()))
+    op.execute(
+        "UPDATE sessions SET archived_at = "
+        "(SELECT a.archived_at FROM conversation_archives a WHERE a.session_id = sessions.session_id) "
+        "WHERE session_id IN (SELECT session_id FROM conversation_archives)"
+    )
+    op.execute("UPDATE sessions SET status = 'open' WHERE status = 'archived'")
+
+
+def downgrade() -> None:
+    op.execute("UPDATE sessions SET status = 'archived' WHERE archived_at IS NOT NULL")
+    op.drop_column("sessions", "archived_at")
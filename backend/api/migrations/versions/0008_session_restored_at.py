@@ -0,0 +1,26 @@
+"""Record when a session was last restored from the archive
+
+A history read restores an archived session into conversation_messages. The
+archive job treats sessions.restored_at as activity, so a restored session
+isn't archived again on the next run and restored again on the next read.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("sessions", sa.Column("restored_at", sa.DateTime()))
+
+
+def downgrade() -> None:
+    op.drop_column("sessions", "restored_at")
@@ -0,0 +1,154 @@
+"""
+Monthly range partitions of conversation_messages (Postgres)
+
+conversation_messages is partitioned by RANGE (timestamp), one partition
+per calendar month, named conversation_messages_yYYYYmMM. New rows always
+land in the current month's partition, and an old month can be detached
+with DETACH PARTITION ... CONCURRENTLY. That only takes a brief lock on
+the parent, so it can be archived or dropped without blocking chat writes.
+
+Partitions must exist before rows arrive (there is deliberately no DEFAULT
+partition: it would make creating later months scan it). The worker's
+maintain_partitions job keeps PARTITION_MONTHS_AHEAD months created ahead,
+and tools/system/manage_partitions.py manages them by hand. Restoring an
+archived session (see archive.py) recreates the partitions of the months it
+spans, in case they were dropped since.
+
+Nothing here applies to SQLite dev/test databases, which aren't partitioned.
+"""
+
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+PARENT_TABLE = "conversation_messages"
+
+# Months created ahead of the current one (PARTITION_MONTHS_AHEAD)
+DEFAULT_MONTHS_AHEAD = 3
+
+_NAME_PATTERN = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_start(value) -> date:
+    """First day of the month containing a date or datetime"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def parse_month(value: str) -> date:
+    """Parse a YYYY-MM month"""
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """The month of a partition table name, or None if it isn't one"""
+    match = _NAME_PATTERN.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def create_partition_sql(month: date) -> str:
+    """DDL creating the partition for one month (a no-op if it exists)"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def months_between(first: date, last: date) -> List[date]:
+    """Every month from first to last, inclusive"""
+    months, month = [], month_start(first)
+    while month <= month_start(last):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def is_partitioned(connection) -> bool:
+    """Whether conversation_messages is a partitioned table (Postgres only)"""
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :name"
+    ), {"name": PARENT_TABLE}).scalar())
+
+
+def list_partitions(connection) -> List[Tuple[str, str]]:
+    """
+    Attached partitions, oldest first.
+
+    Returns:
+        List of (name, bound expression) pairs
+    """
+    rows = connection.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :name ORDER BY c.relname"
+    ), {"name": PARENT_TABLE}).all()
+    return [(name, bound) for name, bound in rows]
+
+
+def ensure_months(connection, months: List[date]) -> List[str]:
+    """
+    Create any missing partitions for the given months, past ones included.
+
+    A month that was detached but not yet dropped keeps its table name, so it
+    must be dropped (or re-attached) before its partition can be recreated.
+
+    Returns:
+        Names of the partitions created
+    """
+    if not months or not is_partitioned(connection):
+        return []
+    existing = {name for name, _ in list_partitions(connection)}
+    created = []
+    for month in sorted({month_start(month) for month in months}):
+        if partition_name(month) not in existing:
+            connection.execute(text(create_partition_sql(month)))
+            created.append(partition_name(month))
+    return created
+
+
+def ensure_partitions(connection, through: Optional[date] = None, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Create any missing partitions from the current month through months_ahead.
+
+    Returns:
+        Names of the partitions created
+    """
+    if months_ahead is None:
+        months_ahead = int(os.getenv("PARTITION_MONTHS_AHEAD", DEFAULT_MONTHS_AHEAD))
+    current = month_start(datetime.utcnow())
+    through = month_start(through) if through else add_months(current, months_ahead)
+    return ensure_months(connection, months_between(current, through))
+
+
+def detach_partition(engine, month: date, concurrently: bool = True) -> str:
+    """
+    Detach a month's partition from conversation_messages, leaving it as a plain table.
+
+    CONCURRENTLY (Postgres 14+) only takes a SHARE UPDATE EXCLUSIVE lock on the
+    parent, so chat reads and writes continue; it can't run in a transaction,
+    so this uses its own autocommit connection.
+
+    Returns:
+        The detached table's name
+    """
+    name = partition_name(month)
+    if month_start(datetime.utcnow()) <= month:
+        raise ValueError(f"Refusing to detach {name}: it is the current or a future month")
+    with engine.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        mode = " CONCURRENTLY" if concurrently else ""
+        connection.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}{mode}"))
+    return name
@@ -0,0 +1,26 @@
+import os
+import redis
+
+# Redis is optional - features that use it are disabled unless REDIS_URL is set
+_redis = None
+
+def get_redis():
+    """
+    Lazy-load the shared Redis client.
+    
+    Returns None when REDIS_URL is not configured, so callers can fall back
+    to their in-process behaviour.
+    """
+    global _redis
+    if _redis is None:
+        redis_url = os.getenv("REDIS_URL")
+        if not redis_url:
+            return None
+        _redis = redis.Redis.from_url(
+            redis_url,
+            socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5")),
+            socket_connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5")),
+            health_check_interval=30
+        )
+        print(f"[REDIS] Initialized client for {redis_url}")
+    return _redis
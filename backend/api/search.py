@@ -0,0 +1,167 @@
+"""
+Full-text search over conversation_messages
+
+On Postgres, migration 0005 adds message_tsv, a stored generated tsvector
+of each message (english configuration), with a GIN index. Searches match
+it with websearch_to_tsquery, so operators can type what they would type
+into a search box:
+
+    mould                   - any form of the word (mould, mouldy, moulds)
+    "12 elm street"         - the exact phrase
+    mould -bathroom         - mould, but not bathroom
+    damp or mould           - either word
+
+Only the top matches get a ts_headline highlight, since generating
+headlines means re-parsing the message text.
+
+SQLite dev/test databases have no tsvector. They fall back to a
+case-insensitive LIKE per search term (every term must appear, -term must
+not), ranked by how often the terms occur.
+
+Archived sessions (see archive.py) are not searched.
+
+Highlights are HTML-escaped message text with matches wrapped in
+<mark></mark>, safe to insert as HTML.
+"""
+
+import html
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+
+from models import ConversationMessage
+
+# Matches are marked with control characters (stripped from the message text first),
+# which survive HTML escaping and are then swapped for <mark></mark>
+START_SEL, STOP_SEL = "\x02", "\x03"
+
+# ts_headline options: up to two short fragments around the matches
+HEADLINE_OPTIONS = (f"StartSel=\"{START_SEL}\", StopSel=\"{STOP_SEL}\", MaxFragments=2, MaxWords=20, MinWords=8, "
+                    "FragmentDelimiter=\" … \"")
+
+# Must match the configuration of the generated column (migration 0005)
+TS_CONFIG = "english"
+
+_PG_SEARCH = """
+SELECT hits.id, hits.session_id, hits.sender, hits.timestamp, hits.rank,
+       ts_headline('{config}', translate(hits.message, chr(2) || chr(3), ''), hits.q, :headline_options) AS highlight
+FROM (
+    SELECT m.id, m.session_id, m.sender, m.message, m.timestamp, q, ts_rank_cd(m.message_tsv, q) AS rank
+    FROM conversation_messages m, websearch_to_tsquery('{config}', :query) AS q
+    WHERE m.message_tsv @@ q{filters}
+    ORDER BY rank DESC, m.timestamp DESC
+    LIMIT :limit
+) AS hits
+ORDER BY hits.rank DESC, hits.timestamp DESC
+"""
+
+
+def _pg_statement(session_id: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    filters = ""
+    if session_id is not None:
+        filters += " AND m.session_id = :session_id"
+    if start is not None:
+        filters += " AND m.timestamp >= :start"
+    if end is not None:
+        filters += " AND m.timestamp < :end"
+    return text(_PG_SEARCH.format(config=TS_CONFIG, filters=filters))
+
+
+def search_terms(query: str) -> Tuple[List[str], List[str]]:
+    """
+    Words and quoted phrases of a query, for the LIKE fallback.
+
+    Returns:
+        (required terms, excluded -terms)
+    """
+    required, excluded = [], []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', query):
+        if phrase:
+            required.append(phrase)
+        elif word.startswith("-") and len(word) > 1:
+            excluded.append(word[1:])
+        elif word.lower() != "or" and word.strip("-"):
+            required.append(word)
+    return required, excluded
+
+
+def _like_statement(query: str, session_id, start, end, limit: int):
+    terms, excluded = search_terms(query)
+    message = func.lower(ConversationMessage.message)
+    statement = select(ConversationMessage)
+    for term in terms:
+        statement = statement.where(message.contains(term.lower(), autoescape=True))
+    for term in excluded:
+        statement = statement.where(~message.contains(term.lower(), autoescape=True))
+    if session_id is not None:
+        statement = statement.where(ConversationMessage.session_id == session_id)
+    if start is not None:
+        statement = statement.where(ConversationMessage.timestamp >= start)
+    if end is not None:
+        statement = statement.where(ConversationMessage.timestamp < end)
+    # Ranking happens in Python; cap the candidates so a common word can't load the whole table
+    return statement.order_by(ConversationMessage.timestamp.desc()).limit(limit * 10), terms
+
+
+def _strip_sentinels(text: str) -> str:
+    return text.replace(START_SEL, "").replace(STOP_SEL, "")
+
+
+def _mark(highlight: str) -> str:
+    """HTML-escape a highlight, then turn its sentinels into <mark></mark>"""
+    return html.escape(highlight).replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>")
+
+
+def _like_results(messages, terms: List[str], limit: int) -> List[dict]:
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE) if terms else None
+    results = []
+    for message in messages:
+        body = _strip_sentinels(message.message or "")
+        rank = len(pattern.findall(body)) if pattern else 0
+        highlight = _mark(pattern.sub(lambda match: f"{START_SEL}{match.group(0)}{STOP_SEL}", body) if pattern else body)
+        results.append({"id": message.id, "session_id": message.session_id, "sender": message.sender,
+                        "timestamp": message.timestamp, "rank": float(rank), "highlight": highlight})
+    results.sort(key=lambda result: (result["rank"], result["timestamp"]), reverse=True)
+    return results[:limit]
+
+
+def _params(query: str, session_id, start, end, limit: int) -> dict:
+    return {"query": query, "session_id": session_id, "start": start, "end": end, "limit": limit,
+            "headline_options": HEADLINE_OPTIONS}
+
+
+def _pg_results(rows) -> List[dict]:
+    return [{**row._mapping, "rank": float(row.rank), "highlight": _mark(row.highlight or "")} for row in rows]
+
+
+def search_messages(db, query: str, session_id: Optional[str] = None, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None, limit: int = 20) -> List[dict]:
+    """
+    Messages matching a search query, best match first.
+
+    Args:
+        db: SQLAlchemy session
+        query: Search box syntax (see module docstring)
+        session_id: Only search this session
+        start, end: Only messages with start <= timestamp < end
+
+    Returns:
+        List of {id, session_id, sender, timestamp, rank, highlight}
+    """
+    if db.bind.dialect.name == "postgresql":
+        rows = db.execute(_pg_statement(session_id, start, end), _params(query, session_id, start, end, limit))
+        return _pg_results(rows)
+    statement, terms = _like_statement(query, session_id, start, end, limit)
+    return _like_results(db.execute(statement).scalars().all(), terms, limit)
+
+
+async def asearch_messages(db, query: str, session_id: Optional[str] = None, start: Optional[datetime] = None,
+                           end: Optional[datetime] = None, limit: int = 20) -> List[dict]:
+    """Async version of search_messages for an AsyncSession"""
+    if db.bind.dialect.name == "postgresql":
+        rows = await db.execute(_pg_statement(session_id, start, end), _params(query, session_id, start, end, limit))
+        return _pg_results(rows)
+    statement, terms = _like_statement(query, session_id, start, end, limit)
+    return _like_results((await db.execute(statement)).scalars().all(), terms, limit)
@@ -0,0 +1,16 @@
+"""
+Shared pytest configuration
+
+The API modules import each other by their top-level names (database,
+models, memory.*, agents.*), so backend/api is put on sys.path and the
+tests import them the same way; importing through an `api.` prefix as well
+would load a second copy of each module.
+"""
+
+import os
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
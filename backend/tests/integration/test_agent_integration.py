@@ -16,8 +16,8 @@ def test_context_agent_memory_integration():
     """Test ContextAgent with scoped memory"""
     print("🧪 Testing ContextAgent memory integration...")
     
-    from api.agents.context_agent import run_context_agent
-    from api.memory.scoped_memory_manager import get_scoped_memory_manager
+    from agents.context_agent import run_context_agent
+    from memory.scoped_memory_manager import get_scoped_memory_manager
     
     session_id = "test_context_integration"
     
@@ -25,7 +25,7 @@ def test_context_agent_memory_integration():
     import unittest.mock
     
     # First query - should require more context
-    with unittest.mock.patch('api.agents.context_agent.get_llm') as mock_llm:
+    with unittest.mock.patch('agents.context_agent.get_llm') as mock_llm:
         mock_response = unittest.mock.MagicMock()
         mock_response.content = '{"is_clear": true, "is_relevant": true, "requires_clarification": false, "clarifying_question": "", "requires_context": true, "additional_context_question": "Which room and when did it start?", "query_summary": "User reports broken washing machine"}'
         mock_llm.return_value.invoke.return_value = mock_response
@@ -47,7 +47,7 @@ def test_context_agent_memory_integration():
     print(f"✅ Context agent has {len(context_history)} messages in memory")
     
     # Second query - should use previous context
-    with unittest.mock.patch('api.agents.context_agent.get_llm') as mock_llm2:
+    with unittest.mock.patch('agents.context_agent.get_llm') as mock_llm2:
         mock_response2 = unittest.mock.MagicMock()
         mock_response2.content = '{"is_clear": true, "is_relevant": true, "requires_clarification": false, "clarifying_question": "", "requires_context": false, "additional_context_question": "", "query_summary": "User provides more details about washing machine in kitchen, started yesterday"}'
         mock_llm2.return_value.invoke.return_value = mock_response2
@@ -75,10 +75,10 @@ def test_memory_isolation_between_agents():
     """Test that agents maintain separate memory channels"""
     print("🧪 Testing memory isolation between agents...")
     
-    from api.agents.context_agent import get_shared_memory as get_context_memory
-    from api.agents.contract_agent import get_shared_memory as get_contract_memory
-    from api.agents.classifier import get_shared_memory as get_classifier_memory
-    from api.agents.main_agent import get_shared_memory as get_user_memory
+    from agents.context_agent import get_shared_memory as get_context_memory
+    from agents.contract_agent import get_shared_memory as get_contract_memory
+    from agents.classifier import get_shared_memory as get_classifier_memory
+    from agents.main_agent import get_shared_memory as get_user_memory
     
     session_id = "test_isolation_integration"
     
@@ -143,7 +143,7 @@ def test_session_isolation():
     """Test that different sessions maintain separate memories"""
     print("🧪 Testing session isolation...")
     
-    from api.memory.scoped_memory_manager import get_scoped_memory_manager
+    from memory.scoped_memory_manager import get_scoped_memory_manager
     
     manager = get_scoped_memory_manager()
     
@@ -195,7 +195,7 @@ def test_memory_statistics():
     """Test memory manager statistics tracking"""
     print("🧪 Testing memory statistics tracking...")
     
-    from api.memory.scoped_memory_manager import ScopedMemoryManager
+    from memory.scoped_memory_manager import ScopedMemoryManager
     
     # Create fresh manager for clean stats
     manager = ScopedMemoryManager()
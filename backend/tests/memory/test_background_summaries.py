@@ -0,0 +1,95 @@
+"""
+Tests for background rolling summarization of memory channels
+
+Uses fakeredis to check the full loop: evictions are queued on the request
+path, the worker job folds them into a running summary, and later loads read
+the precomputed summary instead of the local extractive one.
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from memory.summary_store import SummaryStore
+from memory.scoped_memory_manager import ScopedMemoryManager
+from worker.jobs import summarize
+
+
+@pytest.fixture
+def store():
+    return SummaryStore(fakeredis.FakeRedis())
+
+
+def _fill(memory, exchanges, prefix="Query"):
+    for i in range(exchanges):
+        memory.chat_memory.add_user_message(f"{prefix} {i}: " + "the mould in the bathroom is spreading " * 5)
+        memory.chat_memory.add_ai_message(f"Response {i}")
+
+
+class TestEvictionQueue:
+    """Test the request-path side of the summary store"""
+    
+    def test_evictions_are_queued_with_sequence_numbers(self, store):
+        manager = ScopedMemoryManager(summary_store=store)
+        memory = manager.get_agent_memory("session_q", "context")
+        _fill(memory, 8)
+        memory.load_memory_variables({})
+        
+        entries = store.read_evicted("session_q", "context")
+        assert [seq for seq, _ in entries] == list(range(1, memory.evicted_count + 1))
+        assert entries[0][1].startswith("Human: Query 0")
+        assert ("session_q", "context") in store.pending_channels()
+    
+    def test_no_store_keeps_local_summary(self):
+        manager = ScopedMemoryManager()
+        memory = manager.get_agent_memory("session_local", "context")
+        _fill(memory, 8)
+        summary = memory.load_memory_variables({})["history_summary"]
+        assert summary and "Response" in summary[0].content
+
+
+class TestSummarizeJob:
+    """Test the worker job and the precomputed summary read path"""
+    
+    def test_below_threshold_is_left_pending(self, store):
+        store.queue_evicted("session_small", "user", [(1, "Human: hi")])
+        with patch.object(summarize, "get_llm") as mock_llm:
+            assert summarize.summarize_pending_channels(store) == 0
+            mock_llm.assert_not_called()
+        assert ("session_small", "user") in store.pending_channels()
+    
+    def test_summary_is_precomputed_and_read_on_load(self, store, monkeypatch):
+        monkeypatch.setattr(summarize, "SUMMARY_THRESHOLD_TOKENS", 10)
+        manager = ScopedMemoryManager(summary_store=store)
+        memory = manager.get_user_memory("session_long")
+        _fill(memory, 12)
+        memory.load_memory_variables({})
+        evicted_before_job = memory.evicted_count
+        
+        with patch.object(summarize, "get_llm") as mock_llm:
+            mock_llm.return_value.invoke.return_value = MagicMock(content="Tenant has spreading bathroom mould.")
+            assert summarize.summarize_pending_channels(store) == 1
+        
+        assert store.read_evicted("session_long", "user") == []
+        assert store.pending_channels() == []
+        assert store.get_summary("session_long", "user") == ("Tenant has spreading bathroom mould.", evicted_before_job)
+        
+        summary = memory.load_memory_variables({})["history_summary"][0].content
+        assert "Tenant has spreading bathroom mould." in summary
+        
+        # Messages evicted after the job are appended from the local summary until the next run
+        _fill(memory, 2, prefix="Later")
+        summary = memory.load_memory_variables({})["history_summary"][0].content
+        assert memory.evicted_count > evicted_before_job
+        lines = summary.splitlines()
+        assert lines[1] == "Tenant has spreading bathroom mould."
+        assert lines[2].startswith("Human: Query") or lines[2].startswith("AI: Response")
+    
+    def test_store_errors_fall_back_to_local_summary(self, store):
+        manager = ScopedMemoryManager(summary_store=store)
+        memory = manager.get_agent_memory("session_err", "classifier")
+        memory.summary_source = MagicMock(side_effect=ConnectionError("redis down"))
+        _fill(memory, 8)
+        summary = memory.load_memory_variables({})["history_summary"]
+        assert summary and "Response" in summary[0].content
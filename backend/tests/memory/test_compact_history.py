@@ -0,0 +1,78 @@
+"""
+Tests for the compact record-based chat history used by resident channels
+"""
+
+import sys
+
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+from langchain_core.chat_history import InMemoryChatMessageHistory
+
+from memory.compact_history import CompactChatMessageHistory, MessageRecord
+from memory.scoped_memory_manager import ScopedMemoryManager
+from memory.token_window_memory import TokenWindowMemory
+
+
+class TestCompactChatMessageHistory:
+    """Test the history behaves like the LangChain in-memory history"""
+
+    def test_messages_round_trip(self):
+        history = CompactChatMessageHistory()
+        history.add_user_message("The boiler is broken")
+        history.add_ai_message("Since when?")
+        history.add_messages([SystemMessage(content="note")])
+
+        messages = history.messages
+        assert [type(m) for m in messages] == [HumanMessage, AIMessage, SystemMessage]
+        assert [m.content for m in messages] == ["The boiler is broken", "Since when?", "note"]
+        assert len(history) == 3
+
+    def test_records_share_role_tags(self):
+        history = CompactChatMessageHistory([HumanMessage(content="a"), HumanMessage(content="b")])
+        first, second = history._records
+        assert isinstance(first, MessageRecord)
+        assert first.role is second.role
+        assert not hasattr(first, "__dict__")
+
+    def test_drop_oldest_and_clear_notify(self):
+        changes = []
+        history = CompactChatMessageHistory(on_change=lambda: changes.append(1))
+        for i in range(4):
+            history.add_user_message(f"m{i}")
+        history.drop_oldest(3)
+        assert [m.content for m in history.messages] == ["m3"]
+        history.clear()
+        assert history.messages == []
+        assert len(changes) == 6
+
+    def test_assigning_messages_does_not_notify(self):
+        changes = []
+        history = CompactChatMessageHistory(on_change=lambda: changes.append(1))
+        history.messages = [HumanMessage(content="restored")]
+        assert history.messages[0].content == "restored"
+        assert changes == []
+
+    def test_window_memory_prunes_the_same_way(self):
+        def run(history):
+            memory = TokenWindowMemory(
+                chat_memory=history, k=2, max_token_limit=10_000, memory_key="chat_history", return_messages=True
+            )
+            for i in range(5):
+                memory.save_context({"input": f"Query {i}"}, {"output": f"Response {i}"})
+            return [m.content for m in memory.load_memory_variables({})["chat_history"]], memory.summary
+
+        assert run(CompactChatMessageHistory()) == run(InMemoryChatMessageHistory())
+
+
+class TestManagerUsesCompactHistory:
+    """Test that manager channels store records, not LangChain messages"""
+
+    def test_channels_use_compact_history(self):
+        manager = ScopedMemoryManager()
+        assert isinstance(manager.get_user_memory("s1").chat_memory, CompactChatMessageHistory)
+        assert isinstance(manager.get_agent_memory("s1", "context").chat_memory, CompactChatMessageHistory)
+
+    def test_record_is_smaller_than_a_langchain_message(self):
+        record = MessageRecord.from_message(HumanMessage(content="hello"))
+        message = HumanMessage(content="hello")
+        message_size = sys.getsizeof(message) + sys.getsizeof(message.__dict__)
+        assert sys.getsizeof(record) < message_size
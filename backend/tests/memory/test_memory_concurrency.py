@@ -0,0 +1,116 @@
+"""
+Stress tests for concurrent access to the scoped memory manager
+
+Simulates FastAPI threadpool workers serving overlapping turns for the same
+and for different sessions, and checks that no memories are duplicated,
+exchanges never interleave and LRU eviction stays consistent.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from memory.scoped_memory_manager import ScopedMemoryManager
+
+
+THREADS = 16
+
+
+def _run_concurrently(fn, count: int):
+    """Run fn(i) for i in range(count) across THREADS workers, released together"""
+    barrier = threading.Barrier(min(THREADS, count))
+
+    def task(i):
+        if i < THREADS:
+            barrier.wait()
+        return fn(i)
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(task, range(count)))
+
+
+@pytest.fixture
+def manager():
+    return ScopedMemoryManager(token_budgets={"context": 100_000, "user": 100_000})
+
+
+class TestConcurrentAccess:
+    """Test check-then-create and appends under contention"""
+
+    def test_concurrent_first_access_creates_one_memory(self, manager):
+        memories = _run_concurrently(lambda i: manager.get_agent_memory("shared", "context"), 200)
+        assert len({id(m) for m in memories}) == 1
+        assert len(manager.context_conversations) == 1
+
+    def test_concurrent_exchanges_keep_roles_alternating(self, manager):
+        def turn(i):
+            manager.get_agent_memory("shared", "context").add_exchange(f"query {i}", f"answer {i}")
+
+        _run_concurrently(turn, 400)
+
+        memory = manager.get_agent_memory("shared", "context")
+        messages = memory.chat_memory.messages
+        assert [m.type for m in messages] == ["human", "ai"] * (len(messages) // 2)
+        for human, ai in zip(messages[::2], messages[1::2]):
+            assert human.content.replace("query", "answer") == ai.content
+        # Everything was either kept in the window or counted as evicted, exactly once
+        assert memory.evicted_count + len(messages) == 800
+
+    def test_concurrent_reads_and_writes_do_not_fail(self, manager):
+        def turn(i):
+            memory = manager.get_user_memory(f"session-{i % 8}")
+            if i % 2:
+                memory.add_exchange(f"tenant {i}", f"main agent {i}")
+            else:
+                memory.load_memory_variables({})
+            manager.update_issue_record(f"session-{i % 8}", {"turn": i})
+            return manager.get_issue_record(f"session-{i % 8}")
+
+        results = _run_concurrently(turn, 800)
+        assert all("turn" in record for record in results)
+        assert len(manager.user_conversations) == 8
+
+
+class TestConcurrentEviction:
+    """Test LRU capacity and TTL sweeps while sessions are in use"""
+
+    def test_session_cap_holds_under_concurrent_creation(self):
+        manager = ScopedMemoryManager(max_sessions=50)
+
+        def turn(i):
+            manager.get_user_memory(f"session-{i}").add_exchange("hi", "hello")
+            manager.get_agent_memory(f"session-{i}", "classifier")
+
+        _run_concurrently(turn, 1000)
+
+        # Busy sessions are skipped rather than waited on, so the cap can be
+        # exceeded by at most the number of in-flight turns
+        assert len(manager.session_activity) <= 50 + THREADS
+        resident = set(manager.session_activity)
+        for store in manager._session_stores():
+            assert set(store) <= resident
+
+    def test_sweeper_runs_alongside_traffic(self):
+        manager = ScopedMemoryManager(session_ttl_hours=1e-9)
+
+        def turn(i):
+            if i % 10 == 0:
+                manager.cleanup_expired_sessions()
+            else:
+                manager.get_user_memory(f"session-{i % 20}").add_exchange("hi", "hello")
+
+        _run_concurrently(turn, 1000)
+        manager.cleanup_expired_sessions()
+        assert manager.get_session_stats()["active_sessions"] == 0
+
+    def test_different_sessions_do_not_share_a_lock_bottleneck(self, manager):
+        held = manager.session_lock("session-a")
+        other = next(f"session-{i}" for i in range(1000) if manager.session_lock(f"session-{i}") is not held)
+
+        with held:
+            result = []
+            worker = threading.Thread(target=lambda: result.append(manager.get_user_memory(other)))
+            worker.start()
+            worker.join(timeout=2)
+        assert result, "access to another session blocked on an unrelated session's lock"
@@ -0,0 +1,177 @@
+"""
+Tests for TTL and LRU eviction in ScopedMemoryManager
+
+Includes a soak test that simulates months of uptime with a fake clock and
+checks that resident memory stays bounded across every channel.
+"""
+
+import time
+from memory.scoped_memory_manager import ScopedMemoryManager
+
+
+class FakeClock:
+    """Controllable time source for eviction tests"""
+    
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _touch_all_channels(manager, session_id):
+    manager.get_user_memory(session_id).chat_memory.add_user_message("hello")
+    for agent_type in ("context", "contract", "classifier"):
+        manager.get_agent_memory(session_id, agent_type)
+    manager.update_issue_record(session_id, {"summary": "leak"})
+
+
+def _resident_counts(manager):
+    return [len(store) for store in manager._session_stores()] + [len(manager.session_activity)]
+
+
+class TestTTLEviction:
+    """Test idle-TTL eviction across all channels"""
+    
+    def test_expired_sessions_are_removed_from_every_channel(self):
+        clock = FakeClock()
+        manager = ScopedMemoryManager(session_ttl_hours=1, clock=clock)
+        _touch_all_channels(manager, "old_session")
+        clock.advance(2 * 3600)
+        _touch_all_channels(manager, "new_session")
+        
+        assert manager.cleanup_expired_sessions() == 1
+        assert _resident_counts(manager) == [1, 1, 1, 1, 1, 1]
+        assert "old_session" not in manager.user_conversations
+        assert "old_session" not in manager.issue_records
+        assert "new_session" in manager.session_activity
+    
+    def test_activity_refreshes_ttl(self):
+        clock = FakeClock()
+        manager = ScopedMemoryManager(session_ttl_hours=1, clock=clock)
+        _touch_all_channels(manager, "active_session")
+        clock.advance(50 * 60)
+        manager.get_user_memory("active_session")
+        clock.advance(50 * 60)
+        
+        assert manager.cleanup_expired_sessions() == 0
+        assert "active_session" in manager.user_conversations
+    
+    def test_explicit_max_age_overrides_ttl(self):
+        clock = FakeClock()
+        manager = ScopedMemoryManager(session_ttl_hours=24, clock=clock)
+        _touch_all_channels(manager, "session")
+        clock.advance(2 * 3600)
+        
+        assert manager.cleanup_expired_sessions(max_age_hours=1) == 1
+
+
+class TestLRUEviction:
+    """Test the hard cap on resident sessions"""
+    
+    def test_least_recently_used_session_is_evicted(self):
+        clock = FakeClock()
+        manager = ScopedMemoryManager(max_sessions=3, clock=clock)
+        for session_id in ("a", "b", "c"):
+            _touch_all_channels(manager, session_id)
+            clock.advance(1)
+        
+        # Touch "a" so "b" becomes least recently used
+        manager.get_agent_memory("a", "context")
+        _touch_all_channels(manager, "d")
+        
+        assert set(manager.session_activity) == {"a", "c", "d"}
+        assert "b" not in manager.context_conversations
+        assert manager.get_session_stats()["evicted_sessions"] == 1
+    
+    def test_evict_session_reports_residency(self):
+        manager = ScopedMemoryManager()
+        _touch_all_channels(manager, "s")
+        assert manager.evict_session("s") is True
+        assert manager.evict_session("s") is False
+
+
+class TestPinnedSessions:
+    """Test that a session in the middle of a turn isn't evicted under it"""
+    
+    def test_ttl_cleanup_skips_a_session_mid_turn(self):
+        clock = FakeClock()
+        manager = ScopedMemoryManager(session_ttl_hours=1, clock=clock)
+        with manager.pin_session("slow_turn"):
+            memory = manager.get_user_memory("slow_turn")
+            clock.advance(2 * 3600)  # an LLM call that outlasts the TTL
+            assert manager.cleanup_expired_sessions() == 0
+            memory.save_context({"input": "hello"}, {"output": "hi"})
+        
+        # The turn's writes land in the resident memory, and finishing it counts as activity
+        assert manager.get_user_memory("slow_turn").chat_memory.messages[-1].content == "hi"
+        clock.advance(50 * 60)
+        assert manager.cleanup_expired_sessions() == 0
+    
+    def test_lru_eviction_takes_the_next_oldest_session(self):
+        clock = FakeClock()
+        manager = ScopedMemoryManager(max_sessions=2, clock=clock)
+        with manager.pin_session("a"):
+            for session_id in ("a", "b", "c"):
+                _touch_all_channels(manager, session_id)
+                clock.advance(1)
+            assert set(manager.session_activity) == {"a", "c"}
+        
+        _touch_all_channels(manager, "d")
+        assert set(manager.session_activity) == {"a", "d"}
+    
+    def test_unpinned_session_expires_again(self):
+        clock = FakeClock()
+        manager = ScopedMemoryManager(session_ttl_hours=1, clock=clock)
+        with manager.pin_session("s"), manager.pin_session("s"):
+            _touch_all_channels(manager, "s")
+        clock.advance(2 * 3600)
+        assert manager.cleanup_expired_sessions() == 1
+
+
+class TestSweeper:
+    """Test the background sweeper thread"""
+    
+    def test_sweeper_evicts_in_background(self):
+        manager = ScopedMemoryManager(session_ttl_hours=1 / 3600)
+        _touch_all_channels(manager, "short_lived")
+        manager.start_sweeper(interval_seconds=0.05)
+        try:
+            deadline = time.time() + 5
+            while "short_lived" in manager.session_activity and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            manager.stop_sweeper()
+        
+        assert "short_lived" not in manager.user_conversations
+
+
+class TestMemorySoak:
+    """Soak test: months of simulated uptime keep resident memory bounded"""
+    
+    def test_resident_sessions_stay_bounded(self):
+        days = 90
+        clock = FakeClock()
+        manager = ScopedMemoryManager(session_ttl_hours=24, max_sessions=2000, clock=clock)
+        sessions_per_hour = 40
+        peak = 0
+        
+        for hour in range(days * 24):
+            for i in range(sessions_per_hour):
+                session_id = f"soak-{hour}-{i}"
+                _touch_all_channels(manager, session_id)
+            # A handful of long-running conversations keep coming back
+            for returning in range(5):
+                manager.get_user_memory(f"returning-{returning}")
+            clock.advance(3600)
+            manager.cleanup_expired_sessions()
+            peak = max(peak, len(manager.session_activity))
+        
+        # At most one TTL window of traffic (plus the returning sessions) stays resident
+        assert peak <= 25 * sessions_per_hour + 5
+        assert max(_resident_counts(manager)) <= 24 * sessions_per_hour + 5
+        assert all(f"returning-{i}" in manager.user_conversations for i in range(5))
+        assert manager.get_session_stats()["evicted_sessions"] >= days * 24 * sessions_per_hour - 2000
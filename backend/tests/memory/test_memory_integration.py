@@ -10,11 +10,11 @@ import os
 from unittest.mock import patch, MagicMock
 
 # Import agents with their memory functions
-from api.agents.context_agent import run_context_agent, get_shared_memory as get_context_memory
-from api.agents.contract_agent import run_contract_agent, get_shared_memory as get_contract_memory  
-from api.agents.classifier import run_classifier_agent, get_shared_memory as get_classifier_memory
-from api.agents.main_agent import get_shared_memory as get_user_memory
-from api.memory.scoped_memory_manager import get_scoped_memory_manager
+from agents.context_agent import run_context_agent, get_shared_memory as get_context_memory
+from agents.contract_agent import run_contract_agent, get_shared_memory as get_contract_memory  
+from agents.classifier import run_classifier_agent, get_shared_memory as get_classifier_memory
+from agents.main_agent import get_shared_memory as get_user_memory
+from memory.scoped_memory_manager import get_scoped_memory_manager
 
 
 class TestAgentMemoryIntegration:
@@ -23,7 +23,7 @@ class TestAgentMemoryIntegration:
     def setup_method(self):
         """Setup for each test"""
         # Reset the global memory manager for each test
-        import api.memory.scoped_memory_manager as mem_module
+        import memory.scoped_memory_manager as mem_module
         mem_module._memory_manager = None
     
     def test_agent_memory_functions_use_scoped_manager(self):
@@ -56,11 +56,11 @@ class TestAgentMemoryIntegration:
         session_id = "test_agent_calls"
         
         # Mock the LLM calls to avoid API dependency
-        with patch('api.agents.context_agent.get_llm') as mock_context_llm, \
-             patch('api.agents.contract_agent.get_llm') as mock_contract_llm, \
-             patch('api.agents.classifier.get_llm') as mock_classifier_llm, \
-             patch('api.agents.contract_agent.get_pinecone_components') as mock_pinecone_contract, \
-             patch('api.agents.classifier.get_pinecone_components') as mock_pinecone_classifier:
+        with patch('agents.context_agent.get_llm') as mock_context_llm, \
+             patch('agents.contract_agent.get_llm') as mock_contract_llm, \
+             patch('agents.classifier.get_llm') as mock_classifier_llm, \
+             patch('agents.contract_agent.get_pinecone_components') as mock_pinecone_contract, \
+             patch('agents.classifier.get_pinecone_components') as mock_pinecone_classifier:
             
             # Setup mocks
             mock_context_response = MagicMock()
@@ -200,7 +200,7 @@ class TestMemoryPersistence:
     def setup_method(self):
         """Setup for each test"""
         # Reset the global memory manager for each test
-        import api.memory.scoped_memory_manager as mem_module
+        import memory.scoped_memory_manager as mem_module
         mem_module._memory_manager = None
     
     def test_conversation_continuity_within_session(self):
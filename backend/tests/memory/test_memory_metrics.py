@@ -0,0 +1,69 @@
+"""
+Tests for memory usage instrumentation in get_session_stats
+"""
+
+from memory.memory_metrics import EventRate, histogram, percentiles, MESSAGE_COUNT_BUCKETS, MESSAGE_COUNT_OVERFLOW
+from memory.scoped_memory_manager import ScopedMemoryManager
+from memory.token_window_memory import count_tokens
+
+
+class FakeClock:
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestHelpers:
+    """Test the histogram, percentile and rate helpers"""
+
+    def test_histogram_buckets_and_overflow(self):
+        counts = histogram([0, 1, 2, 4, 12, 40], MESSAGE_COUNT_BUCKETS, MESSAGE_COUNT_OVERFLOW)
+        assert counts == {"0": 1, "1-2": 2, "3-5": 1, "6-10": 0, "11-20": 1, ">20": 1}
+
+    def test_percentiles(self):
+        assert percentiles(list(range(1, 101))) == {"p50": 51, "p90": 91, "p99": 100, "max": 100}
+        assert percentiles([])["max"] is None
+
+    def test_event_rate_uses_trailing_window(self):
+        rate = EventRate(window_seconds=60)
+        for t in range(10):
+            rate.record(t)
+        assert rate.per_minute(30) == 10
+        assert rate.per_minute(100) == 0
+
+
+class TestSessionStats:
+    """Test the per-channel usage and session distributions"""
+
+    def test_channel_bytes_tokens_and_histograms(self):
+        manager = ScopedMemoryManager()
+        manager.get_user_memory("a").add_exchange("my window is broken", "which room?")
+        manager.get_user_memory("b")
+        manager.get_agent_memory("a", "context").add_exchange("window", '{"is_clear": true}')
+
+        stats = manager.get_session_stats()
+        user = stats["channels"]["user"]
+        assert user["sessions"] == 2
+        assert user["messages"] == 2
+        assert user["tokens"] == count_tokens("my window is broken") + count_tokens("which room?")
+        assert user["message_histogram"]["0"] == 1
+        assert user["message_histogram"]["1-2"] == 1
+        assert stats["channels"]["classifier"]["sessions"] == 0
+        assert stats["approx_bytes"] == sum(c["approx_bytes"] for c in stats["channels"].values()) > 0
+        assert stats["approx_bytes_per_session"] == stats["approx_bytes"] / 2
+
+    def test_eviction_rate_and_idle_ages(self):
+        clock = FakeClock()
+        manager = ScopedMemoryManager(clock=clock, max_sessions=3)
+        for i in range(6):
+            clock.now += 60
+            manager.get_user_memory(f"s{i}")
+        assert manager.get_session_stats()["evictions_per_minute"] == 3 * 60 / 300
+
+        clock.now += 600
+        stats = manager.get_session_stats()
+        assert stats["evictions_per_minute"] == 0
+        assert stats["session_idle_seconds"]["max"] == 720
+        assert stats["session_idle_histogram"]["5-30m"] == 3
@@ -12,7 +12,7 @@ import sys
 # Add the backend directory to Python path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from api.memory.scoped_memory_manager import get_user_memory, get_agent_memory, get_scoped_memory_manager
+from memory.scoped_memory_manager import get_user_memory, get_agent_memory, get_scoped_memory_manager
 
 def print_separator(title):
     """Print a formatted section separator"""
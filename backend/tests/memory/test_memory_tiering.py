@@ -0,0 +1,124 @@
+"""
+Tests for hot/cold tiering of scoped memory sessions
+
+Idle sessions are spilled to a cold store (local disk or Redis) and must be
+reloaded transparently, with their windows, summaries and issue records,
+on their next access.
+"""
+
+import os
+
+import pytest
+
+from memory.cold_store import DiskColdStore, RedisColdStore
+from memory.scoped_memory_manager import ScopedMemoryManager
+
+
+class FakeClock:
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance_minutes(self, minutes: float) -> None:
+        self.now += minutes * 60
+
+
+@pytest.fixture(params=["disk", "redis"])
+def cold_store(request, tmp_path):
+    if request.param == "disk":
+        return DiskColdStore(str(tmp_path / "cold"))
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisColdStore(fakeredis.FakeRedis())
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _manager(cold_store, clock, **kwargs):
+    return ScopedMemoryManager(cold_store=cold_store, spill_after_minutes=30, clock=clock, **kwargs)
+
+
+class TestSpillAndReload:
+    """Test that idle sessions leave the process and come back intact"""
+
+    def test_idle_sessions_are_spilled_and_active_ones_stay_hot(self, cold_store, clock):
+        manager = _manager(cold_store, clock)
+        manager.get_user_memory("idle").add_exchange("hi", "hello")
+        clock.advance_minutes(45)
+        manager.get_user_memory("active").add_exchange("hi", "hello")
+
+        assert manager.spill_idle_sessions() == 1
+        assert "idle" not in manager.user_conversations
+        assert "active" in manager.user_conversations
+        stats = manager.get_session_stats()
+        assert stats["active_sessions"] == 1
+        assert stats["cold_sessions"] == 1
+        assert stats["evicted_sessions"] == 0
+
+    def test_spilled_session_reloads_transparently(self, cold_store, clock):
+        manager = _manager(cold_store, clock)
+        context = manager.get_agent_memory("s1", "context")
+        for i in range(8):
+            context.add_exchange(f"Query {i}", f"Response {i}")
+        manager.update_issue_record("s1", {"what": "damp", "outstanding_questions": ["where"]})
+        expected = [m.content for m in context.chat_memory.messages]
+        summary, evicted = context.summary, context.evicted_count
+
+        clock.advance_minutes(60)
+        manager.spill_idle_sessions()
+        assert manager.get_session_stats()["active_sessions"] == 0
+
+        restored = manager.get_agent_memory("s1", "context")
+        assert restored is not context
+        assert [m.content for m in restored.chat_memory.messages] == expected
+        assert (restored.summary, restored.evicted_count) == (summary, evicted)
+        assert manager.get_issue_record("s1")["what"] == "damp"
+        assert manager.get_session_stats()["cold_sessions"] == 0
+        assert manager.reloaded_sessions == 1
+
+    def test_capacity_overflow_spills_instead_of_dropping(self, cold_store, clock):
+        manager = _manager(cold_store, clock, max_sessions=2)
+        for session_id in ["a", "b", "c"]:
+            clock.advance_minutes(1)
+            manager.get_user_memory(session_id).add_exchange(f"from {session_id}", "ok")
+
+        assert set(manager.session_activity) == {"b", "c"}
+        assert manager.get_user_memory("a").chat_memory.messages[0].content == "from a"
+
+    def test_evicting_a_session_removes_its_cold_copy(self, cold_store, clock):
+        manager = _manager(cold_store, clock)
+        manager.get_user_memory("s1").add_exchange("hi", "hello")
+        manager.spill_session("s1")
+
+        assert manager.evict_session("s1")
+        assert manager.get_user_memory("s1").chat_memory.messages == []
+
+    def test_nothing_is_spilled_without_a_cold_store(self, clock):
+        manager = ScopedMemoryManager(clock=clock)
+        manager.get_user_memory("s1")
+        clock.advance_minutes(600)
+        assert manager.spill_idle_sessions() == 0
+        assert "s1" in manager.user_conversations
+
+
+class TestColdExpiry:
+    """Test that cold sessions still honour the session TTL"""
+
+    def test_disk_snapshots_expire_with_the_remaining_ttl(self, tmp_path):
+        store = DiskColdStore(str(tmp_path))
+        store.put("expired", {"channels": {}}, ttl_seconds=-1)
+        store.put("live", {"channels": {}}, ttl_seconds=3600)
+
+        assert store.expire() == 1
+        assert store.take("expired") is None
+        assert store.take("live") == {"channels": {}}
+
+    def test_session_ids_are_not_used_as_paths(self, tmp_path):
+        store = DiskColdStore(str(tmp_path))
+        store.put("../../etc/passwd", {"channels": {}}, ttl_seconds=60)
+        assert os.listdir(tmp_path) and all(name.endswith(".json.z") for name in os.listdir(tmp_path))
+        assert store.take("../../etc/passwd") == {"channels": {}}
@@ -0,0 +1,165 @@
+"""
+Tests for the Redis-backed scoped memory manager
+
+Two manager instances sharing one fakeredis server stand in for two API
+processes: whatever one writes, the other must see on the next access.
+"""
+
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from langchain.schema import AIMessage, HumanMessage
+
+from memory.redis_memory_manager import RedisChannelHistory, RedisScopedMemoryManager, ACTIVE_SESSIONS_KEY
+from memory.scoped_memory_manager import ScopedMemoryManager
+
+
+class FakeClock:
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def _manager(server, **kwargs):
+    return RedisScopedMemoryManager(fakeredis.FakeRedis(server=server), **kwargs)
+
+
+class TestSharedState:
+    """Test that state written by one process is visible to another"""
+
+    def test_user_memory_is_shared_across_processes(self, server):
+        first, second = _manager(server), _manager(server)
+        first.get_user_memory("s1").save_context({"input": "My boiler is broken"}, {"output": "Since when?"})
+
+        history = second.get_user_memory("s1").load_memory_variables({})["chat_history"]
+        assert [m.content for m in history] == ["My boiler is broken", "Since when?"]
+        assert [m.type for m in history] == ["human", "ai"]
+
+    def test_channels_stay_isolated(self, server):
+        manager = _manager(server)
+        manager.get_agent_memory("s1", "context").save_context({"input": "context q"}, {"output": "context a"})
+        manager.get_agent_memory("s1", "contract").save_context({"input": "contract q"}, {"output": "contract a"})
+
+        context_history = manager.get_agent_memory("s1", "context").load_memory_variables({})["chat_history"]
+        assert all("contract" not in m.content for m in context_history)
+        assert manager.get_user_memory("s1").load_memory_variables({})["chat_history"] == []
+
+    def test_dual_memory_reads_both_channels_in_one_round_trip(self, server):
+        manager = _manager(server)
+        manager.get_user_memory("s1").save_context({"input": "tenant"}, {"output": "main"})
+        manager.get_agent_memory("s1", "classifier").save_context({"input": "classify"}, {"output": "urgent"})
+
+        calls = []
+        original = manager.redis.pipeline
+        manager.redis.pipeline = lambda *a, **kw: calls.append(1) or original(*a, **kw)
+        user_memory, agent_memory = manager.get_dual_memory("s1", "classifier")
+        manager.redis.pipeline = original
+
+        assert len(calls) == 1
+        assert user_memory.chat_memory.messages[0].content == "tenant"
+        assert agent_memory.chat_memory.messages[1].content == "urgent"
+
+    def test_summary_and_eviction_counter_survive_reload(self, server):
+        first, second = _manager(server), _manager(server)
+        memory = first.get_agent_memory("s1", "context")
+        for i in range(8):
+            memory.save_context({"input": f"Query {i}"}, {"output": f"Response {i}"})
+        assert memory.evicted_count > 0
+
+        reloaded = second.get_agent_memory("s1", "context")
+        assert reloaded.evicted_count == memory.evicted_count
+        assert reloaded.summary == memory.summary
+        assert len(reloaded.chat_memory.messages) == len(memory.chat_memory.messages)
+        assert reloaded.chat_memory.messages[-1].content == "Response 7"
+
+    def test_concurrent_prunes_never_drop_unsummarized_messages(self, server):
+        messages = [HumanMessage(content=f"m{i}") if i % 2 == 0 else AIMessage(content=f"m{i}") for i in range(6)]
+        RedisChannelHistory(fakeredis.FakeRedis(server=server), "k", 60).add_messages(messages)
+        first = RedisChannelHistory(fakeredis.FakeRedis(server=server), "k", 60, messages)
+        second = RedisChannelHistory(fakeredis.FakeRedis(server=server), "k", 60, messages)
+
+        # Both processes loaded the same list, then each appends a turn and prunes its oldest two
+        first.add_messages([HumanMessage(content="a"), AIMessage(content="b")])
+        first.drop_oldest(2)
+        second.add_messages([HumanMessage(content="c"), AIMessage(content="d")])
+        second.drop_oldest(2)
+
+        # m0 and m1 were summarized (by both); nothing else is lost
+        stored = [json.loads(raw)[1] for raw in fakeredis.FakeRedis(server=server).lrange("k", 0, -1)]
+        assert stored == ["m2", "m3", "m4", "m5", "a", "b", "c", "d"]
+
+    def test_issue_record_is_shared(self, server):
+        first, second = _manager(server), _manager(server)
+        first.update_issue_record("s1", {"what": "leak", "outstanding_questions": ["when"]})
+        assert second.get_issue_record("s1") == {"what": "leak", "outstanding_questions": ["when"]}
+        assert second.get_issue_record("unknown") == {}
+
+    def test_unknown_agent_type_raises(self, server):
+        with pytest.raises(ValueError, match="Unknown agent type"):
+            _manager(server).get_agent_memory("s1", "invalid")
+
+
+class TestRedisEviction:
+    """Test session expiry and capacity limits on the shared store"""
+
+    def test_session_keys_carry_the_session_ttl(self, server):
+        manager = _manager(server, session_ttl_hours=2)
+        manager.get_user_memory("s1").save_context({"input": "hi"}, {"output": "hello"})
+        assert 0 < manager.redis.ttl("memory:messages:s1:user") <= 2 * 3600
+
+    def test_expired_sessions_are_cleaned_up(self, server):
+        clock = FakeClock()
+        manager = _manager(server, session_ttl_hours=1, clock=clock)
+        manager.get_user_memory("old").save_context({"input": "hi"}, {"output": "hello"})
+        clock.now += 7200
+        manager.get_user_memory("new")
+
+        assert manager.cleanup_expired_sessions() == 1
+        assert manager.get_session_stats()["active_sessions"] == 1
+        assert manager.redis.exists("memory:messages:old:user") == 0
+
+    def test_least_recently_used_sessions_are_evicted_beyond_cap(self, server):
+        clock = FakeClock()
+        manager = _manager(server, max_sessions=2, clock=clock)
+        for session_id in ["a", "b", "c"]:
+            clock.now += 1
+            manager.get_user_memory(session_id)
+
+        members = {m.decode() for m in manager.redis.zrange(ACTIVE_SESSIONS_KEY, 0, -1)}
+        assert members == {"b", "c"}
+        assert manager.evicted_sessions == 1
+
+
+class TestBackendSelection:
+    """Test that MEMORY_BACKEND selects the implementation"""
+
+    def setup_method(self):
+        import memory.scoped_memory_manager as mem_module
+        mem_module._memory_manager = None
+
+    teardown_method = setup_method
+
+    def test_redis_backend_requires_redis(self, monkeypatch):
+        import memory.scoped_memory_manager as mem_module
+        monkeypatch.setenv("MEMORY_BACKEND", "redis")
+        monkeypatch.setattr(mem_module.SummaryStore, "from_env", classmethod(lambda cls: None))
+        assert type(mem_module.get_scoped_memory_manager()) is ScopedMemoryManager
+
+    def test_redis_backend_is_selected(self, monkeypatch, server):
+        import memory.scoped_memory_manager as mem_module
+        monkeypatch.setenv("MEMORY_BACKEND", "redis")
+        monkeypatch.setattr(
+            mem_module.SummaryStore, "from_env",
+            classmethod(lambda cls: cls(fakeredis.FakeRedis(server=server)))
+        )
+        assert isinstance(mem_module.get_scoped_memory_manager(), RedisScopedMemoryManager)
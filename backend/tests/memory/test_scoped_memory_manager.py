@@ -7,7 +7,7 @@ to ensure agents only see their own conversation threads.
 
 import pytest
 import time
-from api.memory.scoped_memory_manager import (
+from memory.scoped_memory_manager import (
     ScopedMemoryManager, 
     get_scoped_memory_manager,
     get_user_memory,
@@ -135,6 +135,21 @@ class TestScopedMemoryManager:
         with pytest.raises(ValueError, match="Unknown agent type"):
             self.memory_manager.get_agent_memory(session_id, "invalid_agent")
     
+    def test_issue_record_round_trip(self):
+        """Test that issue records are stored per session and returned as copies"""
+        session_id = "test_issue_record"
+        
+        assert self.memory_manager.get_issue_record(session_id) == {}
+        
+        self.memory_manager.update_issue_record(session_id, {"summary": "Leak", "outstanding_questions": ["when"]})
+        record = self.memory_manager.get_issue_record(session_id)
+        assert record["summary"] == "Leak"
+        
+        # Mutating the returned copy must not change the stored record
+        record["summary"] = "changed"
+        assert self.memory_manager.get_issue_record(session_id)["summary"] == "Leak"
+        assert self.memory_manager.get_issue_record("other_session") == {}
+    
     def test_session_stats(self):
         """Test session statistics functionality"""
         # Initially empty
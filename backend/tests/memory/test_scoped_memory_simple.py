@@ -16,7 +16,7 @@ def test_basic_memory_isolation():
     """Test basic memory isolation between agents"""
     print("🧪 Testing basic memory isolation...")
     
-    from api.memory.scoped_memory_manager import get_scoped_memory_manager
+    from memory.scoped_memory_manager import get_scoped_memory_manager
     
     manager = get_scoped_memory_manager()
     session_id = "test_basic_isolation"
@@ -65,10 +65,10 @@ def test_agent_memory_functions():
     """Test that agent memory functions work correctly"""
     print("🧪 Testing agent memory functions...")
     
-    from api.agents.context_agent import get_shared_memory as get_context_memory
-    from api.agents.contract_agent import get_shared_memory as get_contract_memory
-    from api.agents.classifier import get_shared_memory as get_classifier_memory
-    from api.agents.main_agent import get_shared_memory as get_user_memory
+    from agents.context_agent import get_shared_memory as get_context_memory
+    from agents.contract_agent import get_shared_memory as get_contract_memory
+    from agents.classifier import get_shared_memory as get_classifier_memory
+    from agents.main_agent import get_shared_memory as get_user_memory
     
     session_id = "test_agent_functions"
     
@@ -100,7 +100,7 @@ def test_session_isolation():
     """Test that different sessions are isolated"""
     print("🧪 Testing session isolation...")
     
-    from api.memory.scoped_memory_manager import get_scoped_memory_manager
+    from memory.scoped_memory_manager import get_scoped_memory_manager
     
     manager = get_scoped_memory_manager()
     
@@ -137,12 +137,12 @@ def test_memory_statistics():
     """Test memory statistics functionality"""
     print("🧪 Testing memory statistics...")
     
-    from api.memory.scoped_memory_manager import get_scoped_memory_manager
+    from memory.scoped_memory_manager import get_scoped_memory_manager
     
     manager = get_scoped_memory_manager()
     
     # Reset by creating a new manager
-    from api.memory.scoped_memory_manager import ScopedMemoryManager
+    from memory.scoped_memory_manager import ScopedMemoryManager
     fresh_manager = ScopedMemoryManager()
     
     # Initially empty
@@ -172,7 +172,7 @@ def test_n8n_conversation_scoping():
     """Test that conversation scoping matches n8n architecture"""
     print("🧪 Testing n8n conversation scoping...")
     
-    from api.memory.scoped_memory_manager import get_scoped_memory_manager
+    from memory.scoped_memory_manager import get_scoped_memory_manager
     
     manager = get_scoped_memory_manager()
     session_id = "test_n8n_scoping"
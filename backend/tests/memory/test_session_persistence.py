@@ -0,0 +1,124 @@
+"""
+Tests for write-behind persistence of scoped memory to session_memory
+
+Runs against an in-memory SQLite database; a fresh ScopedMemoryManager
+sharing the same database stands in for the API process after a restart.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base
+from database import get_session_memory
+from memory.scoped_memory_manager import ScopedMemoryManager
+from memory.session_persister import SessionMemoryPersister
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _manager(session_factory, **kwargs):
+    return ScopedMemoryManager(persister=SessionMemoryPersister(session_factory=session_factory), **kwargs)
+
+
+def _count_statements(session_factory):
+    statements = []
+    engine = session_factory.kw["bind"]
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestWriteBehind:
+    """Test that changes are batched off the request path"""
+
+    def test_nothing_is_written_until_flush(self, session_factory):
+        manager = _manager(session_factory)
+        statements = _count_statements(session_factory)
+        manager.get_user_memory("s1").save_context({"input": "hi"}, {"output": "hello"})
+
+        assert not any("INSERT" in s for s in statements)
+        assert manager.persister.flush() == 1
+        db = session_factory()
+        assert get_session_memory(db, "s1")["channels"]["user"]["m"] == [["h", "hi"], ["a", "hello"]]
+        db.close()
+
+    def test_many_sessions_are_upserted_in_one_statement(self, session_factory):
+        manager = _manager(session_factory)
+        for i in range(20):
+            manager.get_agent_memory(f"s{i}", "context").chat_memory.add_user_message(f"query {i}")
+        statements = _count_statements(session_factory)
+
+        assert manager.persister.flush() == 20
+        assert len([s for s in statements if "INSERT" in s]) == 1
+
+    def test_repeated_changes_coalesce_and_update_existing_rows(self, session_factory):
+        manager = _manager(session_factory)
+        memory = manager.get_user_memory("s1")
+        memory.chat_memory.add_user_message("first")
+        manager.persister.flush()
+        memory.chat_memory.add_ai_message("second")
+        memory.chat_memory.add_user_message("third")
+
+        assert manager.persister.flush() == 1
+        assert manager.persister.flush() == 0
+        db = session_factory()
+        assert [text for _, text in get_session_memory(db, "s1")["channels"]["user"]["m"]] == ["first", "second", "third"]
+        db.close()
+
+    def test_background_thread_flushes(self, session_factory):
+        manager = _manager(session_factory)
+        manager.persister.flush_interval_ms = 10
+        manager.persister.start()
+        try:
+            manager.update_issue_record("s1", {"what": "leak"})
+            import time
+            deadline = time.time() + 2
+            while manager.persister.rows_written == 0 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            manager.persister.stop()
+        db = session_factory()
+        assert get_session_memory(db, "s1")["issue_record"] == {"what": "leak"}
+        db.close()
+
+
+class TestHydration:
+    """Test that sessions are restored lazily after a restart"""
+
+    def test_session_is_restored_on_first_access(self, session_factory):
+        before = _manager(session_factory)
+        context = before.get_agent_memory("s1", "context")
+        for i in range(8):
+            context.save_context({"input": f"Query {i}"}, {"output": f"Response {i}"})
+        before.update_issue_record("s1", {"what": "mould", "outstanding_questions": ["where"]})
+        before.persister.flush()
+
+        after = _manager(session_factory)
+        assert after.get_session_stats()["active_sessions"] == 0
+        restored = after.get_agent_memory("s1", "context")
+
+        assert [m.content for m in restored.chat_memory.messages] == [m.content for m in context.chat_memory.messages]
+        assert restored.summary == context.summary
+        assert restored.evicted_count == context.evicted_count
+        assert after.get_issue_record("s1")["what"] == "mould"
+        # Restoring isn't a change, so there is nothing to write back
+        assert after.persister.flush() == 0
+
+    def test_evicted_session_is_staged_and_restored_before_flush(self, session_factory):
+        manager = _manager(session_factory, max_sessions=1)
+        manager.get_user_memory("s1").chat_memory.add_user_message("remember me")
+        manager.get_user_memory("s2")
+
+        assert "s1" not in manager.user_conversations
+        restored = manager.get_user_memory("s1")
+        assert restored.chat_memory.messages[0].content == "remember me"
+
+    def test_unknown_session_starts_empty(self, session_factory):
+        manager = _manager(session_factory)
+        assert manager.get_user_memory("new").chat_memory.messages == []
@@ -0,0 +1,135 @@
+"""
+Unit tests for TokenWindowMemory
+
+Tests that memory channels are bounded by a token budget as well as the
+exchange window, and that evicted content survives as a rolling summary.
+"""
+
+import pytest
+from memory import compact_history, token_window_memory
+from memory.token_window_memory import TokenWindowMemory, count_tokens
+from memory.scoped_memory_manager import ScopedMemoryManager
+
+
+def _window_tokens(memory):
+    history = memory.load_memory_variables({})["chat_history"]
+    return sum(count_tokens(msg.content) for msg in history)
+
+
+class TestTokenWindowMemory:
+    """Test token-budget windowing and rolling summaries"""
+    
+    def _memory(self, **kwargs):
+        params = dict(k=10, max_token_limit=100, summary_token_limit=60, memory_key="chat_history", return_messages=True)
+        params.update(kwargs)
+        return TokenWindowMemory(**params)
+    
+    def test_short_conversation_is_untouched(self):
+        memory = self._memory()
+        memory.chat_memory.add_user_message("My sink is leaking")
+        memory.chat_memory.add_ai_message("Sorry to hear that")
+        
+        variables = memory.load_memory_variables({})
+        assert len(variables["chat_history"]) == 2
+        assert variables["history_summary"] == []
+        assert memory.summary == ""
+    
+    def test_long_messages_are_evicted_by_token_budget(self):
+        memory = self._memory()
+        for i in range(4):
+            memory.chat_memory.add_user_message(f"Essay {i}: " + "the mould keeps coming back " * 20)
+            memory.chat_memory.add_ai_message(f"Reply {i}")
+        
+        history = memory.load_memory_variables({})["chat_history"]
+        assert _window_tokens(memory) <= 100
+        # The newest exchange is over budget on its own, so it is kept whole and truncated
+        assert [msg.type for msg in history] == ["human", "ai"]
+        assert history[0].content.startswith("Essay 3") and history[1].content == "Reply 3"
+        assert not any("Essay 0" in msg.content for msg in history)
+        
+        # Evicted content is folded into the rolling summary, which is itself bounded
+        assert "Essay 2" in memory.summary
+        assert count_tokens(memory.summary) <= 60
+        summary = memory.load_memory_variables({})["history_summary"]
+        assert len(summary) == 1 and "Summary of earlier conversation" in summary[0].content
+    
+    def test_evicted_messages_leave_the_underlying_history(self):
+        memory = self._memory(k=2, max_token_limit=10_000)
+        for i in range(10):
+            memory.chat_memory.add_user_message(f"Query {i}")
+            memory.chat_memory.add_ai_message(f"Response {i}")
+        
+        memory.load_memory_variables({})
+        assert len(memory.chat_memory.messages) == 4
+        assert "Query 7" in memory.summary
+    
+    def test_single_oversized_message_is_truncated(self):
+        memory = self._memory(max_token_limit=20)
+        memory.chat_memory.add_user_message("word " * 500)
+        
+        history = memory.load_memory_variables({})["chat_history"]
+        assert len(history) == 1
+        assert count_tokens(history[0].content) <= 25
+        # The stored copy is kept intact
+        assert len(memory.chat_memory.messages[0].content) == len("word " * 500)
+    
+    def test_window_is_cut_at_an_exchange_boundary(self):
+        memory = self._memory(max_token_limit=60)
+        for i in range(3):
+            memory.save_context({"input": f"Question {i}"}, {"output": f"Answer {i}: " + "check the valve " * 8})
+        
+        # Only the last answer and a bare question would fit; the window never opens with an AI reply
+        history = memory.load_memory_variables({})["chat_history"]
+        assert [msg.type for msg in history] == ["human", "ai"]
+        assert history[0].content == "Question 2"
+        assert "Answer 1" in memory.summary
+    
+    def test_load_uses_cached_token_counts(self, monkeypatch):
+        manager = ScopedMemoryManager(token_budgets={"user": 100})
+        memory = manager.get_user_memory("s")
+        for i in range(5):
+            memory.save_context({"input": f"Question {i} " * 10}, {"output": f"Answer {i}"})
+        memory.load_memory_variables({})
+        
+        def fail(text):
+            raise AssertionError("token count recomputed")
+        monkeypatch.setattr(token_window_memory, "count_tokens", fail)
+        monkeypatch.setattr(compact_history, "count_tokens", fail)
+        assert memory.load_memory_variables({})["chat_history"][-1].content == "Answer 4"
+    
+    def test_save_context_enforces_budget(self):
+        memory = self._memory(max_token_limit=30)
+        for i in range(5):
+            memory.save_context({"input": f"Question {i} " * 10}, {"output": f"Answer {i}"})
+        
+        assert sum(count_tokens(m.content) for m in memory.chat_memory.messages) <= 30 + 30
+        assert memory.summary
+    
+    def test_clear_resets_summary(self):
+        memory = self._memory(k=1)
+        for i in range(3):
+            memory.chat_memory.add_user_message(f"Query {i}")
+            memory.chat_memory.add_ai_message(f"Response {i}")
+        memory.load_memory_variables({})
+        assert memory.summary
+        
+        memory.clear()
+        assert memory.summary == ""
+        assert memory.chat_memory.messages == []
+
+
+class TestChannelBudgets:
+    """Test per-channel budget configuration in ScopedMemoryManager"""
+    
+    def test_default_budgets_per_channel(self):
+        manager = ScopedMemoryManager()
+        assert manager.get_user_memory("s").max_token_limit == manager.token_budgets["user"]
+        assert manager.get_agent_memory("s", "contract").max_token_limit == manager.token_budgets["contract"]
+    
+    def test_budgets_can_be_overridden(self, monkeypatch):
+        monkeypatch.setenv("MEMORY_TOKEN_BUDGET_CLASSIFIER", "123")
+        manager = ScopedMemoryManager(token_budgets={"user": 456}, summary_token_budget=50)
+        
+        assert manager.get_user_memory("s").max_token_limit == 456
+        assert manager.get_agent_memory("s", "classifier").max_token_limit == 123
+        assert manager.get_agent_memory("s", "context").summary_token_limit == 50
@@ -0,0 +1,97 @@
+"""
+Tests for hydrating the user memory channel from conversation_messages
+
+The persisted conversation is the single history source: a session whose
+user channel isn't resident is rebuilt from its transcript on first access.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base, ConversationMessage
+from database import create_message
+from memory.cold_store import DiskColdStore
+from memory.scoped_memory_manager import ScopedMemoryManager
+from memory.transcript import ConversationTranscript
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    start = datetime.utcnow() - timedelta(days=3)
+    db = factory()
+    for turn in range(12):
+        for offset, sender in enumerate(["user", "ai"]):
+            db.add(ConversationMessage(id=str(uuid.uuid4()), session_id="s1", sender=sender,
+                                       message=f"{sender} {turn}", timestamp=start + timedelta(seconds=turn * 2 + offset)))
+    db.commit()
+    db.close()
+    return factory
+
+
+def _manager(session_factory, **kwargs):
+    manager = ScopedMemoryManager(**kwargs)
+    manager.transcript = ConversationTranscript(session_factory=session_factory)
+    return manager
+
+
+class TestTranscriptHydration:
+    """Test that the user channel is rebuilt from the persisted conversation"""
+
+    def test_non_resident_session_is_rebuilt_from_its_transcript(self, session_factory):
+        manager = _manager(session_factory)
+        messages = manager.get_user_memory("s1").chat_memory.messages
+
+        assert len(messages) == manager.transcript.per_session
+        assert [m.content for m in messages[-2:]] == ["user 11", "ai 11"]
+        assert [m.type for m in messages[:2]] == ["human", "ai"]
+        # Only the first access reads the database
+        manager.get_user_memory("s1")
+        assert manager.transcript.loads == 1
+
+    def test_new_sessions_start_empty(self, session_factory):
+        manager = _manager(session_factory)
+        assert manager.get_user_memory("unknown").chat_memory.messages == []
+        assert manager.transcript.loads == 0
+
+    def test_turn_stored_after_the_agent_runs_is_not_duplicated(self, session_factory):
+        manager = _manager(session_factory)
+        memory = manager.get_user_memory("s1")
+        memory.add_exchange("user 12", "ai 12")
+
+        db = session_factory()
+        create_message(db, "s1", "user", "user 12")
+        create_message(db, "s1", "ai", "ai 12")
+        db.close()
+        manager.evict_session("s1")
+
+        contents = [m.content for m in manager.get_user_memory("s1").chat_memory.messages]
+        assert contents[-2:] == ["user 12", "ai 12"]
+        assert contents.count("user 12") == 1
+
+    def test_unanswered_message_of_a_failed_turn_is_skipped(self, session_factory):
+        db = session_factory()
+        create_message(db, "s1", "user", "user 12")
+        db.close()
+
+        # The agent run failed, so the message never reached memory
+        contents = [m.content for m in _manager(session_factory).get_user_memory("s1").chat_memory.messages]
+        assert contents[-2:] == ["user 11", "ai 11"]
+        assert "user 12" not in contents
+
+    def test_spilled_snapshot_is_preferred_over_the_transcript(self, session_factory, tmp_path):
+        manager = _manager(session_factory, cold_store=DiskColdStore(str(tmp_path)))
+        manager.get_user_memory("s1").summary = "earlier: boiler broken"
+        manager.spill_session("s1")
+
+        restored = manager.get_user_memory("s1")
+        assert restored.summary == "earlier: boiler broken"
+        assert manager.transcript.loads == 1
@@ -0,0 +1,134 @@
+"""
+Tests for warm-starting user-channel memory from conversation_messages
+
+Uses an in-memory SQLite database seeded with conversations of different
+ages; a fresh ScopedMemoryManager stands in for the API after a deploy.
+"""
+
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base, ConversationMessage
+from database import create_message, get_recent_histories
+from memory.scoped_memory_manager import ScopedMemoryManager
+from memory.warm_start import WarmStartLoader
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    now = datetime.utcnow()
+    db = factory()
+    for session_id, age_hours, turns in [("recent-a", 1, 15), ("recent-b", 3, 2), ("stale", 72, 3)]:
+        for turn in range(turns):
+            timestamp = now - timedelta(hours=age_hours) + timedelta(seconds=turn * 2)
+            db.add(ConversationMessage(id=str(uuid.uuid4()), session_id=session_id, sender="user",
+                                       message=f"{session_id} question {turn}", timestamp=timestamp))
+            db.add(ConversationMessage(id=str(uuid.uuid4()), session_id=session_id, sender="ai",
+                                       message=f"{session_id} answer {turn}", timestamp=timestamp + timedelta(seconds=1)))
+    db.commit()
+    db.close()
+    return factory
+
+
+def _select_count(session_factory):
+    statements = []
+    event.listen(session_factory.kw["bind"], "before_cursor_execute",
+                 lambda *args: statements.append(args[2]) if args[2].lstrip().upper().startswith("SELECT") else None)
+    return statements
+
+
+class TestBulkQuery:
+    """Test the SQL-side grouping of recent histories"""
+
+    def test_last_messages_per_session_in_chronological_order(self, session_factory):
+        db = session_factory()
+        histories = get_recent_histories(db, ["recent-a", "recent-b"], per_session=4)
+        db.close()
+
+        assert [text for _, text in histories["recent-a"]] == [
+            "recent-a question 13", "recent-a answer 13", "recent-a question 14", "recent-a answer 14"
+        ]
+        assert [sender for sender, _ in histories["recent-b"]] == ["user", "ai", "user", "ai"]
+
+
+class TestWarmStart:
+    """Test the background warm start and on-demand priority loading"""
+
+    def test_recent_sessions_are_warmed_in_two_queries(self, session_factory):
+        manager = ScopedMemoryManager()
+        loader = WarmStartLoader(manager, session_factory=session_factory, hours=24)
+        selects = _select_count(session_factory)
+
+        assert loader.run() == 2
+        assert len(selects) == 2
+        assert set(manager.user_conversations) == {"recent-a", "recent-b"}
+
+        messages = manager.get_user_memory("recent-a").load_memory_variables({})["chat_history"]
+        assert messages[-1].content == "recent-a answer 14"
+        assert [m.type for m in messages[:2]] == ["human", "ai"]
+        # Sessions outside the window start empty
+        assert manager.get_user_memory("stale").chat_memory.messages == []
+
+    def test_resident_sessions_are_not_overwritten(self, session_factory):
+        manager = ScopedMemoryManager()
+        manager.get_user_memory("recent-b").add_exchange("newer turn", "newer answer")
+
+        WarmStartLoader(manager, session_factory=session_factory, hours=24).run()
+        assert [m.content for m in manager.get_user_memory("recent-b").chat_memory.messages] == ["newer turn", "newer answer"]
+
+    def test_session_arriving_first_is_priority_loaded(self, session_factory):
+        manager = ScopedMemoryManager()
+        loader = WarmStartLoader(manager, session_factory=session_factory, hours=24)
+
+        # The tenant's message lands before the bulk load has even listed sessions
+        memory = manager.get_user_memory("recent-b")
+        assert memory.chat_memory.messages[0].content == "recent-b question 0"
+        assert loader.priority_loads == 1
+
+        memory.add_exchange("follow-up", "reply")
+        loader.run()
+        assert loader.warmed_sessions == 1
+        assert manager.get_user_memory("recent-b").chat_memory.messages[-1].content == "reply"
+
+    def test_claim_skips_an_unanswered_message(self, session_factory):
+        # A failed turn stores the tenant's message alone; the agent never added it to memory
+        db = session_factory()
+        create_message(db, "recent-b", "user", "is anyone there?")
+        db.close()
+        manager = ScopedMemoryManager()
+        WarmStartLoader(manager, session_factory=session_factory, hours=24)
+
+        contents = [m.content for m in manager.get_user_memory("recent-b").chat_memory.messages]
+        assert contents[-1] == "recent-b answer 1"
+        assert "is anyone there?" not in contents
+
+    def test_bulk_load_skips_an_unanswered_message(self, session_factory):
+        db = session_factory()
+        create_message(db, "recent-b", "user", "is anyone there?")
+        db.close()
+        manager = ScopedMemoryManager()
+        WarmStartLoader(manager, session_factory=session_factory, hours=24).run()
+
+        assert manager.get_user_memory("recent-b").chat_memory.messages[-1].content == "recent-b answer 1"
+
+    def test_startup_does_not_wait_for_the_warm_start(self, session_factory):
+        release = threading.Event()
+        slow_factory = lambda: (release.wait(5), session_factory())[1]
+        manager = ScopedMemoryManager()
+        loader = WarmStartLoader(manager, session_factory=slow_factory, hours=24)
+
+        loader.start()
+        assert not loader.done
+        release.set()
+        assert loader.wait(5)
+        assert set(manager.user_conversations) == {"recent-a", "recent-b"}
@@ -0,0 +1,160 @@
+"""
+Tests for archiving idle conversations and restoring them on read
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip("zstandard")
+
+import database
+from archive import decode_archive, encode_archive, merge_rows
+from database import get_chat_history, get_chat_page, insert_messages, persist_turn
+from history_cache import HistoryCache
+from models import Base, ConversationArchive, ConversationMessage
+from worker.jobs.archive_sessions import archive_idle_sessions
+
+NOW = datetime.utcnow()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'archive.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    db = factory()
+    for session_id, age_days, count in [("idle", 200, 40), ("active", 1, 4)]:
+        start = NOW - timedelta(days=age_days)
+        insert_messages(db, [{"id": f"{session_id}-{i:03d}", "session_id": session_id,
+                              "sender": "user" if i % 2 == 0 else "ai", "message": f"{session_id} message {i}",
+                              "timestamp": start + timedelta(seconds=i)} for i in range(count)])
+    db.close()
+    return factory
+
+
+def _hot_count(db, session_id):
+    return db.query(ConversationMessage).filter(ConversationMessage.session_id == session_id).count()
+
+
+class TestCodec:
+    """Test the compressed archive format"""
+
+    def test_round_trip_and_compression(self):
+        rows = [{"id": f"m{i}", "session_id": "s1", "sender": "user", "message": "the boiler is leaking again",
+                 "timestamp": NOW + timedelta(seconds=i)} for i in range(200)]
+        blob = encode_archive(rows)
+        assert decode_archive(blob) == rows
+        assert len(blob) * 10 < len(str(rows))
+
+    def test_merge_is_chronological_and_deduplicated(self):
+        a = {"id": "a", "timestamp": NOW}
+        b = {"id": "b", "timestamp": NOW + timedelta(seconds=1)}
+        assert merge_rows([b], [a, b]) == [a, b]
+
+
+class TestArchiveJob:
+    """Test moving idle sessions to the archive"""
+
+    def test_only_idle_sessions_are_archived(self, session_factory):
+        assert archive_idle_sessions(session_factory, after_days=90) == 40
+
+        db = session_factory()
+        assert _hot_count(db, "idle") == 0
+        assert _hot_count(db, "active") == 4
+        archived = db.get(ConversationArchive, "idle")
+        assert archived.message_count == 40
+        assert decode_archive(archived.messages)[-1]["message"] == "idle message 39"
+        db.close()
+
+        assert archive_idle_sessions(session_factory, after_days=90) == 0
+
+    def test_zero_days_disables_archiving(self, session_factory):
+        assert archive_idle_sessions(session_factory, after_days=0) == 0
+
+
+class TestRestore:
+    """Test that reads restore archived sessions transparently"""
+
+    def test_history_read_restores_the_session(self, session_factory):
+        archive_idle_sessions(session_factory, after_days=90)
+        db = session_factory()
+
+        history = get_chat_history(db, "idle", limit=5)
+        assert [m.message for m in history] == [f"idle message {i}" for i in range(39, 34, -1)]
+        assert _hot_count(db, "idle") == 40
+        assert db.get(ConversationArchive, "idle") is None
+        db.close()
+
+    def test_restored_session_is_not_archived_again_at_once(self, session_factory):
+        archive_idle_sessions(session_factory, after_days=90)
+        db = session_factory()
+        get_chat_history(db, "idle", limit=5)
+        db.close()
+
+        assert archive_idle_sessions(session_factory, after_days=90) == 0
+        db = session_factory()
+        assert _hot_count(db, "idle") == 40
+        db.close()
+
+    def test_short_history_of_unarchived_session_skips_the_archive(self, session_factory, monkeypatch):
+        db = session_factory()
+        monkeypatch.setattr(db, "get", lambda *args: pytest.fail("looked up the archive"))
+        assert len(get_chat_history(db, "active", limit=10)) == 4
+        db.close()
+
+    def test_new_turn_on_archived_session_keeps_old_history(self, session_factory):
+        archive_idle_sessions(session_factory, after_days=90)
+        db = session_factory()
+        persist_turn(db, "idle", "I'm back", "Welcome back")
+
+        history = get_chat_history(db, "idle", limit=3)
+        assert [m.message for m in history] == ["Welcome back", "I'm back", "idle message 39"]
+        db.close()
+
+    def test_paging_back_past_hot_rows_restores(self, session_factory):
+        archive_idle_sessions(session_factory, after_days=90)
+        db = session_factory()
+        persist_turn(db, "idle", "I'm back", "Welcome back")
+
+        latest, has_more = get_chat_page(db, "idle", limit=2)
+        assert [m.message for m in latest] == ["I'm back", "Welcome back"]
+        older, has_more = get_chat_page(db, "idle", limit=2, before=(latest[0].timestamp, latest[0].id))
+        assert [m.message for m in older] == ["idle message 38", "idle message 39"]
+        assert has_more
+        db.close()
+
+    def test_async_read_restores(self, session_factory):
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from database import aget_chat_history
+
+        archive_idle_sessions(session_factory, after_days=90)
+        url = str(session_factory.kw["bind"].url).replace("sqlite://", "sqlite+aiosqlite://")
+
+        async def main():
+            engine = create_async_engine(url)
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                history = await aget_chat_history(db, "idle", limit=2)
+            await engine.dispose()
+            return history
+
+        assert [m.message for m in asyncio.run(main())] == ["idle message 39", "idle message 38"]
+
+    def test_archiving_evicts_the_cached_window(self, session_factory, monkeypatch):
+        fakeredis = pytest.importorskip("fakeredis")
+        cache = HistoryCache(fakeredis.FakeRedis(), size=10)
+        monkeypatch.setattr(database, "get_history_cache", lambda: cache)
+
+        db = session_factory()
+        get_chat_history(db, "idle", limit=5)
+        assert cache.window("idle") is not None
+        archive_idle_sessions(session_factory, after_days=90)
+        assert cache.redis.exists("chat:history:idle") == 0
+
+        assert get_chat_history(db, "idle", limit=5)[0].message == "idle message 39"
+        db.close()
@@ -0,0 +1,72 @@
+"""
+Tests for the async database helpers and engine configuration
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from models import Base, async_database_url, pool_options
+from database import (
+    acreate_message, aget_chat_history, aget_session_memory, aset_session_memory, aupsert_session_memories
+)
+
+
+def run_with_session(test):
+    """Run an async test body against a fresh in-memory database"""
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            result = await test(db)
+        await engine.dispose()
+        return result
+    return asyncio.run(main())
+
+
+class TestAsyncHelpers:
+    """Test the async message and session-memory helpers"""
+
+    def test_messages_round_trip_newest_first(self):
+        async def test(db):
+            start = datetime(2026, 1, 1)
+            for i in range(4):
+                await acreate_message(db, "s1", "user" if i % 2 == 0 else "ai", f"message {i}", timestamp=start + timedelta(seconds=i))
+            await acreate_message(db, "s2", "user", "other session")
+            return await aget_chat_history(db, "s1", limit=3)
+
+        history = run_with_session(test)
+        assert [m.message for m in history] == ["message 3", "message 2", "message 1"]
+
+    def test_session_memory_upserts(self):
+        async def test(db):
+            assert await aget_session_memory(db, "s1") == {}
+            await aset_session_memory(db, "s1", {"v": 1})
+            await aupsert_session_memories(db, {"s1": {"v": 2}, "s2": {"v": 1}})
+            return await aget_session_memory(db, "s1"), await aget_session_memory(db, "s2")
+
+        assert run_with_session(test) == ({"v": 2}, {"v": 1})
+
+
+class TestEngineConfiguration:
+    """Test the async URL mapping and environment-driven pool settings"""
+
+    def test_async_driver_urls(self):
+        assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+        assert async_database_url("postgresql+psycopg2://u@db/app") == "postgresql+asyncpg://u@db/app"
+        assert async_database_url("sqlite:///app.db") == "sqlite+aiosqlite:///app.db"
+
+    def test_pool_options_from_environment(self, monkeypatch):
+        monkeypatch.setenv("DB_POOL_SIZE", "20")
+        monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+        options = pool_options()
+        assert options["pool_size"] == 20
+        assert options["max_overflow"] == 10
+        assert options["pool_pre_ping"] is False
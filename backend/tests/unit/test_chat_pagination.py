@@ -0,0 +1,83 @@
+"""
+Tests for keyset-paginated chat history
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base, ConversationMessage
+from database import decode_cursor, encode_cursor, get_chat_page
+
+START = datetime(2026, 1, 1, 9, 0, 0)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    for i in range(25):
+        # Pairs of messages share a timestamp, so the id has to break ties
+        session.add(ConversationMessage(id=f"m{i:03d}", session_id="s1", sender="user" if i % 2 == 0 else "ai",
+                                        message=f"message {i}", timestamp=START + timedelta(seconds=i // 2)))
+    session.add(ConversationMessage(id=str(uuid.uuid4()), session_id="other", sender="user", message="x", timestamp=START))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _texts(messages):
+    return [m.message for m in messages]
+
+
+def _key(message):
+    return message.timestamp, message.id
+
+
+class TestKeysetPagination:
+    """Test paging backwards, forwards and from a point in time"""
+
+    def test_latest_page_then_scroll_back_to_the_start(self, db):
+        messages, has_more = get_chat_page(db, "s1", limit=10)
+        assert _texts(messages) == [f"message {i}" for i in range(15, 25)]
+        assert has_more
+
+        seen = list(messages)
+        while has_more:
+            messages, has_more = get_chat_page(db, "s1", limit=10, before=_key(seen[0]))
+            seen = messages + seen
+        assert _texts(seen) == [f"message {i}" for i in range(25)]
+
+    def test_delta_sync_returns_only_new_messages(self, db):
+        latest, _ = get_chat_page(db, "s1", limit=5)
+        cursor = _key(latest[-1])
+        assert get_chat_page(db, "s1", after=cursor) == ([], False)
+
+        db.add(ConversationMessage(id="m999", session_id="s1", sender="user", message="new", timestamp=latest[-1].timestamp))
+        db.commit()
+        messages, has_more = get_chat_page(db, "s1", after=cursor)
+        assert _texts(messages) == ["new"] and not has_more
+
+    def test_forward_pages_from_a_timestamp(self, db):
+        messages, has_more = get_chat_page(db, "s1", limit=4, after=(START + timedelta(seconds=10), ""))
+        assert _texts(messages) == ["message 20", "message 21", "message 22", "message 23"]
+        assert has_more
+
+
+class TestCursors:
+    """Test the opaque cursor encoding"""
+
+    def test_round_trip(self):
+        timestamp = datetime(2026, 3, 4, 5, 6, 7, 891011)
+        cursor = encode_cursor(timestamp, "abc|def")
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (timestamp, "abc|def")
+
+    def test_malformed_cursor(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
@@ -0,0 +1,150 @@
+"""
+Unit tests for the context agent's structured output handling
+
+Tests the schema-bound invocation path and the local JSON repair step
+that replaces the old parse-or-fallback behaviour.
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from agents.context_agent import (
+    ContextResponse,
+    repair_context_response,
+    invoke_context_llm,
+    SYSTEM_PROMPT,
+)
+
+
+VALID_RESPONSE = {
+    "is_clear": True,
+    "is_relevant": True,
+    "requires_clarification": False,
+    "clarifying_question": "",
+    "requires_context": True,
+    "additional_context_question": "Which room is affected?",
+    "query_summary": "Tenant reports a leak.",
+}
+
+
+class TestRepairContextResponse:
+    """Test the local repair step for malformed JSON"""
+
+    def test_valid_json_passes_through(self):
+        import json
+        assert repair_context_response(json.dumps(VALID_RESPONSE)) == VALID_RESPONSE
+
+    def test_code_fence_and_prose_are_stripped(self):
+        text = ('Sure! Here you go:\n```json\n{"is_clear": true, "is_relevant": true, "requires_clarification": false, '
+                '"requires_context": false, "query_summary": "Leak"}\n```')
+        result = repair_context_response(text)
+        assert result["is_clear"] is True
+        assert result["query_summary"] == "Leak"
+
+    def test_python_literals_and_trailing_commas(self):
+        text = ("{'is_clear': True, 'is_relevant': False, 'requires_clarification': False, "
+                "'requires_context': False, 'query_summary': 'Mould', }")
+        result = repair_context_response(text)
+        assert result["is_clear"] is True
+        assert result["is_relevant"] is False
+        assert result["query_summary"] == "Mould"
+
+    def test_missing_text_fields_get_defaults(self):
+        result = repair_context_response('{"is_clear": true, "is_relevant": true, "requires_clarification": false, '
+                                         '"requires_context": false, "query_summary": "x"}')
+        assert set(result) == set(ContextResponse.model_fields)
+        assert result["clarifying_question"] == ""
+        assert result["additional_context_question"] == ""
+
+    def test_missing_booleans_fail_the_repair(self):
+        with pytest.raises(ValueError, match="is_relevant, requires_context"):
+            repair_context_response('{"is_clear": true, "requires_clarification": false, "query_summary": "x"}')
+        with pytest.raises(ValueError, match="is_clear"):
+            repair_context_response('{"is_clear": "maybe", "is_relevant": true, "requires_clarification": false, '
+                                    '"requires_context": false}')
+
+    def test_string_booleans_are_coerced(self):
+        result = repair_context_response('{"is_clear": "true", "is_relevant": "yes", "requires_clarification": 0, '
+                                         '"requires_context": "no"}')
+        assert result["is_clear"] is True
+        assert result["requires_clarification"] is False
+        assert result["requires_context"] is False
+
+    def test_unrecoverable_output_raises(self):
+        with pytest.raises(ValueError):
+            repair_context_response("I can't help with that.")
+        with pytest.raises(ValueError):
+            repair_context_response(None)
+
+
+class TestInvokeContextLLM:
+    """Test the schema-bound LLM invocation"""
+
+    def test_parsed_output_is_returned(self):
+        with patch("agents.context_agent.get_llm") as mock_llm:
+            mock_llm.return_value.with_structured_output.return_value.invoke.return_value = {
+                "raw": MagicMock(),
+                "parsed": ContextResponse(**VALID_RESPONSE),
+                "parsing_error": None,
+            }
+            assert invoke_context_llm([]) == VALID_RESPONSE
+            _, kwargs = mock_llm.return_value.with_structured_output.call_args
+            assert kwargs["include_raw"] is True
+
+    def test_malformed_tool_arguments_are_repaired(self):
+        raw = MagicMock()
+        raw.invalid_tool_calls = [{"args": '{"is_clear": true, "is_relevant": true, "requires_clarification": false, '
+                                           '"requires_context": false, "query_summary": "Cold radiators",}'}]
+        with patch("agents.context_agent.get_llm") as mock_llm:
+            mock_llm.return_value.with_structured_output.return_value.invoke.return_value = {
+                "raw": raw,
+                "parsed": None,
+                "parsing_error": ValueError("bad json"),
+            }
+            result = invoke_context_llm([])
+            assert result["query_summary"] == "Cold radiators"
+            assert result["is_clear"] is True
+
+    def test_prompt_no_longer_embeds_format_instructions(self):
+        assert "{format_instructions}" not in SYSTEM_PROMPT
+
+
+class TestIncrementalIssueState:
+    """Test that the dual-memory context agent sends a flat-sized issue record"""
+
+    def _turn(self, **overrides):
+        turn = dict(VALID_RESPONSE, what="", where="", when="", how="", attempts="", outstanding_questions=[])
+        turn.update(overrides)
+        return turn
+
+    def test_issue_record_is_updated_and_prompt_stays_flat(self):
+        from agents.context_agent import (
+            run_context_agent_with_dual_memory,
+            get_issue_record,
+            ContextTurnResponse,
+        )
+        session_id = "test_issue_state_session"
+        turns = [
+            self._turn(query_summary="Leak in kitchen", what="leak", where="kitchen", outstanding_questions=["when", "attempts"]),
+            self._turn(query_summary="Leak in kitchen since Monday", what="leak", where="kitchen", when="Monday", outstanding_questions=["attempts"]),
+        ]
+        prompt_sizes = []
+
+        def fake_invoke(messages):
+            prompt_sizes.append(sum(len(m.content) for m in messages))
+            return {"raw": MagicMock(), "parsed": ContextTurnResponse(**turns[len(prompt_sizes) - 1]), "parsing_error": None}
+
+        with patch("agents.context_agent.get_llm") as mock_llm:
+            mock_llm.return_value.with_structured_output.return_value.invoke.side_effect = fake_invoke
+            first = run_context_agent_with_dual_memory("kitchen leak", session_id, "My kitchen is leaking")
+            second = run_context_agent_with_dual_memory("kitchen leak since monday", session_id, "It started Monday")
+
+        assert set(first) == set(ContextResponse.model_fields)
+        assert second["query_summary"] == "Leak in kitchen since Monday"
+
+        record = get_issue_record(session_id)
+        assert record["when"] == "Monday"
+        assert record["outstanding_questions"] == ["attempts"]
+
+        # Only the compact record grows, not the replayed conversation history
+        assert prompt_sizes[1] - prompt_sizes[0] < 200
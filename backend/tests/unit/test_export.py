@@ -0,0 +1,112 @@
+"""
+Tests for the streaming NDJSON/Parquet conversation export
+"""
+
+import asyncio
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, ConversationMessage
+from export import iter_message_batches, write_ndjson, write_parquet
+
+START = datetime(2026, 9, 1)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'export.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    db = factory()
+    for i in range(250):
+        db.add(ConversationMessage(id=f"m{i:04d}", session_id=f"s{i % 5}", sender="user" if i % 2 == 0 else "ai",
+                                   message=f"message {i}", timestamp=START + timedelta(hours=i)))
+    db.commit()
+    db.close()
+    return factory
+
+
+def _export_ndjson(db, *args, **kwargs):
+    out = io.BytesIO()
+    count = write_ndjson(iter_message_batches(db, *args, **kwargs), out)
+    return count, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+class TestExport:
+    """Test range selection, ordering and batching"""
+
+    def test_range_is_half_open_and_grouped_by_session(self, session_factory):
+        db = session_factory()
+        count, rows = _export_ndjson(db, START + timedelta(hours=10), START + timedelta(hours=20))
+        db.close()
+
+        assert count == len(rows) == 10
+        assert [row["session_id"] for row in rows] == sorted(row["session_id"] for row in rows)
+        assert rows[0] == {"id": "m0010", "session_id": "s0", "sender": "user", "message": "message 10",
+                           "timestamp": "2026-09-01T10:00:00"}
+
+    def test_session_filter(self, session_factory):
+        db = session_factory()
+        _, rows = _export_ndjson(db, START, START + timedelta(days=30), session_ids=["s1", "s3"])
+        db.close()
+        assert {row["session_id"] for row in rows} == {"s1", "s3"}
+        assert len(rows) == 100
+
+    def test_rows_are_fetched_in_batches(self, session_factory):
+        db = session_factory()
+        sizes = [len(batch) for batch in iter_message_batches(db, START, START + timedelta(days=30), batch_size=100)]
+        db.close()
+        assert sizes == [100, 100, 50]
+
+    def test_archived_sessions_are_included(self, session_factory):
+        pytest.importorskip("zstandard")
+        from database import archive_session
+
+        db = session_factory()
+        assert archive_session(db, "s2", START + timedelta(days=30)) == 50
+        _, rows = _export_ndjson(db, START, START + timedelta(hours=50))
+        _, hot_only = _export_ndjson(db, START, START + timedelta(hours=50), include_archived=False)
+        db.close()
+
+        assert len(rows) == 50
+        assert [row["session_id"] for row in rows[-10:]] == ["s2"] * 10
+        assert len(hot_only) == 40
+
+    def test_parquet_has_a_row_group_per_batch(self, session_factory, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        db = session_factory()
+        path = tmp_path / "messages.parquet"
+        count = write_parquet(iter_message_batches(db, START, START + timedelta(days=30), batch_size=100), str(path))
+        db.close()
+
+        parquet = pq.ParquetFile(path)
+        assert count == parquet.metadata.num_rows == 250
+        assert parquet.metadata.num_row_groups == 3
+        table = parquet.read()
+        assert table.column("timestamp")[0].as_py() == START
+
+    def test_async_export_matches_sync(self, session_factory):
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from export import aiter_message_batches
+
+        url = str(session_factory.kw["bind"].url).replace("sqlite://", "sqlite+aiosqlite://")
+
+        async def main():
+            engine = create_async_engine(url)
+            async with async_sessionmaker(engine)() as db:
+                batches = [batch async for batch in aiter_message_batches(db, START, START + timedelta(days=30), batch_size=100)]
+            await engine.dispose()
+            return batches
+
+        batches = asyncio.run(main())
+        assert [len(batch) for batch in batches] == [100, 100, 50]
+        db = session_factory()
+        assert [row for batch in batches for row in batch] == [row for batch in iter_message_batches(db, START, START + timedelta(days=30)) for row in batch]
+        db.close()
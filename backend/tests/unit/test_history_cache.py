@@ -0,0 +1,121 @@
+"""
+Tests for the Redis read-through cache of recent chat history
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import database
+from database import create_message, get_chat_history, get_chat_page, insert_messages, persist_turn
+from history_cache import HistoryCache
+from models import Base, ConversationMessage
+
+START = datetime(2026, 1, 1, 9, 0, 0)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    for i in range(30):
+        session.add(ConversationMessage(id=f"m{i:03d}", session_id="s1", sender="user" if i % 2 == 0 else "ai",
+                                        message=f"message {i}", timestamp=START + timedelta(seconds=i)))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = HistoryCache(fakeredis.FakeRedis(), size=10)
+    monkeypatch.setattr(database, "get_history_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def selects(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda *args: statements.append(args[2]) if args[2].lstrip().upper().startswith("SELECT") else None)
+    return statements
+
+
+def _texts(messages):
+    return [m.message for m in messages]
+
+
+class TestReadThrough:
+    """Test that hot sessions are served from Redis"""
+
+    def test_hot_session_reads_skip_the_database(self, db, cache, selects):
+        assert _texts(get_chat_history(db, "s1", limit=5)) == [f"message {i}" for i in range(29, 24, -1)]
+        assert len(selects) == 1
+
+        create_message(db, "s1", "user", "new question", timestamp=START + timedelta(minutes=5))
+        persist_turn(db, "s1", "another", "answer", received_at=START + timedelta(minutes=6))
+        reads_before = len(selects)
+
+        assert _texts(get_chat_history(db, "s1", limit=3)) == ["answer", "another", "new question"]
+        messages, has_more = get_chat_page(db, "s1", limit=4)
+        assert _texts(messages) == ["message 29", "new question", "another", "answer"] and has_more
+        delta, has_more = get_chat_page(db, "s1", after=(messages[0].timestamp, messages[0].id))
+        assert _texts(delta) == ["new question", "another", "answer"] and not has_more
+        assert len(selects) == reads_before
+        assert cache.hits == 3
+
+    def test_pages_outside_the_window_come_from_the_database(self, db, cache, selects):
+        get_chat_history(db, "s1")  # larger than the cache window
+        assert cache.hits == cache.misses == 0
+
+        get_chat_page(db, "s1", limit=5)
+        reads = len(selects)
+        older, _ = get_chat_page(db, "s1", limit=5, before=(START + timedelta(seconds=10), "m010"))
+        assert _texts(older) == [f"message {i}" for i in range(5, 10)]
+        stale_cursor, has_more = get_chat_page(db, "s1", limit=3, after=(START, "m000"))
+        assert _texts(stale_cursor) == ["message 1", "message 2", "message 3"] and has_more
+        assert len(selects) == reads + 2
+
+    def test_writes_only_extend_cached_sessions(self, db, cache):
+        create_message(db, "fresh", "user", "hello")
+        assert cache.window("fresh") is None
+        assert _texts(get_chat_history(db, "fresh")) == ["hello"]
+
+
+class TestConsistency:
+    """Test the fill race guard and failure fallbacks"""
+
+    def test_fill_is_refused_after_a_concurrent_write(self, cache):
+        version = cache.version("s1")
+        cache.append([{"id": "x", "session_id": "s1", "sender": "user", "message": "racing", "timestamp": START}])
+        rows = [{"id": "a", "session_id": "s1", "sender": "user", "message": "stale", "timestamp": START}]
+        assert not cache.fill("s1", rows, version)
+        assert cache.fill("s1", rows, cache.version("s1"))
+
+    def test_redelivered_rows_force_a_refill(self, db, cache, selects):
+        get_chat_history(db, "s1", limit=5)
+        row = {"id": "dup", "session_id": "s1", "sender": "ai", "message": "once", "timestamp": START + timedelta(hours=1)}
+        insert_messages(db, [row])
+        insert_messages(db, [row])
+        reads = len(selects)
+        assert _texts(get_chat_history(db, "s1", limit=2)) == ["once", "message 29"]
+        assert len(selects) == reads + 1
+
+    def test_redis_failure_falls_back_to_the_database(self, db, monkeypatch):
+        class BrokenRedis:
+            def __getattr__(self, name):
+                raise ConnectionError("redis is down")
+
+        monkeypatch.setattr(database, "get_history_cache", lambda: HistoryCache(BrokenRedis(), size=10))
+        create_message(db, "s1", "user", "still stored", timestamp=START + timedelta(hours=1))
+        assert _texts(get_chat_history(db, "s1", limit=1)) == ["still stored"]
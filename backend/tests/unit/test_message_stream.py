@@ -0,0 +1,154 @@
+"""
+Tests for the write-behind message stream and the worker drain job
+
+Uses fakeredis for the stream and an in-memory SQLite database for
+conversation_messages.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import message_stream
+from message_stream import MessageStream, merge_pending
+from models import Base
+from database import build_turn_rows, get_chat_history, insert_messages
+from worker.jobs.drain_messages import drain_message_stream
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeRedis()
+
+
+def _history(session_factory, session_id):
+    db = session_factory()
+    try:
+        return [(m.sender, m.message) for m in reversed(get_chat_history(db, session_id))]
+    finally:
+        db.close()
+
+
+class TestWriteBehind:
+    """Test that appended turns reach Postgres and stay readable meanwhile"""
+
+    def test_pending_turn_is_merged_into_reads_until_drained(self, redis, session_factory):
+        stream = MessageStream(redis, consumer="api")
+        db = session_factory()
+        insert_messages(db, build_turn_rows("s1", "first", "reply one", datetime.utcnow() - timedelta(minutes=5)))
+        db.close()
+        stream.append(build_turn_rows("s1", "second", "reply two"))
+
+        assert _history(session_factory, "s1") == [("user", "first"), ("ai", "reply one")]
+        db = session_factory()
+        rows = [{"id": m.id, "sender": m.sender, "message": m.message, "timestamp": m.timestamp}
+                for m in reversed(get_chat_history(db, "s1"))]
+        db.close()
+        merged = merge_pending(rows, stream.pending_rows("s1"))
+        assert [row["message"] for row in merged] == ["first", "reply one", "second", "reply two"]
+
+        assert drain_message_stream(MessageStream(redis, consumer="worker"), session_factory) == 2
+        assert _history(session_factory, "s1")[-2:] == [("user", "second"), ("ai", "reply two")]
+        assert stream.pending_rows("s1") == []
+        assert stream.backlog() == 0
+
+    def test_unacknowledged_entries_are_redelivered_without_duplicates(self, redis, session_factory, monkeypatch):
+        MessageStream(redis).append(build_turn_rows("s1", "hello", "hi"))
+
+        # A worker inserts the batch but dies before acknowledging it
+        crashed = MessageStream(redis, consumer="crashed")
+        batch = crashed.read_batch(10)
+        db = session_factory()
+        insert_messages(db, [row for _, row in batch])
+        db.close()
+
+        monkeypatch.setattr(message_stream, "PENDING_CLAIM_IDLE_MS", 0)
+        assert drain_message_stream(MessageStream(redis, consumer="replacement"), session_factory) == 2
+        assert _history(session_factory, "s1") == [("user", "hello"), ("ai", "hi")]
+        assert MessageStream(redis).pending_rows("s1") == []
+
+    def test_merge_skips_rows_already_drained(self):
+        now = datetime.utcnow()
+        stored = [{"id": "a", "timestamp": now}]
+        pending = [{"id": "b", "timestamp": now + timedelta(seconds=1)}, {"id": "a", "timestamp": now}]
+        assert [row["id"] for row in merge_pending(stored, pending)] == ["a", "b"]
+
+
+class TestBadRows:
+    """Test that a row that can't be inserted doesn't hold back the rest"""
+
+    def test_undecodable_entry_is_dead_lettered(self, redis, session_factory):
+        MessageStream(redis).append(build_turn_rows("s2", "hi", "hello")[1:])
+        redis.xadd(message_stream.STREAM_KEY, {"id": "bad", "session_id": "s2", "sender": "user",
+                                                "message": "hi", "timestamp": "not a time"})
+        stream = MessageStream(redis, consumer="worker")
+        assert drain_message_stream(stream, session_factory) == 1
+        assert stream.backlog() == 0
+        dead = redis.xrange(message_stream.DEAD_LETTER_KEY)
+        assert len(dead) == 1 and b"undecodable" in dead[0][1][b"error"]
+
+    def test_good_rows_land_and_a_failing_row_is_dead_lettered(self, redis, session_factory, monkeypatch):
+        import worker.jobs.drain_messages as drain
+        real_insert = drain._insert
+
+        def insert(session_factory, rows):
+            if any(row["message"] == "poison" for row in rows):
+                raise ValueError("bad row")
+            real_insert(session_factory, rows)
+
+        monkeypatch.setattr(drain, "_insert", insert)
+        monkeypatch.setattr(message_stream, "PENDING_CLAIM_IDLE_MS", 0)
+        MessageStream(redis).append(build_turn_rows("s1", "poison", "reply"))
+        stream = MessageStream(redis, consumer="worker")
+
+        assert drain_message_stream(stream, session_factory) == 1
+        assert _history(session_factory, "s1") == [("ai", "reply")]
+        # Redelivered until the delivery limit, then moved aside
+        for _ in range(drain.DRAIN_MAX_DELIVERIES):
+            drain_message_stream(stream, session_factory)
+        assert stream.backlog() == 0
+        assert json.loads(redis.xrange(message_stream.DEAD_LETTER_KEY)[0][1][b"row"])["message"] == "poison"
+        assert stream.pending_rows("s1") == []
+
+
+class TestWorkerScheduling:
+    """Test that a slow job doesn't hold up the drain"""
+
+    def test_drain_keeps_running_during_a_slow_job(self, monkeypatch):
+        monkeypatch.syspath_prepend(str(Path(__file__).resolve().parents[2] / "worker"))
+        from worker import worker
+
+        drains, stop = [], threading.Event()
+        slow_started = threading.Event()
+
+        def slow_summarize():
+            slow_started.set()
+            stop.wait(5)  # an LLM call that outlasts the test
+
+        monkeypatch.setattr(worker, "JOBS", [("summarize_memory", slow_summarize, 30),
+                                             ("drain_messages", lambda: drains.append(1), 0.05)])
+        thread = threading.Thread(target=worker.run_forever, args=(stop,))
+        thread.start()
+        slow_started.wait(1)
+        time.sleep(0.5)
+        stop.set()
+        thread.join(5)
+
+        assert len(drains) >= 5
+        assert not thread.is_alive()
@@ -0,0 +1,66 @@
+"""
+Tests for the Alembic migrations that own the database schema
+"""
+
+import pytest
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, create_engine, inspect, text
+
+pytest.importorskip("alembic")
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+
+from migrations import upgrade_database
+from models import Base
+
+HISTORY_INDEX = "ix_conversation_messages_session_id_timestamp"
+
+
+def _indexes(engine):
+    return {index["name"]: index["column_names"] for index in inspect(engine).get_indexes("conversation_messages")}
+
+
+class TestMigrations:
+    """Test upgrading fresh and create_all-era databases"""
+
+    def test_fresh_database_gets_tables_and_history_index(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'fresh.db'}"
+        upgrade_database(url)
+
+        engine = create_engine(url)
+        assert {"conversation_messages", "session_memory", "alembic_version"} <= set(inspect(engine).get_table_names())
+        assert _indexes(engine) == {HISTORY_INDEX: ["session_id", "timestamp"]}
+
+    def test_create_all_database_is_upgraded_in_place(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'legacy.db'}"
+        engine = create_engine(url)
+        # The schema as Base.metadata.create_all used to create it
+        legacy = MetaData()
+        Table("conversation_messages", legacy,
+              Column("id", String, primary_key=True), Column("session_id", String, index=True),
+              Column("sender", String), Column("message", Text), Column("timestamp", DateTime))
+        Table("session_memory", legacy, Column("session_id", String, primary_key=True), Column("memory_json", Text))
+        legacy.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(text("INSERT INTO conversation_messages (id, session_id, sender, message) VALUES ('1', 's1', 'user', 'hi')"))
+
+        upgrade_database(url)
+
+        assert _indexes(engine) == {HISTORY_INDEX: ["session_id", "timestamp"]}
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT message FROM conversation_messages")).scalar() == "hi"
+            # The row written before timestamps had a default is filed under the upgrade time
+            assert connection.execute(text("SELECT timestamp FROM conversation_messages")).scalar() is not None
+            plan = " ".join(str(row) for row in connection.execute(text(
+                "EXPLAIN QUERY PLAN SELECT * FROM conversation_messages WHERE session_id = 's1' ORDER BY timestamp DESC LIMIT 5"
+            )))
+        assert HISTORY_INDEX in plan and "TEMP B-TREE" not in plan
+
+    def test_migrated_schema_matches_the_models(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'fresh.db'}"
+        upgrade_database(url)
+
+        engine = create_engine(url)
+        with engine.connect() as connection:
+            assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+        assert inspect(engine).get_pk_constraint("conversation_messages")["constrained_columns"] == ["id", "timestamp"]
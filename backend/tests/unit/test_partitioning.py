@@ -0,0 +1,110 @@
+"""
+Tests for UUIDv7 message ids and the monthly partition helpers
+
+Partition DDL only runs on Postgres; here the generated SQL and the
+composite (id, timestamp) key are checked against SQLite.
+"""
+
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from ids import uuid7, uuid7_time
+from models import Base, ConversationMessage
+from database import build_turn_rows, insert_messages
+import partitions
+
+
+class TestUuid7:
+    """Test time-ordered id generation"""
+
+    def test_version_and_variant(self):
+        value = uuid.UUID(uuid7())
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+
+    def test_ids_are_monotonic_as_text(self):
+        ids = [uuid7() for _ in range(10_000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+
+    def test_encodes_creation_time(self):
+        before = datetime.utcnow() - timedelta(milliseconds=1)
+        created = uuid7_time(uuid7())
+        assert before <= created <= datetime.utcnow() + timedelta(milliseconds=1)
+
+    def test_turn_rows_sort_by_id_like_by_timestamp(self):
+        user, ai = build_turn_rows("session-1", "hi", "hello")
+        assert user["id"] < ai["id"]
+
+
+class TestPartitionHelpers:
+    """Test partition naming and range DDL"""
+
+    def test_month_arithmetic(self):
+        assert partitions.add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert partitions.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+        assert partitions.months_between(datetime(2026, 11, 20), date(2027, 1, 5)) == [
+            date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1)
+        ]
+
+    def test_name_round_trip(self):
+        name = partitions.partition_name(date(2026, 3, 1))
+        assert name == "conversation_messages_y2026m03"
+        assert partitions.partition_month(name) == date(2026, 3, 1)
+        assert partitions.partition_month("conversation_messages") is None
+
+    def test_partition_covers_one_month(self):
+        sql = partitions.create_partition_sql(date(2026, 12, 1))
+        assert "PARTITION OF conversation_messages" in sql
+        assert "FROM ('2026-12-01') TO ('2027-01-01')" in sql
+
+    def test_current_month_is_never_detached(self):
+        engine = create_engine("sqlite://")
+        try:
+            partitions.detach_partition(engine, partitions.month_start(datetime.utcnow()))
+        except ValueError as e:
+            assert "current or a future month" in str(e)
+        else:
+            raise AssertionError("detaching the current month should be refused")
+
+    def test_sqlite_is_left_alone(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as connection:
+            assert not partitions.is_partitioned(connection)
+            assert partitions.ensure_partitions(connection) == []
+
+    def test_past_months_are_recreated(self, monkeypatch):
+        class Connection:
+            executed = []
+
+            def execute(self, statement):
+                self.executed.append(str(statement))
+
+        monkeypatch.setattr(partitions, "is_partitioned", lambda connection: True)
+        monkeypatch.setattr(partitions, "list_partitions",
+                            lambda connection: [(partitions.partition_name(date(2025, 2, 1)), "")])
+        connection = Connection()
+
+        # e.g. a restored session spanning months whose partitions were dropped
+        created = partitions.ensure_months(connection, partitions.months_between(date(2025, 1, 9), date(2025, 3, 2)))
+        assert created == ["conversation_messages_y2025m01", "conversation_messages_y2025m03"]
+        assert "FROM ('2025-01-01') TO ('2025-02-01')" in connection.executed[0]
+
+
+class TestCompositeKey:
+    """Test that messages are keyed on (id, timestamp)"""
+
+    def test_primary_key_and_redelivery(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'messages.db'}")
+        Base.metadata.create_all(bind=engine)
+        assert inspect(engine).get_pk_constraint("conversation_messages")["constrained_columns"] == ["id", "timestamp"]
+
+        rows = build_turn_rows("session-1", "hi", "hello")
+        db = sessionmaker(bind=engine)()
+        insert_messages(db, rows)
+        insert_messages(db, rows)  # redelivered write-behind entries
+        assert db.query(ConversationMessage).count() == 2
+        db.close()
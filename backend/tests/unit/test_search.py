@@ -0,0 +1,122 @@
+"""
+Tests for full-text search over conversation history
+
+The tsvector/GIN path needs Postgres, so these run the SQLite LIKE fallback
+and check the Postgres statement's shape.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, ConversationMessage
+from search import START_SEL, STOP_SEL, _pg_results, _pg_statement, search_messages, search_terms
+
+START = datetime(2026, 9, 1)
+
+MESSAGES = [
+    ("s1", "There is black mould on the bathroom ceiling"),
+    ("s1", "The mould is spreading, mould everywhere in the bathroom"),
+    ("s2", "Mould in the kitchen at 12 Elm Street"),
+    ("s2", "My boiler is broken"),
+    ("s3", "Flat 4, 12 Elm Street: the window won't close"),
+    ("s3", "Damp patches near the window"),
+    ("s4", "<script>alert('hi')</script> & more"),
+]
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    db = factory()
+    for i, (session_id, message) in enumerate(MESSAGES):
+        db.add(ConversationMessage(id=f"m{i}", session_id=session_id, sender="user", message=message,
+                                   timestamp=START + timedelta(days=i)))
+    db.commit()
+    db.close()
+    return factory
+
+
+def _search(session_factory, query, **filters):
+    db = session_factory()
+    try:
+        return search_messages(db, query, **filters)
+    finally:
+        db.close()
+
+
+class TestQuerySyntax:
+    """Test splitting search box input for the fallback"""
+
+    def test_words_phrases_and_exclusions(self):
+        assert search_terms('mould "12 elm street" -bathroom or damp') == (["mould", "12 elm street", "damp"], ["bathroom"])
+
+
+class TestFallbackSearch:
+    """Test the LIKE fallback used on SQLite"""
+
+    def test_case_insensitive_ranked_and_highlighted(self, session_factory):
+        results = _search(session_factory, "mould")
+        assert [r["id"] for r in results] == ["m1", "m2", "m0"]
+        assert results[0]["rank"] == 2
+        assert results[1]["highlight"] == "<mark>Mould</mark> in the kitchen at 12 Elm Street"
+
+    def test_highlight_is_escaped(self, session_factory):
+        results = _search(session_factory, "script", session_id="s4")
+        assert results[0]["highlight"] == ("&lt;<mark>script</mark>&gt;alert(&#x27;hi&#x27;)"
+                                           "&lt;/<mark>script</mark>&gt; &amp; more")
+
+    def test_phrase_and_exclusion(self, session_factory):
+        assert {r["id"] for r in _search(session_factory, '"12 elm street"')} == {"m2", "m4"}
+        assert [r["id"] for r in _search(session_factory, "mould -bathroom")] == ["m2"]
+
+    def test_session_and_date_filters(self, session_factory):
+        assert [r["id"] for r in _search(session_factory, "mould", session_id="s1")] == ["m1", "m0"]
+        assert [r["id"] for r in _search(session_factory, "mould", start=START + timedelta(days=1),
+                                         end=START + timedelta(days=2))] == ["m1"]
+
+    def test_like_wildcards_are_literal(self, session_factory):
+        assert _search(session_factory, "%") == []
+
+    def test_async_search(self, session_factory):
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from search import asearch_messages
+
+        url = str(session_factory.kw["bind"].url).replace("sqlite://", "sqlite+aiosqlite://")
+
+        async def main():
+            engine = create_async_engine(url)
+            async with async_sessionmaker(engine)() as db:
+                results = await asearch_messages(db, "window", limit=1)
+            await engine.dispose()
+            return results
+
+        assert [r["id"] for r in asyncio.run(main())] == ["m5"]
+
+
+class TestPostgresStatement:
+    """Test the tsvector statement without a Postgres server"""
+
+    def test_matches_the_indexed_column_and_highlights_top_hits_only(self):
+        sql = str(_pg_statement("s1", START, None))
+        assert "m.message_tsv @@ q" in sql
+        assert "websearch_to_tsquery('english', :query)" in sql
+        assert "AND m.session_id = :session_id AND m.timestamp >= :start" in sql
+        assert ":end" not in sql
+        # ts_headline runs in the outer query, over the LIMITed hits
+        assert sql.index("ts_headline") < sql.index("FROM (") < sql.index("LIMIT :limit")
+
+    def test_headline_is_escaped_around_the_marks(self):
+        class Row:
+            rank = 0.5
+            highlight = f"{START_SEL}mould{STOP_SEL} <img src=x onerror=alert(1)>"
+            _mapping = {"id": "m1", "rank": rank, "highlight": highlight}
+
+        assert _pg_results([Row()])[0]["highlight"] == "<mark>mould</mark> &lt;img src=x onerror=alert(1)&gt;"
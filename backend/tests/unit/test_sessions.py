@@ -0,0 +1,166 @@
+"""
+Tests for the sessions table maintained on message writes
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, ChatSession
+from database import (
+    build_message_row, build_turn_rows, decode_session_cursor, encode_session_cursor, insert_messages,
+    list_sessions, persist_messages, persist_turn, set_session_status
+)
+
+START = datetime(2026, 10, 1, 9, 0, 0)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sessions.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def _session(db, session_id):
+    db.expire_all()
+    return db.get(ChatSession, session_id)
+
+
+class TestMaintainedOnWrite:
+    """Test that message writes keep the session row current"""
+
+    def test_turns_update_counts_times_urgency_and_summary(self, db):
+        persist_turn(db, "s1", "there is mould", "where is it?", received_at=START,
+                     urgency="medium", query_summary="Mould reported")
+        persist_turn(db, "s1", "in the bathroom", "how long?", received_at=START + timedelta(minutes=5))
+
+        session = _session(db, "s1")
+        assert session.message_count == 4
+        assert session.first_message_at == START
+        assert session.last_message_at > START + timedelta(minutes=5)
+        # A turn without a new assessment keeps the previous one
+        assert (session.urgency, session.urgency_rank, session.query_summary) == ("medium", 2, "Mould reported")
+
+        persist_turn(db, "s1", "it's spreading fast", "sending someone", urgency="emergency")
+        assert (_session(db, "s1").urgency, _session(db, "s1").urgency_rank) == ("emergency", 4)
+
+    def test_redelivered_rows_are_not_counted_twice(self, db):
+        rows = build_turn_rows("s1", "hi", "hello", START)
+        insert_messages(db, rows)
+        insert_messages(db, rows)
+        assert _session(db, "s1").message_count == 2
+
+    def test_new_message_reopens_a_resolved_session(self, db):
+        persist_turn(db, "s1", "hi", "hello", received_at=START)
+        assert set_session_status(db, "s1", "resolved")
+        assert _session(db, "s1").status == "resolved"
+        persist_turn(db, "s1", "it broke again", "sorry to hear that")
+        assert _session(db, "s1").status == "open"
+        assert not set_session_status(db, "missing", "resolved")
+
+    def test_response_alone_does_not_reopen_a_resolved_session(self, db):
+        persist_turn(db, "s1", "hi", "hello", received_at=START)
+        set_session_status(db, "s1", "resolved")
+        persist_messages(db, [build_message_row("s1", "ai", "anything else?")])
+        assert (_session(db, "s1").status, _session(db, "s1").message_count) == ("resolved", 3)
+
+    def test_archiving_and_restoring_keep_the_status(self, db, session_factory):
+        pytest.importorskip("zstandard")
+        from database import archive_session, get_chat_history
+
+        rows = build_turn_rows("s1", "hi", "hello", START - timedelta(days=200))
+        rows[1]["timestamp"] = rows[0]["timestamp"] + timedelta(seconds=1)  # answered back then, not now
+        insert_messages(db, rows)
+        set_session_status(db, "s1", "resolved")
+        assert archive_session(db, "s1", START) == 2
+        session = _session(db, "s1")
+        assert (session.status, session.archived_at is not None, session.message_count) == ("resolved", True, 2)
+        get_chat_history(db, "s1")
+        session = _session(db, "s1")
+        assert (session.status, session.archived_at, session.message_count) == ("resolved", None, 2)
+
+    def test_stream_rows_carry_the_assessment(self, session_factory):
+        fakeredis = pytest.importorskip("fakeredis")
+        from message_stream import MessageStream
+        from worker.jobs.drain_messages import drain_message_stream
+
+        stream = MessageStream(fakeredis.FakeRedis(), consumer="worker")
+        stream.append(build_turn_rows("s1", "no heating", "sending an engineer", START,
+                                      urgency="high", query_summary="No heating"))
+        assert drain_message_stream(stream, session_factory) == 2
+
+        db = session_factory()
+        session = db.get(ChatSession, "s1")
+        assert (session.message_count, session.urgency, session.query_summary) == (2, "high", "No heating")
+        db.close()
+
+
+class TestListing:
+    """Test keyset pages of sessions"""
+
+    @pytest.fixture
+    def sessions(self, db):
+        urgencies = ["low", None, "emergency", "medium", "high", "high"]
+        for i, urgency in enumerate(urgencies):
+            persist_turn(db, f"s{i}", "question", "answer", received_at=START + timedelta(hours=i), urgency=urgency)
+        set_session_status(db, "s5", "resolved")
+
+    def _all_pages(self, db, order, limit=2):
+        ids, after = [], None
+        while True:
+            page, has_more = list_sessions(db, order=order, limit=limit, after=after)
+            ids.extend(session.session_id for session in page)
+            if not has_more:
+                return ids
+            after = decode_session_cursor(encode_session_cursor(page[-1], order), order)
+
+    def test_most_recent_first(self, db, sessions):
+        assert self._all_pages(db, "recent") == ["s4", "s3", "s2", "s1", "s0"]
+
+    def test_most_urgent_first(self, db, sessions):
+        assert self._all_pages(db, "urgent") == ["s2", "s4", "s3", "s0", "s1"]
+
+    def test_status_filter(self, db, sessions):
+        page, has_more = list_sessions(db, status="resolved")
+        assert [session.session_id for session in page] == ["s5"] and not has_more
+
+    def test_cursor_is_tied_to_its_order(self, db, sessions):
+        cursor = encode_session_cursor(_session(db, "s1"), "recent")
+        with pytest.raises(ValueError):
+            decode_session_cursor(cursor, "urgent")
+
+    def test_pages_are_index_scans_without_a_sort(self, db, sessions):
+        from database import _sessions_query
+        for order, index in (("recent", "ix_sessions_status_recent"), ("urgent", "ix_sessions_status_urgent")):
+            after = decode_session_cursor(encode_session_cursor(_session(db, "s3"), order), order)
+            statement = _sessions_query("open", order, 20, after).compile(db.bind, compile_kwargs={"literal_binds": True})
+            plan = " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {statement}")))
+            assert index in plan
+            assert "TEMP B-TREE" not in plan
+
+    def test_async_listing(self, session_factory, sessions):
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from database import alist_sessions
+
+        url = str(session_factory.kw["bind"].url).replace("sqlite://", "sqlite+aiosqlite://")
+
+        async def main():
+            engine = create_async_engine(url)
+            async with async_sessionmaker(engine)() as db:
+                page, has_more = await alist_sessions(db, order="urgent", limit=3)
+            await engine.dispose()
+            return [session.session_id for session in page], has_more
+
+        assert asyncio.run(main()) == (["s2", "s4", "s3"], True)
@@ -0,0 +1,126 @@
+"""
+Unit tests for the compact tool payloads returned to the main agent
+
+Tool results are re-read on every following agent iteration, so they are
+serialised as minimal JSON instead of str(dict) or prose paragraphs.
+"""
+
+import json
+import threading
+from unittest.mock import patch
+
+from agents.tools import (
+    compact_tool_result,
+    ContextAgentTool,
+    ContractAgentTool,
+    ClassifierAgentTool,
+    get_current_assessment,
+    set_current_assessment,
+    set_current_session_id,
+    set_current_user_message,
+)
+from agents.contract_agent import format_contract_position
+
+
+CONTEXT_RESULT = {
+    "is_clear": True,
+    "is_relevant": True,
+    "requires_clarification": False,
+    "clarifying_question": "",
+    "requires_context": True,
+    "additional_context_question": "Which room is affected?",
+    "query_summary": "Tenant reports a leak.",
+}
+
+
+class TestCompactToolResult:
+    """Test the compact serialisation helper"""
+
+    def test_empty_fields_are_dropped(self):
+        payload = json.loads(compact_tool_result(CONTEXT_RESULT))
+        assert payload == {
+            "is_clear": True,
+            "is_relevant": True,
+            "requires_clarification": False,
+            "requires_context": True,
+            "additional_context_question": "Which room is affected?",
+            "query_summary": "Tenant reports a leak.",
+        }
+
+    def test_false_and_zero_are_kept(self):
+        payload = json.loads(compact_tool_result({"flag": False, "count": 0, "score": 0.0, "none": None, "items": []}))
+        assert payload == {"flag": False, "count": 0, "score": 0.0}
+
+    def test_compact_payload_is_smaller_than_str_dict(self):
+        assert len(compact_tool_result(CONTEXT_RESULT)) < len(str(CONTEXT_RESULT))
+
+
+class TestToolsReturnCompactJson:
+    """Test that each tool returns parseable compact JSON"""
+
+    def test_context_tool(self):
+        with patch("agents.tools.run_context_agent_with_dual_memory", return_value=CONTEXT_RESULT):
+            output = ContextAgentTool()._run("leak")
+        assert json.loads(output)["additional_context_question"] == "Which room is affected?"
+
+    def test_contract_tool(self):
+        position = {"responsible_party": "landlord", "sections": ["5.1"], "position": "Landlord repairs plumbing."}
+        with patch("agents.tools.assess_contract", return_value=position):
+            output = ContractAgentTool()._run("plumbing repair")
+        assert json.loads(output) == position
+
+    def test_classifier_tool(self):
+        assessment = {"urgency": "high", "responsibility": "landlord", "next_steps": "Send a plumber.", "summary": "Active leak."}
+        with patch("agents.tools.assess_urgency", return_value=assessment):
+            output = ClassifierAgentTool()._run("leak")
+        assert json.loads(output)["urgency"] == "high"
+
+
+class TestConcurrentTurns:
+    """Test that concurrent turns don't see each other's session or message"""
+
+    def test_each_thread_keeps_its_own_turn(self):
+        calls, barrier = {}, threading.Barrier(2)
+
+        def record(query, session_id, user_message):
+            calls[session_id] = user_message
+            return CONTEXT_RESULT
+
+        def turn(session_id, text):
+            set_current_session_id(session_id)
+            set_current_user_message(text)
+            barrier.wait()  # both turns have started before either calls the tool
+            ContextAgentTool().run("leak")
+
+        with patch("agents.tools.run_context_agent_with_dual_memory", side_effect=record):
+            threads = [threading.Thread(target=turn, args=(f"s{i}", f"message {i}")) for i in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert calls == {"s0": "message 0", "s1": "message 1"}
+
+    def test_each_turn_gets_its_own_assessment(self):
+        results, barrier = {}, threading.Barrier(2)
+
+        def turn(urgency):
+            set_current_assessment(None)
+            ClassifierAgentTool().run(urgency)
+            barrier.wait()  # both tools have run before either turn reads its assessment
+            results[urgency] = get_current_assessment()
+
+        with patch("agents.tools.assess_urgency", side_effect=lambda query, session_id: {"urgency": query}):
+            threads = [threading.Thread(target=turn, args=(urgency,)) for urgency in ("low", "emergency")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert results == {"low": {"urgency": "low"}, "emergency": {"urgency": "emergency"}}
+
+
+def test_format_contract_position():
+    position = {"responsible_party": "landlord", "sections": ["5.1 Repairs", "7.2"], "position": "Landlord repairs the boiler."}
+    assert format_contract_position(position) == "Landlord repairs the boiler. (Relevant sections: 5.1 Repairs, 7.2)"
+    assert format_contract_position(dict(position, sections=[])) == "Landlord repairs the boiler."
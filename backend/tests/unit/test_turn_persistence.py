@@ -0,0 +1,106 @@
+"""
+Tests for single-statement turn persistence
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, ConversationMessage
+from database import apersist_turn, get_chat_history, persist_turn
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'turns.db'}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _record_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2].split()[0].upper()))
+    return statements
+
+
+class TestPersistTurn:
+    """Test that a turn is one INSERT (plus its sessions upsert) with nothing read back"""
+
+    def test_turn_is_one_insert_and_no_reads(self, engine):
+        db = sessionmaker(bind=engine)()
+        statements = _record_statements(engine)
+        received_at = datetime(2026, 1, 1, 12, 0, 0)
+
+        rows = persist_turn(db, "s1", "my boiler is broken", "which room?", received_at=received_at)
+
+        # The messages, then the sessions upsert in the same transaction
+        assert statements == ["INSERT", "INSERT"]
+        assert rows[0]["timestamp"] == received_at
+        history = get_chat_history(db, "s1")
+        assert [(m.sender, m.message) for m in reversed(history)] == [("user", "my boiler is broken"), ("ai", "which room?")]
+        assert [m.id for m in reversed(history)] == [row["id"] for row in rows]
+        db.close()
+
+    def test_async_turn_is_stored(self, tmp_path, engine):
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+        async def main():
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'turns.db'}")
+            async with AsyncSession(async_engine) as db:
+                await apersist_turn(db, "s1", "hello", "hi there")
+            await async_engine.dispose()
+
+        asyncio.run(main())
+        db = sessionmaker(bind=engine)()
+        assert db.query(ConversationMessage).filter(ConversationMessage.session_id == "s1").count() == 2
+        db.close()
+
+
+class TestMainAgentEndpoint:
+    """Test that /main-agent writes a turn once, and keeps the message of a failed turn"""
+
+    @pytest.fixture
+    def client(self, tmp_path, engine, monkeypatch):
+        pytest.importorskip("aiosqlite")
+        api_server = pytest.importorskip("api_server")
+        import models
+        from fastapi.testclient import TestClient
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'turns.db'}")
+        monkeypatch.setattr(models, "_async_session_factory", async_sessionmaker(async_engine, expire_on_commit=False))
+        monkeypatch.setattr(api_server, "get_message_stream", lambda: None)
+        statements = _record_statements(async_engine.sync_engine)
+        return TestClient(api_server.app, raise_server_exceptions=False), api_server, statements
+
+    def _post(self, client, api_server, text):
+        return client.post("/main-agent", json={"session_id": "s1", "text": text}, headers={"x-api-key": api_server.API_KEY})
+
+    def test_turn_is_written_once(self, client, engine, monkeypatch):
+        client, api_server, statements = client
+        monkeypatch.setattr(api_server, "handle_message",
+                            lambda db, session_id, text: {"chat_output": "which room?", "urgency": "high"})
+
+        assert self._post(client, api_server, "my boiler is broken").status_code == 200
+        # The messages, then the sessions upsert, in one transaction
+        assert statements == ["INSERT", "INSERT"]
+        db = sessionmaker(bind=engine)()
+        assert [m.sender for m in reversed(get_chat_history(db, "s1"))] == ["user", "ai"]
+        db.close()
+
+    def test_failed_turn_keeps_the_message(self, client, engine, monkeypatch):
+        client, api_server, _ = client
+
+        def fail(db, session_id, text):
+            raise RuntimeError("agent down")
+
+        monkeypatch.setattr(api_server, "handle_message", fail)
+        assert self._post(client, api_server, "my boiler is broken").status_code == 500
+        db = sessionmaker(bind=engine)()
+        assert [(m.sender, m.message) for m in get_chat_history(db, "s1")] == [("user", "my boiler is broken")]
+        db.close()
+
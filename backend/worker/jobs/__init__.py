@@ -0,0 +1 @@
+# Background jobs run by the worker process
@@ -0,0 +1,45 @@
+"""
+Archive idle conversations into compressed cold storage
+
+Moves sessions whose newest message (and last restore) is older than ARCHIVE_AFTER_DAYS from
+conversation_messages into conversation_archives, one zstd-compressed row
+per session (see archive.py). Each session is moved in its own transaction,
+and history reads restore an archived session on demand.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+# Upper bound on sessions per run, so one tick can't hold the worker for long
+ARCHIVE_BATCH_SESSIONS = int(os.getenv("ARCHIVE_BATCH_SESSIONS", "200"))
+
+
+def archive_idle_sessions(session_factory=None, after_days: int = None) -> int:
+    """
+    Archive up to ARCHIVE_BATCH_SESSIONS idle sessions.
+
+    Returns:
+        Number of messages archived
+    """
+    from archive import archive_after_days
+    after_days = archive_after_days() if after_days is None else after_days
+    if after_days <= 0:
+        return 0
+    if session_factory is None:
+        from models import SessionLocal
+        session_factory = SessionLocal
+    from database import archive_session, get_idle_session_ids
+
+    idle_before = datetime.utcnow() - timedelta(days=after_days)
+    db = session_factory()
+    try:
+        archived = 0
+        for session_id in get_idle_session_ids(db, idle_before, ARCHIVE_BATCH_SESSIONS):
+            try:
+                archived += archive_session(db, session_id, idle_before)
+            except Exception as e:
+                db.rollback()
+                print(f"[ARCHIVE] Failed to archive session {session_id}: {e}")
+        return archived
+    finally:
+        db.close()
@@ -0,0 +1,101 @@
+"""
+Drain the write-behind message stream into conversation_messages
+
+With MESSAGE_WRITE_MODE=stream the API appends chat messages to a Redis
+Stream instead of committing them on the request path (see
+message_stream.py). This job reads the stream through a consumer group,
+bulk-inserts each batch with one multi-row INSERT ... ON CONFLICT DO NOTHING
+and only then acknowledges it, so delivery is at-least-once and redelivered
+entries are no-ops.
+
+If a batch fails, its rows are retried one by one so the good ones still
+land. A row that fails on its own stays unacknowledged and is redelivered;
+after MESSAGE_DRAIN_MAX_DELIVERIES deliveries it moves to the dead-letter
+stream. When every row fails and Postgres doesn't answer either, nothing
+is dead-lettered and the job fails, to be retried on its next tick.
+"""
+
+import os
+from message_stream import MessageStream
+
+# Rows per INSERT
+DRAIN_BATCH_SIZE = int(os.getenv("MESSAGE_DRAIN_BATCH_SIZE", "500"))
+
+# Upper bound on batches per run, so one busy tick can't starve the other jobs
+DRAIN_MAX_BATCHES = int(os.getenv("MESSAGE_DRAIN_MAX_BATCHES", "20"))
+
+# Deliveries after which a row that still fails to insert is dead-lettered
+DRAIN_MAX_DELIVERIES = int(os.getenv("MESSAGE_DRAIN_MAX_DELIVERIES", "5"))
+
+
+def _insert(session_factory, rows) -> None:
+    from database import insert_messages
+    db = session_factory()
+    try:
+        insert_messages(db, rows)
+    finally:
+        db.close()
+
+
+def _database_available(session_factory) -> bool:
+    from sqlalchemy import text
+    db = session_factory()
+    try:
+        db.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+    finally:
+        db.close()
+
+
+def _insert_one_by_one(stream: MessageStream, session_factory, batch, batch_error: Exception) -> int:
+    """
+    Retry a failed batch row by row, acknowledging the rows that insert.
+
+    Returns:
+        Number of rows written
+    """
+    print(f"[MESSAGE STREAM] Batch of {len(batch)} failed ({batch_error}), retrying row by row")
+    written, failed = [], []
+    for entry in batch:
+        try:
+            _insert(session_factory, [entry[1]])
+            written.append(entry)
+        except Exception as e:
+            failed.append((entry, repr(e)))
+    if not written and not _database_available(session_factory):
+        raise batch_error
+    stream.ack(written)
+    counts = stream.delivery_counts([entry_id for (entry_id, _), _ in failed])
+    stream.dead_letter([failure for failure in failed if counts.get(failure[0][0], 0) >= DRAIN_MAX_DELIVERIES])
+    return len(written)
+
+
+def drain_message_stream(stream: MessageStream = None, session_factory=None) -> int:
+    """
+    Insert pending stream entries into conversation_messages.
+    
+    Returns:
+        Number of rows written (including redelivered rows that already existed)
+    """
+    stream = stream or MessageStream.from_env()
+    if stream is None:
+        return 0
+    if session_factory is None:
+        from models import SessionLocal
+        session_factory = SessionLocal
+    
+    drained = 0
+    for _ in range(DRAIN_MAX_BATCHES):
+        batch = stream.read_batch(DRAIN_BATCH_SIZE)
+        if not batch:
+            break
+        try:
+            _insert(session_factory, [row for _, row in batch])
+        except Exception as e:
+            drained += _insert_one_by_one(stream, session_factory, batch, e)
+            continue
+        stream.ack(batch)
+        drained += len(batch)
+    return drained
@@ -0,0 +1,23 @@
+"""
+Keep monthly conversation_messages partitions created ahead of time
+
+conversation_messages has no DEFAULT partition on Postgres, so a message
+timestamped in a month without a partition would fail to insert. This job
+creates the partitions for the next PARTITION_MONTHS_AHEAD months well
+before they are needed (see partitions.py). It is a no-op on SQLite.
+"""
+
+
+def maintain_partitions(engine=None) -> list:
+    """
+    Create any missing upcoming partitions.
+
+    Returns:
+        Names of the partitions created
+    """
+    if engine is None:
+        from models import engine
+    from partitions import ensure_partitions
+
+    with engine.begin() as connection:
+        return ensure_partitions(connection)
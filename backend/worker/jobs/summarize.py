@@ -0,0 +1,100 @@
+"""
+Background rolling summarization of scoped memory channels
+
+Long-running conversations evict older messages from their token-bounded
+memory windows. The request path only queues those messages in Redis; this
+job folds them into a compact running summary per session/channel once the
+queued backlog crosses a token threshold, so request-path calls read a
+precomputed summary instead of summarizing inline.
+"""
+
+import os
+from langchain_openai import ChatOpenAI
+from langchain.schema import HumanMessage, SystemMessage
+from memory.summary_store import SummaryStore
+from memory.token_window_memory import count_tokens, truncate_to_tokens
+
+# Summarize a channel once this many tokens of evicted messages are queued
+SUMMARY_THRESHOLD_TOKENS = int(os.getenv("SUMMARY_THRESHOLD_TOKENS", "400"))
+
+# Target size of the running summary
+SUMMARY_TARGET_TOKENS = int(os.getenv("SUMMARY_TARGET_TOKENS", "250"))
+
+SUMMARY_PROMPT = """You maintain a running summary of the older part of a tenant property-management conversation ({channel} channel).
+Fold the older messages into the current summary. Keep every fact needed to continue helping the tenant: the issue, where and when it happens, its impact, what has been tried, what was decided or promised, and any urgency or responsibility findings.
+Drop greetings and repetition. Write plain prose, at most {target_tokens} tokens."""
+
+CHANNEL_DESCRIPTIONS = {
+    "user": "tenant ↔ main agent",
+    "context": "main agent ↔ context agent",
+    "contract": "main agent ↔ contract agent",
+    "classifier": "main agent ↔ classifier agent"
+}
+
+# Change from import-time initialization to lazy loading
+_llm = None
+
+def get_llm():
+    """Lazy-load the LLM to ensure environment variables are available"""
+    global _llm
+    if _llm is None:
+        # gpt-4o-mini should always be the default model for all agents
+        _llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
+    return _llm
+
+
+def summarize_channel(store: SummaryStore, session_id: str, channel: str) -> bool:
+    """
+    Fold a channel's queued evictions into its running summary if over threshold.
+    
+    Returns:
+        True if a new summary was written
+    """
+    entries = store.read_evicted(session_id, channel)
+    if not entries:
+        store.discard_pending(session_id, channel)
+        return False
+    
+    queued_tokens = sum(count_tokens(line) for _, line in entries)
+    if queued_tokens < SUMMARY_THRESHOLD_TOKENS:
+        return False
+    
+    previous, _ = store.get_summary(session_id, channel)
+    messages = [
+        SystemMessage(content=SUMMARY_PROMPT.format(
+            channel=CHANNEL_DESCRIPTIONS.get(channel, channel),
+            target_tokens=SUMMARY_TARGET_TOKENS
+        )),
+        HumanMessage(content=(
+            f"Current summary:\n{previous or '(none yet)'}\n\n"
+            "Older messages to fold in:\n" + "\n".join(line for _, line in entries)
+        ))
+    ]
+    response = get_llm().invoke(messages)
+    summary = truncate_to_tokens(response.content.strip(), SUMMARY_TARGET_TOKENS)
+    
+    store.commit_summary(session_id, channel, summary, through_seq=entries[-1][0], consumed=len(entries))
+    print(f"[WORKER] Summarized {len(entries)} messages ({queued_tokens} tokens) for {session_id}/{channel}")
+    return True
+
+
+def summarize_pending_channels(store: SummaryStore = None) -> int:
+    """
+    Summarize every pending channel that has crossed the threshold.
+    
+    Returns:
+        Number of channels summarized
+    """
+    store = store or SummaryStore.from_env()
+    if store is None:
+        print("[WORKER] REDIS_URL not set, skipping memory summarization")
+        return 0
+    
+    summarized = 0
+    for session_id, channel in store.pending_channels():
+        try:
+            if summarize_channel(store, session_id, channel):
+                summarized += 1
+        except Exception as e:
+            print(f"[WORKER] Failed to summarize {session_id}/{channel}: {e}")
+    return summarized
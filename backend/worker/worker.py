@@ -0,0 +1,64 @@
+"""
+Abodient background worker
+
+Runs periodic jobs off the API request path. Each job is a plain function
+registered in JOBS with its interval; failures are logged and the job is
+retried on its next tick. Every job runs on its own thread, so a slow one
+(e.g. summarisation waiting on the LLM) never holds up the others, like the
+once-a-second drain of the message stream.
+
+Usage:
+    python worker/worker.py
+"""
+
+import os
+import threading
+import time
+from jobs.summarize import summarize_pending_channels
+from jobs.drain_messages import drain_message_stream
+from jobs.partitions import maintain_partitions
+from jobs.archive_sessions import archive_idle_sessions
+
+# (name, job, interval in seconds)
+JOBS = [
+    ("summarize_memory", summarize_pending_channels, int(os.getenv("SUMMARIZE_INTERVAL_SECONDS", "30"))),
+    ("drain_messages", drain_message_stream, int(os.getenv("MESSAGE_DRAIN_INTERVAL_SECONDS", "1"))),
+    ("maintain_partitions", maintain_partitions, int(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "86400"))),
+    ("archive_sessions", archive_idle_sessions, int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))),
+]
+
+
+def run_job(name, job, interval, stop: threading.Event):
+    """Run one job every interval seconds (from the start of each run) until stop is set"""
+    while not stop.is_set():
+        started = time.monotonic()
+        try:
+            result = job()
+            if result:
+                print(f"[WORKER] {name}: {result}")
+        except Exception as e:
+            print(f"[WORKER] Job {name} failed: {e}")
+        stop.wait(max(0.0, started + interval - time.monotonic()))
+
+
+def run_forever(stop: threading.Event = None):
+    """Run each registered job on its own thread until the process is stopped (or stop is set)"""
+    print(f"[WORKER] Starting with jobs: {', '.join(name for name, _, _ in JOBS)}")
+    stop = stop or threading.Event()
+    threads = [
+        threading.Thread(target=run_job, args=(name, job, interval, stop), name=f"worker-{name}", daemon=True)
+        for name, job, interval in JOBS
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        while not stop.wait(1):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    run_forever()
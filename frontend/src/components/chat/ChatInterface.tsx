@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useCallback, useEffect, useRef, useState } from 'react';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
 import { Send } from 'lucide-react';
@@ -9,17 +9,105 @@ interface Message {
   text: string;
   sender: 'user' | 'ai';
   timestamp: Date;
+  // Shown optimistically before the stored copy arrives from a history sync
+  local?: boolean;
 }
 
+// One page of GET /chat-history (messages oldest first, opaque keyset cursors)
+interface HistoryPage {
+  messages: { id: string; sender: 'user' | 'ai'; message: string; timestamp: string }[];
+  has_more: boolean;
+  before: string | null;
+  after: string | null;
+}
+
+const SESSION_ID = 'frontend-session';
+const HISTORY_PAGE_SIZE = 30;
+const GREETING: Message = { id: 'greeting', text: "Hello! How can I help you today?", sender: 'ai', timestamp: new Date() };
+
+const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+const apiKey = import.meta.env.VITE_API_KEY || '';
+
+// Fetch one page of history; pass before to scroll back or after to fetch only newer messages
+const fetchHistory = async (cursor: { before?: string; after?: string } = {}): Promise<HistoryPage> => {
+  const params = new URLSearchParams({ limit: String(HISTORY_PAGE_SIZE) });
+  if (cursor.before) params.set('before', cursor.before);
+  if (cursor.after) params.set('after', cursor.after);
+  const response = await fetch(`${apiUrl}/chat-history/${encodeURIComponent(SESSION_ID)}?${params}`, {
+    headers: { 'X-API-KEY': apiKey },
+  });
+  if (!response.ok) {
+    throw new Error('API error');
+  }
+  return response.json();
+};
+
+const toMessages = (page: HistoryPage): Message[] =>
+  page.messages.map((msg) => ({
+    id: msg.id,
+    text: msg.message,
+    sender: msg.sender,
+    // Stored timestamps are UTC without an offset
+    timestamp: new Date(msg.timestamp.endsWith('Z') ? msg.timestamp : `${msg.timestamp}Z`),
+  }));
+
 const ChatInterface: React.FC = () => {
   // State to hold all chat messages
-  const [messages, setMessages] = useState<Message[]>([
-    { id: '1', text: "Hello! How can I help you today?", sender: 'ai', timestamp: new Date() },
-  ]);
+  const [messages, setMessages] = useState<Message[]>([GREETING]);
   // State to hold the current input text
   const [inputText, setInputText] = useState('');
   // State to show loading indicator while waiting for API response
   const [loading, setLoading] = useState(false);
+  // Cursor for the page before the oldest loaded message (null once the start is reached)
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  // Cursor after the newest stored message, so syncs fetch only what's new
+  const afterCursor = useRef<string | null>(null);
+
+  // Load the latest page of the conversation on mount
+  useEffect(() => {
+    fetchHistory()
+      .then((page) => {
+        if (page.messages.length > 0) {
+          setMessages(toMessages(page));
+        }
+        setOlderCursor(page.has_more ? page.before : null);
+        afterCursor.current = page.after;
+      })
+      .catch(() => {
+        // Start with just the greeting if history can't be loaded
+      });
+  }, []);
+
+  // Fetch stored messages newer than the last sync, replacing optimistic copies
+  const syncNewMessages = useCallback(async () => {
+    const synced: Message[] = [];
+    let hasMore = true;
+    while (hasMore) {
+      const page = await fetchHistory(afterCursor.current ? { after: afterCursor.current } : {});
+      synced.push(...toMessages(page));
+      afterCursor.current = page.after;
+      hasMore = Boolean(afterCursor.current) && page.has_more;
+    }
+    setMessages((prev) => {
+      const known = new Set(prev.map((msg) => msg.id));
+      return [...prev.filter((msg) => !msg.local), ...synced.filter((msg) => !known.has(msg.id))];
+    });
+  }, []);
+
+  const loadOlderMessages = async () => {
+    if (!olderCursor) return;
+    setLoadingOlder(true);
+    try {
+      const page = await fetchHistory({ before: olderCursor });
+      setMessages((prev) => [...toMessages(page), ...prev.filter((msg) => msg.id !== GREETING.id)]);
+      setOlderCursor(page.has_more ? page.before : null);
+    } catch (error) {
+      // Keep the button so the user can retry
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
 
   // Function to send message to backend and update chat
   const handleSendMessage = async () => {
@@ -29,6 +117,7 @@ const ChatInterface: React.FC = () => {
       text: inputText,
       sender: 'user',
       timestamp: new Date(),
+      local: true,
     };
     setMessages((prev) => [...prev, userMessage]);
     setInputText('');
@@ -36,15 +125,13 @@ const ChatInterface: React.FC = () => {
 
     try {
       // Send the user's message to the backend API
-      const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
-      const apiKey = import.meta.env.VITE_API_KEY || '';
       const response = await fetch(`${apiUrl}/main-agent`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           'X-API-KEY': apiKey,
         },
-        body: JSON.stringify({ session_id: 'frontend-session', text: inputText }),
+        body: JSON.stringify({ session_id: SESSION_ID, text: inputText }),
       });
       if (!response.ok) {
         throw new Error('API error');
@@ -63,8 +150,13 @@ const ChatInterface: React.FC = () => {
         text: aiText,
         sender: 'ai',
         timestamp: new Date(),
+        local: true,
       };
       setMessages((prev) => [...prev, aiMessage]);
+      // Swap the optimistic copies for the stored turn (and anything sent from elsewhere)
+      syncNewMessages().catch(() => {
+        // The optimistic copies stay until the next successful sync
+      });
     } catch (error) {
       // Show an error message if the API call fails
       const errorMessage: Message = {
@@ -85,6 +177,13 @@ const ChatInterface: React.FC = () => {
         <Button variant="outline">Resolved Queries</Button>
       </div>
       <div className="flex-grow p-6 space-y-4 overflow-y-auto">
+        {olderCursor && (
+          <div className="flex justify-center">
+            <Button variant="ghost" size="sm" onClick={loadOlderMessages} disabled={loadingOlder}>
+              {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+            </Button>
+          </div>
+        )}
         {messages.map((msg) => (
           <div
             key={msg.id}
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Scoped Memory Footprint Benchmark
+=================================
+
+Measures resident bytes per session for the scoped memory manager with the
+compact record-based chat history against the LangChain in-memory history
+it replaced. Every session gets all four channels filled to a typical
+window (tenant conversation plus JSON agent results).
+
+Each (history, session count) run happens in a fresh subprocess, so
+results don't leak between runs. Runs are measured with tracemalloc by
+default; tracing roughly doubles the process's own footprint, so --method rss
+measures the growth in peak RSS instead, which lets the LangChain baseline
+reach 100k sessions on a smaller machine. If a baseline run still doesn't fit
+(the child is killed or raises MemoryError), it is retried at half the
+sessions until it does, and both histories are compared at that size.
+
+Usage:
+    python tools/benchmarks/memory_footprint.py                      # 10k and 100k sessions
+    python tools/benchmarks/memory_footprint.py --sessions 1000 5000
+    python tools/benchmarks/memory_footprint.py --sessions 100000 --method rss
+
+Results on a 6 GB machine, where the 100k LangChain run only fits with --method rss:
+    tracemalloc, 10k sessions:  LangChain 35,517 B/session, compact 12,670 B/session (64% saving)
+    rss, 100k sessions:         LangChain 36,906 B/session, compact 13,588 B/session (63% saving)
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Optional, Tuple
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend", "api")
+
+# Smallest session count a baseline that doesn't fit is retried at
+MIN_FALLBACK_SESSIONS = 1_000
+
+# Exchanges per channel - the user window is larger than the agent windows
+EXCHANGES = {"user": 5, "context": 3, "contract": 3, "classifier": 3}
+
+
+def build_manager(variant: str):
+    """Create a manager whose channels use the requested history implementation"""
+    sys.path.insert(0, API_DIR)
+    from langchain_core.chat_history import InMemoryChatMessageHistory
+    from memory.scoped_memory_manager import ScopedMemoryManager
+
+    class LangChainHistoryManager(ScopedMemoryManager):
+        """The manager as it was before compact histories: LangChain message objects"""
+
+        def _create_memory(self, session_id, channel, window_size=5, chat_memory=None):
+            return super()._create_memory(session_id, channel, window_size, chat_memory or InMemoryChatMessageHistory())
+
+    manager_class = LangChainHistoryManager if variant == "langchain" else ScopedMemoryManager
+    return manager_class(max_sessions=10**9)
+
+
+def fill_session(manager, index: int) -> None:
+    """Fill every channel of one session with distinct, realistically sized messages"""
+    for channel, exchanges in EXCHANGES.items():
+        if channel == "user":
+            history = manager.get_user_memory(f"session-{index}").chat_memory
+        else:
+            history = manager.get_agent_memory(f"session-{index}", channel).chat_memory
+        for turn in range(exchanges):
+            history.add_user_message(f"[{index}:{turn}] The radiator in my bedroom has stopped working again")
+            history.add_ai_message(json.dumps({
+                "turn": turn,
+                "summary": f"Tenant {index} reports a broken radiator in the bedroom",
+                "urgency": "high"
+            }))
+
+
+def _peak_rss_bytes() -> int:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(variant: str, sessions: int, method: str = "tracemalloc") -> dict:
+    """Bytes allocated per resident session (runs in the child process)"""
+    import gc
+    import tracemalloc
+
+    manager = build_manager(variant)
+    fill_session(manager, -1)  # warm up imports and caches outside the measurement
+    gc.collect()
+
+    if method == "tracemalloc":
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+    else:
+        before = _peak_rss_bytes()
+    start = time.perf_counter()
+    for index in range(sessions):
+        fill_session(manager, index)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    if method == "tracemalloc":
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    else:
+        after = _peak_rss_bytes()
+
+    return {
+        "variant": variant,
+        "method": method,
+        "sessions": sessions,
+        "bytes_per_session": (after - before) / sessions,
+        "total_mb": (after - before) / 1024 / 1024,
+        "fill_seconds": elapsed
+    }
+
+
+def run_child(variant: str, sessions: int, method: str, env: dict) -> Tuple[Optional[dict], str]:
+    """
+    Measure one variant in a fresh process.
+
+    Returns (result, "") or, if the child died (the OOM killer, MemoryError or
+    a failed allocation under a ulimit), (None, the reason).
+    """
+    completed = subprocess.run(
+        [sys.executable, __file__, "--child", variant, str(sessions), "--method", method],
+        capture_output=True, text=True, env=env
+    )
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return None, lines[-1] if lines else f"exit status {completed.returncode}"
+    return json.loads(completed.stdout.strip().splitlines()[-1]), ""
+
+
+def print_result(result: dict) -> None:
+    print(
+        f"{result['sessions']:>10,} {result['variant']:>10} {result['bytes_per_session']:>14,.0f} "
+        f"{result['total_mb']:>10,.1f} {result['fill_seconds']:>8.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scoped memory bytes per session")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--method", choices=["tracemalloc", "rss"], default="tracemalloc",
+                        help="tracemalloc (exact, ~2x memory) or growth in peak RSS (fits larger runs)")
+    parser.add_argument("--child", nargs=2, metavar=("VARIANT", "SESSIONS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        variant, sessions = args.child
+        print(json.dumps(measure(variant, int(sessions), args.method)))
+        return
+
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "benchmark"))
+    print(f"{'sessions':>10} {'history':>10} {'bytes/session':>14} {'total MB':>10} {'fill s':>8}  ({args.method})")
+    for sessions in args.sessions:
+        # The LangChain baseline is the larger of the two, so find the size it fits at first
+        baseline_sessions = sessions
+        baseline, error = run_child("langchain", baseline_sessions, args.method, env)
+        while baseline is None and baseline_sessions // 2 >= MIN_FALLBACK_SESSIONS:
+            print(f"{baseline_sessions:>10,} {'langchain':>10}  did not fit ({error}), halving")
+            baseline_sessions //= 2
+            baseline, error = run_child("langchain", baseline_sessions, args.method, env)
+        if baseline is None:
+            print(f"{baseline_sessions:>10,} {'langchain':>10}  failed: {error}")
+            continue
+
+        compact, error = run_child("compact", sessions, args.method, env)
+        if compact is None:
+            print(f"{sessions:>10,} {'compact':>10}  failed: {error}")
+            continue
+        if baseline_sessions != sessions:
+            # Report the full-size compact run, then compare both at the size the baseline fits
+            print_result(compact)
+            compact, _ = run_child("compact", baseline_sessions, args.method, env)
+        print_result(baseline)
+        print_result(compact)
+        saving = 1 - compact["bytes_per_session"] / baseline["bytes_per_session"]
+        print(f"{baseline_sessions:>10,} {'saving':>10} {saving:>14.0%}")
+
+
+if __name__ == "__main__":
+    main()
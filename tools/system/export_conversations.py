@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Conversation Exporter
+=====================
+
+Exports every chat message in a date range to NDJSON or Parquet for
+auditing agent quality offline (see backend/api/export.py). Rows are
+streamed from the database and written batch by batch, so exports of
+millions of messages run in constant memory.
+
+Uses DATABASE_URL, like the API. The end date is exclusive.
+
+Usage:
+    python tools/system/export_conversations.py --start 2026-09-01 --end 2026-10-01 --output september.ndjson
+    python tools/system/export_conversations.py --start 2026-09-01 --end 2026-10-01 --output september.parquet
+    python tools/system/export_conversations.py --start 2026-09-01 --end 2026-10-01 --session abc --session def
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend", "api")
+sys.path.insert(0, API_DIR)
+os.environ.setdefault("OPENAI_API_KEY", "export")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export conversations for a date range")
+    parser.add_argument("--start", required=True, type=datetime.fromisoformat, help="first day/time (UTC, inclusive)")
+    parser.add_argument("--end", required=True, type=datetime.fromisoformat, help="last day/time (UTC, exclusive)")
+    parser.add_argument("--output", help="file to write (default: NDJSON to stdout)")
+    parser.add_argument("--format", choices=["ndjson", "parquet"],
+                        help="defaults to parquet for .parquet outputs, ndjson otherwise")
+    parser.add_argument("--session", action="append", dest="sessions", help="only this session (repeatable)")
+    parser.add_argument("--no-archived", action="store_true", help="skip sessions in the compressed archive")
+    parser.add_argument("--batch-size", type=int, help="rows per fetch and per Parquet row group")
+    args = parser.parse_args()
+
+    export_format = args.format or ("parquet" if args.output and args.output.endswith(".parquet") else "ndjson")
+    if export_format == "parquet" and not args.output:
+        parser.error("Parquet exports need --output")
+
+    from models import SessionLocal
+    from export import iter_message_batches, write_ndjson, write_parquet
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        batches = iter_message_batches(db, args.start, args.end, args.sessions,
+                                       batch_size=args.batch_size, include_archived=not args.no_archived)
+        if export_format == "parquet":
+            count = write_parquet(batches, args.output)
+        elif args.output:
+            with open(args.output, "wb") as out:
+                count = write_ndjson(batches, out)
+        else:
+            count = write_ndjson(batches, sys.stdout.buffer)
+    finally:
+        db.close()
+    print(f"✅ Exported {count:,} messages in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Conversation Partition Manager
+==============================
+
+Lists and maintains the monthly partitions of conversation_messages on
+Postgres (see backend/api/partitions.py). Detaching a month turns it into a
+standalone table that no longer serves chat history; archive or drop it
+afterwards.
+
+Uses DATABASE_URL, like the API.
+
+Usage:
+    python tools/system/manage_partitions.py list
+    python tools/system/manage_partitions.py ensure --through 2027-06
+    python tools/system/manage_partitions.py detach 2026-01
+    python tools/system/manage_partitions.py drop 2026-01       # a detached month's table
+"""
+
+import argparse
+import os
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend", "api")
+sys.path.insert(0, API_DIR)
+os.environ.setdefault("OPENAI_API_KEY", "partitions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage conversation_messages monthly partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show attached partitions")
+    ensure = commands.add_parser("ensure", help="create missing partitions from this month on")
+    ensure.add_argument("--through", help="last month to create (YYYY-MM), defaults to PARTITION_MONTHS_AHEAD ahead")
+    detach = commands.add_parser("detach", help="detach a past month (CONCURRENTLY, without blocking writes)")
+    detach.add_argument("month", help="YYYY-MM")
+    detach.add_argument("--blocking", action="store_true", help="plain DETACH (inside a transaction block or Postgres < 14)")
+    drop = commands.add_parser("drop", help="drop a detached month's table")
+    drop.add_argument("month", help="YYYY-MM")
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+    from models import engine
+    import partitions
+
+    with engine.connect() as connection:
+        if not partitions.is_partitioned(connection):
+            print("❌ conversation_messages is not partitioned (Postgres at migration 0003 or later is required)")
+            sys.exit(1)
+
+    if args.command == "list":
+        with engine.connect() as connection:
+            for name, bound in partitions.list_partitions(connection):
+                print(f"{name:<36} {bound}")
+    elif args.command == "ensure":
+        through = partitions.parse_month(args.through) if args.through else None
+        with engine.begin() as connection:
+            created = partitions.ensure_partitions(connection, through=through)
+        print(f"✅ Created {', '.join(created)}" if created else "✅ All partitions already exist")
+    elif args.command == "detach":
+        name = partitions.detach_partition(engine, partitions.parse_month(args.month), concurrently=not args.blocking)
+        print(f"✅ Detached {name}")
+    elif args.command == "drop":
+        month = partitions.parse_month(args.month)
+        name = partitions.partition_name(month)
+        with engine.begin() as connection:
+            attached = {partition for partition, _ in partitions.list_partitions(connection)}
+            if name in attached:
+                print(f"❌ {name} is still attached; detach it first")
+                sys.exit(1)
+            connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        print(f"✅ Dropped {name}")
+
+
+if __name__ == "__main__":
+    main()